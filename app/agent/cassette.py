@@ -0,0 +1,92 @@
+"""
+Record/replay of LLM calls for deterministic, offline eval and regression runs.
+
+A cassette is a JSON-lines file (gzip-compressed when the path ends in .gz) with one
+{"key", "model", "content"} record per request, where key hashes the model and messages
+(and the tool schemas, for tool-calling requests).
+Gzip members are appended per record, so recording never rewrites the file.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+# off: live calls only; record: live calls, saved; replay: cassette only, never the network;
+# auto: replay what was recorded and record the rest
+CASSETTE_MODES = ("off", "record", "replay", "auto")
+
+def request_key(model: str, messages: List[Dict], tools: Optional[List[Dict]] = None) -> str:
+    request = {"model": model, "messages": messages}
+    if tools:
+        request["tools"] = tools
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "off"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {CASSETTE_MODES}")
+        self.path = path
+        self.mode = mode
+        self._entries: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def _load(self) -> Dict[str, str]:
+        # Loaded on first use so an unused cassette costs nothing at import time
+        if self._entries is None:
+            entries = {}
+            if os.path.exists(self.path):
+                with _open(self.path, "r") as f:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            entries[record["key"]] = record["content"]
+            self._entries = entries
+        return self._entries
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode in ("replay", "auto")
+
+    def replay(self, model: str, messages: List[Dict], tools: Optional[List[Dict]] = None) -> Optional[str]:
+        """Recorded content for this request, or None if it must go to the network."""
+        if not self.replaying:
+            return None
+        with self._lock:
+            content = self._load().get(request_key(model, messages, tools))
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return content
+
+    def record(self, model: str, messages: List[Dict], content: str,
+               tools: Optional[List[Dict]] = None) -> None:
+        if self.mode not in ("record", "auto"):
+            return
+        key = request_key(model, messages, tools)
+        with self._lock:
+            entries = self._load()
+            if entries.get(key) == content:
+                return
+            entries[key] = content
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with _open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "model": model, "content": content}) + "\n")
+            self.recorded += 1
+
+    def stats(self) -> Dict:
+        return {"mode": self.mode, "path": self.path, "hits": self.hits,
+                "misses": self.misses, "recorded": self.recorded}
@@ -0,0 +1,108 @@
+"""
+Single-flight coalescing of identical agent queries: concurrent callers asking the same
+(normalized) query share one in-flight run instead of each paying for its own LLM calls.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app import metrics
+from app.agent import deadline
+from app.models import AgentResponse
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Key under which queries count as identical: case and whitespace are ignored."""
+    return " ".join(query.lower().split())
+
+class _Flight:
+    def __init__(self, task: "asyncio.Future[Tuple[AgentResponse, int]]", deadline: deadline.Deadline):
+        self.task = task
+        self.deadline = deadline  # the run's own: the latest of its callers' deadlines
+        self.callers = 1  # attached over the run's lifetime
+        self.waiting = 0  # still awaiting the result
+
+class QueryCoalescer:
+    """
+    The first caller of a query starts its run; callers of the same query while it is in
+    flight attach to it and each get their own copy of its AgentResponse. The run is shielded
+    from any one caller's cancellation (e.g. a client disconnecting) and is cancelled only
+    once every attached caller has gone. Errors reach every attached caller. A run is
+    forgotten as soon as it finishes, so results are never served after the fact and a
+    failed run is retried by the next caller.
+
+    The run's deadline is the latest among its callers' (none if any has none), so one
+    client's short timeout never makes another's answer fail or skip verification; each
+    caller stops waiting at its own deadline with DeadlineExceeded.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[str, _Flight] = {}
+        self.runs = 0
+        self.coalesced = 0
+        self.llm_calls_saved = 0
+
+    async def run(self, query: str, start: Callable[[], Awaitable[AgentResponse]]) -> AgentResponse:
+        if not self.enabled:
+            return await start()
+        key = normalize_query(query)
+        flight = self._flights.get(key)
+        if flight is None:
+            shared = deadline.Deadline(deadline.current())
+            with deadline.use(shared):
+                task = asyncio.ensure_future(self._counted(start))
+            flight = self._flights[key] = _Flight(task, shared)
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            self.runs += 1
+        else:
+            flight.deadline.extend(deadline.current())
+            flight.callers += 1
+            self.coalesced += 1
+            logger.info(f"Coalesced query onto the in-flight run ({flight.callers} callers)")
+
+        flight.waiting += 1
+        left = deadline.remaining()
+        try:
+            response, _ = await asyncio.wait_for(asyncio.shield(flight.task), left)
+        except asyncio.TimeoutError:
+            if flight.task.done():
+                raise  # the run's own error, not this caller's deadline
+            raise deadline.DeadlineExceeded("Request deadline exceeded waiting for the shared run")
+        finally:
+            flight.waiting -= 1
+            if flight.waiting == 0 and not flight.task.done():
+                # Every caller was cancelled: stop the run, and don't let new callers attach to it
+                self._forget(key, flight)
+                flight.task.cancel()
+
+        response = response.model_copy(deep=True)
+        response.query = query
+        return response
+
+    @staticmethod
+    async def _counted(start: Callable[[], Awaitable[AgentResponse]]) -> Tuple[AgentResponse, int]:
+        with metrics.count_llm_calls() as tally:
+            response = await start()
+        return response, tally[0]
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _finish(self, key: str, flight: _Flight) -> None:
+        self._forget(key, flight)
+        # Retrieving the exception also keeps asyncio from logging it as never retrieved
+        if flight.task.cancelled() or flight.task.exception() is not None:
+            return
+        _, llm_calls = flight.task.result()
+        self.llm_calls_saved += llm_calls * (flight.callers - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "llm_calls_saved": self.llm_calls_saved,
+        }
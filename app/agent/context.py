@@ -0,0 +1,150 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models import Plan
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken is optional; fall back to ~4 characters per token
+    _encoding = None
+
+TRUNCATION_MARKER = " ...[truncated]"
+# Smallest share of the budget any step result is cut down to
+MIN_RESULT_TOKENS = 40
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max(0, max_tokens - count_tokens(TRUNCATION_MARKER))
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:keep]) + TRUNCATION_MARKER
+    return text[:keep * 4] + TRUNCATION_MARKER
+
+def compact_json(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def embed_result(result: str) -> Any:
+    """JSON tool results are embedded as structured values so they aren't escaped into a string."""
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return result
+    return data if isinstance(data, (dict, list)) else result
+
+def shrink_result(result: str, max_tokens: int) -> str:
+    """
+    Fits one tool result into max_tokens. JSON results are re-serialized compactly;
+    ranked article lists swap full content for snippets and drop the lowest-ranked
+    articles before anything is cut mid-text.
+    """
+    if count_tokens(result) <= max_tokens:
+        return result
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return truncate_to_tokens(result, max_tokens)
+
+    if isinstance(data, list) and data and all(isinstance(d, dict) for d in data):
+        data = [{k: v for k, v in d.items() if k != "content" or "snippet" not in d} for d in data]
+        while len(data) > 1 and count_tokens(compact_json(data)) > max_tokens:
+            data.pop()
+    return truncate_to_tokens(compact_json(data), max_tokens)
+
+def allocate(sizes: List[int], budget: int) -> List[int]:
+    """
+    Splits budget across results: results smaller than an even share keep their full
+    size and the leftover is shared among the larger ones.
+    """
+    allotment = list(sizes)
+    pending = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    remaining = budget
+    while pending:
+        share = max(MIN_RESULT_TOKENS, remaining // len(pending))
+        smallest = pending[0]
+        if sizes[smallest] > share:
+            for i in pending:
+                allotment[i] = share
+            break
+        remaining -= sizes[smallest]
+        pending.pop(0)
+    return allotment
+
+class ContextBudget:
+    """
+    Serializes executed plans for the verifier and final-answer prompts within a
+    per-stage token budget, and keeps totals of how much the prompts shrank
+    compared to the full indented JSON dump.
+    """
+    def __init__(self, budgets: Dict[str, int]):
+        self.budgets = budgets
+        self._lock = threading.Lock()
+        self.totals: Dict[str, Dict[str, int]] = {}
+
+    def serialize(self, plan: Plan, stage: str) -> str:
+        steps = [s.model_dump(exclude_none=True) for s in plan.steps]
+        for step in steps:
+            if "result" in step:
+                step["result"] = embed_result(step["result"])
+        text = compact_json(steps)
+        budget = self.budgets.get(stage)
+        truncated = 0
+        if budget is not None and count_tokens(text) > budget:
+            text, truncated = self._fit(steps, budget)
+
+        baseline = count_tokens(json.dumps([s.model_dump() for s in plan.steps], indent=2))
+        used = count_tokens(text)
+        self._record(stage, baseline, used, truncated)
+        logger.info(f"{stage} context: {used} tokens (full dump {baseline}), {truncated} results shrunk")
+        return text
+
+    def _fit(self, steps: List[Dict], budget: int) -> Tuple[str, int]:
+        originals = [s.get("result") for s in steps]
+        results = [r if isinstance(r, str) else compact_json(r) for r in originals]
+        overhead = count_tokens(compact_json([{k: v for k, v in s.items() if k != "result"} for s in steps]))
+        sizes = [count_tokens(r) for r in results]
+        available = max(0, budget - overhead)
+        # Escaping inside the plan JSON can push the total over; tighten and retry a few times
+        for _ in range(5):
+            allotment = allocate(sizes, available)
+            truncated = 0
+            for step, original, result, size, allowed in zip(steps, originals, results, sizes, allotment):
+                if size > allowed:
+                    step["result"] = embed_result(shrink_result(result, allowed))
+                    truncated += 1
+                elif original is not None:
+                    step["result"] = original
+            text = compact_json(steps)
+            excess = count_tokens(text) - budget
+            if excess <= 0:
+                break
+            available = max(0, available - excess)
+        return text, truncated
+
+    def _record(self, stage: str, baseline: int, used: int, truncated: int) -> None:
+        with self._lock:
+            totals = self.totals.setdefault(stage, {"prompts": 0, "baseline_tokens": 0, "tokens": 0, "truncated_results": 0})
+            totals["prompts"] += 1
+            totals["baseline_tokens"] += baseline
+            totals["tokens"] += used
+            totals["truncated_results"] += truncated
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {
+                    **totals,
+                    "saved_tokens": totals["baseline_tokens"] - totals["tokens"],
+                    "shrink_ratio": 1 - totals["tokens"] / totals["baseline_tokens"] if totals["baseline_tokens"] else 0.0,
+                }
+                for stage, totals in self.totals.items()
+            }
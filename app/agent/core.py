@@ -1,9 +1,28 @@
+import asyncio
 import json
-from typing import Dict, Any
-from app.agent.llm import call_llm
-from app.agent.prompts import PLANNER_SYSTEM_PROMPT, VERIFIER_SYSTEM_PROMPT, FINAL_ANSWER_PROMPT
-from app.agent.tools import AVAILABLE_TOOLS
-from app.models import Plan, Step, AgentResponse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
+from app.agent import deadline
+from app.agent.llm import call_llm, acall_llm, astream_llm, call_llm_tools, acall_llm_tools
+from app.agent.prompts import (
+    PLANNER_SYSTEM_PROMPT, VERIFIER_SYSTEM_PROMPT, FINAL_ANSWER_PROMPT, FUSED_ANSWER_PROMPT,
+    TOOL_CALLING_SYSTEM_PROMPT
+)
+from app.agent.tools import AVAILABLE_TOOLS, BATCH_TOOLS, TOOL_TIMEOUTS, TOOL_CACHE_TTLS
+from app.agent.tool_schemas import tool_schemas
+from app.agent.tool_cache import ToolResultCache
+from app.agent.executor import StepExecutor
+from app.agent.plan_cache import PlanCache
+from app.agent.router import FastPathRouter
+from app.agent.context import ContextBudget, count_tokens, truncate_to_tokens
+from app.agent.plan_stream import StepStreamParser
+from app.agent.session import Session, SessionStore
+from app.agent.tiers import TierStats
+from app.agent.coalesce import QueryCoalescer, normalize_query
+from app.cache.base import CacheBackend, get_shared_cache
+from app import config, metrics
+from app.models import Plan, Step, AgentResponse, BatchItemResult
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,17 +40,114 @@ def parse_json_response(response: str) -> Dict[str, Any]:
         logger.error(f"Failed to parse JSON: {response}")
         return {}
 
+# How the verify and final-answer stages are issued after execution
+ANSWER_MODES = ("sequential", "concurrent", "fused")
+
+# How tool calls are chosen: a JSON plan from the planner prompt, or the model's native tool calls
+ENGINES = ("planner", "tools")
+
+async def _relay(task: asyncio.Future, queue: asyncio.Queue) -> AsyncIterator[Any]:
+    """Yields items the task puts on the queue as they arrive, then re-raises the task's error, if any."""
+    while not (task.done() and queue.empty()):
+        next_item = asyncio.ensure_future(queue.get())
+        await asyncio.wait({next_item, task}, return_when=asyncio.FIRST_COMPLETED)
+        if next_item.done():
+            yield next_item.result()
+        else:
+            next_item.cancel()
+    task.result()
+
 class AgentCore:
-    def __init__(self):
+    def __init__(self, max_parallel_tools: int = config.MAX_PARALLEL_TOOLS,
+                 answer_mode: str = config.ANSWER_MODE,
+                 plan_cache_enabled: bool = config.PLAN_CACHE_ENABLED,
+                 tool_cache_enabled: bool = config.TOOL_CACHE_ENABLED,
+                 fast_path_enabled: bool = config.FAST_PATH_ENABLED,
+                 speculative_execution: bool = config.SPECULATIVE_EXECUTION,
+                 models: Optional[Dict[str, str]] = None,
+                 planner_escalation_model: Optional[str] = config.PLANNER_ESCALATION_MODEL,
+                 engine: str = config.ENGINE,
+                 coalesce_enabled: bool = config.COALESCE_ENABLED,
+                 shared_cache: Optional[CacheBackend] = None):
+        if answer_mode not in ANSWER_MODES:
+            raise ValueError(f"Unknown answer_mode '{answer_mode}', expected one of {ANSWER_MODES}")
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
         self.tools = AVAILABLE_TOOLS
+        self.tool_schemas = tool_schemas(self.tools)
+        self.engine = engine
+        self.answer_mode = answer_mode
+        self.speculative_execution = speculative_execution
+        # Model per stage: "planner", "verifier" and "answer" (also used for fused answers)
+        self.models = {
+            "planner": config.PLANNER_MODEL,
+            "verifier": config.VERIFIER_MODEL,
+            "answer": config.ANSWER_MODEL,
+            **(models or {}),
+        }
+        self.planner_escalation_model = planner_escalation_model
+        self.tiers = TierStats()
+        # Shared by every worker; None (the default AGENT_SHARED_CACHE=none) keeps caches per process
+        self.shared_cache = shared_cache or get_shared_cache()
+        self.tool_cache = ToolResultCache(
+            TOOL_CACHE_TTLS,
+            max_entries=config.TOOL_CACHE_MAX_ENTRIES,
+            max_bytes=config.TOOL_CACHE_MAX_BYTES,
+            enabled=tool_cache_enabled,
+            shared=self.shared_cache,
+        )
+        self.executor = StepExecutor(
+            self.tools,
+            max_workers=max_parallel_tools,
+            tool_timeouts=TOOL_TIMEOUTS,
+            default_timeout=config.DEFAULT_TOOL_TIMEOUT,
+            cache=self.tool_cache,
+            batch_tools=BATCH_TOOLS,
+        )
+        self.router = FastPathRouter(enabled=fast_path_enabled)
+        self.context = ContextBudget({
+            "verifier": config.VERIFIER_CONTEXT_TOKENS,
+            "answer": config.ANSWER_CONTEXT_TOKENS,
+        })
+        self.plan_cache = PlanCache(
+            max_entries=config.PLAN_CACHE_SIZE,
+            ttl_seconds=config.PLAN_CACHE_TTL,
+            enabled=plan_cache_enabled,
+            shared=self.shared_cache,
+        )
+        self.sessions = SessionStore(
+            max_sessions=config.SESSION_MAX_SESSIONS,
+            idle_ttl=config.SESSION_IDLE_TTL,
+            max_bytes=config.SESSION_MAX_BYTES,
+            max_session_bytes=config.SESSION_MAX_SESSION_BYTES,
+            max_turns=config.SESSION_MAX_TURNS,
+            result_ttls=TOOL_CACHE_TTLS,
+        )
+        self.coalescer = QueryCoalescer(enabled=coalesce_enabled)
 
-    def plan(self, query: str) -> Plan:
-        logger.info(f"Planning for query: {query}")
-        messages = [
+    def _planner_messages(self, query: str, session: Optional[Session] = None) -> List[Dict[str, str]]:
+        return [
             {"role": "system", "content": PLANNER_SYSTEM_PROMPT},
+            *self._history_messages(session),
             {"role": "user", "content": query}
         ]
-        response = call_llm(messages)
+
+    def _history_messages(self, session: Optional[Session]) -> List[Dict[str, str]]:
+        """Prior turns as compact user/assistant pairs, newest kept first within SESSION_CONTEXT_TOKENS."""
+        if session is None:
+            return []
+        messages: List[Dict[str, str]] = []
+        budget = config.SESSION_CONTEXT_TOKENS
+        for query, answer, calls in reversed(session.turns):
+            summary = f"Tools called: {'; '.join(calls) or 'none'}\nAnswer: {truncate_to_tokens(answer, 150)}"
+            cost = count_tokens(query) + count_tokens(summary)
+            if cost > budget:
+                break
+            budget -= cost
+            messages[:0] = [{"role": "user", "content": query}, {"role": "assistant", "content": summary}]
+        return messages
+
+    def _build_plan(self, response: str) -> Plan:
         logger.debug(f"Planner raw response: {response}")
         plan_data = parse_json_response(response)
         
@@ -43,57 +159,244 @@ class AgentCore:
         logger.info(f"Generated plan with {len(steps)} steps")
         return Plan(steps=steps)
 
-    def execute(self, plan: Plan) -> Plan:
-        logger.info("Starting plan execution")
-        for step in plan.steps:
-            if step.tool_name and step.tool_name in self.tools:
-                logger.info(f"Executing step {step.step_number}: {step.tool_name}")
-                tool_func = self.tools[step.tool_name]
-                try:
-                    # Execute tool
-                    result = tool_func(**step.tool_args)
-                    step.result = result
-                    logger.info(f"Tool {step.tool_name} success")
-                except Exception as e:
-                    error_msg = f"Error executing tool: {str(e)}"
-                    step.result = error_msg
-                    logger.error(error_msg)
-            else:
-                step.result = "No tool execution needed or tool not found."
+    def _plan_problem(self, response: str) -> Optional[str]:
+        """Why a planner response can't be used as is (one of ESCALATION_REASONS), or None."""
+        plan_data = parse_json_response(response)
+        if not isinstance(plan_data.get("steps"), list):
+            return "unparseable"
+        try:
+            steps = [Step(**s) for s in plan_data["steps"]]
+        except Exception:
+            return "invalid_step"
+        if any(s.tool_name and s.tool_name not in self.tools for s in steps):
+            return "unknown_tool"
+        return None
+
+    def _can_escalate(self, plan: Optional[Plan] = None) -> bool:
+        """True if a planner escalation model is set and plan (if given) came from the first planner model."""
+        if not self.planner_escalation_model or self.planner_escalation_model == self.models["planner"]:
+            return False
+        return plan is None or plan.planner_model == self.models["planner"]
+
+    def _escalate(self, reason: str) -> None:
+        logger.warning(f"Escalating planner from {self.models['planner']} to {self.planner_escalation_model}: {reason}")
+        self.tiers.record_escalation(reason)
+
+    def _short_on_time(self) -> bool:
+        """True when the request deadline leaves too little time for optional work (verification, re-planning)."""
+        left = deadline.remaining()
+        if left is None or left >= config.DEADLINE_SKIP_VERIFY_BELOW:
+            return False
+        logger.warning(f"{left:.2f}s left before the request deadline, skipping optional stages")
+        return True
+
+    def _llm_plan(self, query: str, escalate: bool = False) -> Plan:
+        model = self.planner_escalation_model if escalate else self.models["planner"]
+        response = call_llm(self._planner_messages(query), model=model)
+        problem = self._plan_problem(response)
+        if problem and not escalate and self._can_escalate():
+            self._escalate(problem)
+            return self._llm_plan(query, escalate=True)
+        plan = self._build_plan(response)
+        plan.planner_model = model
         return plan
 
-    def verify(self, query: str, plan: Plan) -> str:
+    async def _allm_plan(self, query: str, session: Optional[Session] = None, escalate: bool = False) -> Plan:
+        model = self.planner_escalation_model if escalate else self.models["planner"]
+        response = await acall_llm(self._planner_messages(query, session), model=model)
+        problem = self._plan_problem(response)
+        if problem and not escalate and self._can_escalate():
+            self._escalate(problem)
+            return await self._allm_plan(query, session, escalate=True)
+        plan = self._build_plan(response)
+        plan.planner_model = model
+        return plan
+
+    def _verifier_messages(self, query: str, plan: Plan) -> List[Dict[str, str]]:
         # Convert plan with results to string for verifier
-        plan_str = json.dumps([s.model_dump() for s in plan.steps], indent=2)
-        
-        messages = [
+        plan_str = self.context.serialize(plan, "verifier")
+        return [
             {"role": "system", "content": VERIFIER_SYSTEM_PROMPT},
             {"role": "user", "content": f"Query: {query}\n\nExecuted Plan:\n{plan_str}"}
         ]
-        response = call_llm(messages)
-        verification_data = parse_json_response(response)
-        return verification_data.get("status", "unknown")
 
-    def generate_final_answer(self, query: str, plan: Plan) -> str:
-        plan_str = json.dumps([s.model_dump() for s in plan.steps], indent=2)
-        messages = [
+    def _final_answer_messages(self, query: str, plan: Plan) -> List[Dict[str, str]]:
+        plan_str = self.context.serialize(plan, "answer")
+        return [
             {"role": "system", "content": FINAL_ANSWER_PROMPT},
             {"role": "user", "content": f"Query: {query}\n\nInformation Gathered:\n{plan_str}"}
         ]
-        return call_llm(messages)
 
-    def run(self, query: str) -> AgentResponse:
+    def _fused_messages(self, query: str, plan: Plan) -> List[Dict[str, str]]:
+        plan_str = self.context.serialize(plan, "answer")
+        return [
+            {"role": "system", "content": FUSED_ANSWER_PROMPT},
+            {"role": "user", "content": f"Query: {query}\n\nExecuted Plan:\n{plan_str}"}
+        ]
+
+    def _parse_fused(self, response: str) -> Tuple[str, str]:
+        data = parse_json_response(response)
+        if "answer" not in data:
+            # Fall back to treating the raw text as the answer
+            return "unknown", response
+        return data.get("status", "unknown"), data["answer"]
+
+    def _tool_calling_messages(self, query: str, session: Optional[Session] = None) -> List[Dict[str, Any]]:
+        return [
+            {"role": "system", "content": TOOL_CALLING_SYSTEM_PROMPT},
+            *self._history_messages(session),
+            {"role": "user", "content": query}
+        ]
+
+    def _tool_call_steps(self, reply: Dict[str, Any], first_step: int) -> List[Step]:
+        """One step per tool call in the reply. Unparseable arguments are left for the tool to reject."""
+        steps = []
+        for number, call in enumerate(reply["tool_calls"], first_step):
+            try:
+                tool_args = json.loads(call["arguments"] or "{}")
+            except ValueError:
+                tool_args = None
+            steps.append(Step(
+                step_number=number,
+                description=f"Call {call['name']}",
+                tool_name=call["name"],
+                tool_args=tool_args if isinstance(tool_args, dict) else None,
+            ))
+        return steps
+
+    def _tool_result_messages(self, reply: Dict[str, Any], steps: List[Step]) -> List[Dict[str, Any]]:
+        """The assistant's tool calls and one tool message per result, each within an equal share of the answer budget."""
+        per_result = config.ANSWER_CONTEXT_TOKENS // max(1, len(steps))
+        messages: List[Dict[str, Any]] = [{
+            "role": "assistant",
+            "content": reply["content"],
+            "tool_calls": [
+                {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                for call in reply["tool_calls"]
+            ],
+        }]
+        for call, step in zip(reply["tool_calls"], steps):
+            messages.append({"role": "tool", "tool_call_id": call["id"],
+                             "content": truncate_to_tokens(step.result or "", per_result)})
+        return messages
+
+    def _plan_without_llm(self, query: str, session: Optional[Session] = None) -> Optional[Plan]:
+        """
+        Tries the fast-path router, then the plan cache, before falling back to the LLM planner.
+        Follow-up turns skip the plan cache: the same words can mean something else in context.
+        """
+        routed = self._route(query)
+        if routed is not None or (session is not None and session.turns):
+            return routed
+        return self._log_cached(self.plan_cache.get(query))
+
+    async def _aplan_without_llm(self, query: str, session: Optional[Session] = None) -> Optional[Plan]:
+        """Async counterpart of _plan_without_llm(): the shared plan cache is read off the event loop."""
+        routed = self._route(query)
+        if routed is not None or (session is not None and session.turns):
+            return routed
+        return self._log_cached(await self.plan_cache.aget(query))
+
+    def _route(self, query: str) -> Optional[Plan]:
+        routed = self.router.route(query)
+        if routed is not None:
+            logger.info(f"Fast path plan: {routed.steps[0].tool_name}")
+        return routed
+
+    @staticmethod
+    def _log_cached(cached: Optional[Plan]) -> Optional[Plan]:
+        if cached is not None:
+            logger.info(f"Plan cache hit with {len(cached.steps)} steps")
+        return cached
+
+    def plan(self, query: str, escalate: bool = False) -> Plan:
+        """Plans query; escalate=True goes straight to the planner escalation model."""
+        logger.info(f"Planning for query: {query}")
+        with metrics.track_stage("plan"):
+            plan = None if escalate else self._plan_without_llm(query)
+            if plan is not None:
+                return plan
+            start = time.perf_counter()
+            plan = self._llm_plan(query, escalate)
+            self.router.record_planner_latency(time.perf_counter() - start)
+        self.plan_cache.put(query, plan)
+        return plan
+
+    def execute(self, plan: Plan) -> Plan:
+        return asyncio.run(self.aexecute(plan))
+
+    def verify(self, query: str, plan: Plan) -> str:
+        with metrics.track_stage("verify"):
+            response = call_llm(self._verifier_messages(query, plan), model=self.models["verifier"])
+        verification_data = parse_json_response(response)
+        return verification_data.get("status", "unknown")
+
+    def generate_final_answer(self, query: str, plan: Plan) -> str:
+        with metrics.track_stage("answer"):
+            return call_llm(self._final_answer_messages(query, plan), model=self.models["answer"])
+
+    def verify_and_answer(self, query: str, plan: Plan) -> Tuple[str, str]:
+        """
+        Returns (verification_status, final_answer) according to answer_mode.
+        Verification is skipped (status "skipped") when the request deadline is near.
+        """
+        if self.answer_mode != "fused" and self._short_on_time():
+            return "skipped", self.generate_final_answer(query, plan)
+        if self.answer_mode == "fused":
+            with metrics.track_stage("fused"):
+                return self._parse_fused(call_llm(self._fused_messages(query, plan), model=self.models["answer"]))
+        if self.answer_mode == "sequential":
+            return self.verify(query, plan), self.generate_final_answer(query, plan)
+        # Both stages only read the executed plan, so they can be issued together
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            verification = pool.submit(self.verify, query, plan)
+            answer = pool.submit(self.generate_final_answer, query, plan)
+            return verification.result(), answer.result()
+
+    def _run_tools(self, query: str, escalate: bool = False) -> Tuple[Plan, str, str]:
+        """Synchronous counterpart of _arun_tools(); verification runs after the model answers."""
+        routed = None if escalate else self.router.route(query)
+        if routed is not None:
+            executed_plan = self.execute(routed)
+            return (executed_plan, *self.verify_and_answer(query, executed_plan))
+
+        model = self.planner_escalation_model if escalate else self.models["planner"]
+        messages = self._tool_calling_messages(query)
+        plan = Plan(steps=[], planner_model=model)
+        for _ in range(config.TOOL_ROUNDS):
+            with metrics.track_stage("tools"):
+                reply = call_llm_tools(messages, self.tool_schemas, model=model)
+            steps = self._tool_call_steps(reply, len(plan.steps) + 1)
+            if not steps:
+                verification_status = "skipped" if self._short_on_time() else self.verify(query, plan)
+                return plan, verification_status, reply["content"] or ""
+            self.execute(Plan(steps=steps))
+            plan = Plan(steps=plan.steps + steps, planner_model=model)
+            messages += self._tool_result_messages(reply, steps)
+        # Still calling tools after the last round: answer from what was gathered
+        return (plan, *self.verify_and_answer(query, plan))
+
+    def _run_engine(self, query: str, escalate: bool = False) -> Tuple[Plan, str, str]:
+        """Returns (executed_plan, verification_status, final_answer) from the configured engine."""
+        if self.engine == "tools":
+            return self._run_tools(query, escalate)
+
         # 1. Plan
-        plan = self.plan(query)
-        
+        plan = self.plan(query, escalate)
+
         # 2. Execute
         executed_plan = self.execute(plan)
-        
-        # 3. Verify
-        verification_status = self.verify(query, executed_plan)
-        
-        # 4. Final Answer
-        final_answer = self.generate_final_answer(query, executed_plan)
+
+        # 3. Verify + 4. Final Answer
+        return (executed_plan, *self.verify_and_answer(query, executed_plan))
+
+    def run(self, query: str) -> AgentResponse:
+        executed_plan, verification_status, final_answer = self._run_engine(query)
+
+        # Re-plan with the escalation model if the first planner model's plan failed verification
+        if verification_status == "failed" and self._can_escalate(executed_plan) and not self._short_on_time():
+            self._escalate("verification_failed")
+            executed_plan, verification_status, final_answer = self._run_engine(query, escalate=True)
         
         return AgentResponse(
             query=query,
@@ -101,3 +404,317 @@ class AgentCore:
             final_answer=final_answer,
             verification_status=verification_status
         )
+
+    async def aplan(self, query: str, session: Optional[Session] = None, escalate: bool = False) -> Plan:
+        logger.info(f"Planning for query: {query}")
+        with metrics.track_stage("plan"):
+            plan = None if escalate else await self._aplan_without_llm(query, session)
+            if plan is not None:
+                return plan
+            start = time.perf_counter()
+            plan = await self._allm_plan(query, session, escalate)
+            self.router.record_planner_latency(time.perf_counter() - start)
+        if session is None or not session.turns:
+            await self.plan_cache.aput(query, plan)
+        return plan
+
+    async def aexecute(self, plan: Plan, on_step_done: Optional[Callable[[Step], None]] = None,
+                       session: Optional[Session] = None) -> Plan:
+        logger.info("Starting plan execution")
+        deadline.check("tool execution")
+        with metrics.track_stage("execute"):
+            started = self._session_results(plan, session)
+            return await self.executor.run(plan, on_step_done=on_step_done, started=started)
+
+    def _session_results(self, plan: Plan, session: Optional[Session],
+                         skip: Optional[Dict[int, Any]] = None) -> Dict[int, asyncio.Future]:
+        """Fills in steps whose tool call this session already made, as finished runs for the executor."""
+        done: Dict[int, asyncio.Future] = {}
+        if session is None:
+            return done
+        for step in plan.steps:
+            if not step.tool_name or step.step_number in (skip or {}):
+                continue
+            result = self.sessions.lookup(session, step.tool_name, step.tool_args)
+            if result is not None:
+                logger.info(f"Step {step.step_number}: {step.tool_name} served from session")
+                step.result = result
+                done[step.step_number] = asyncio.get_running_loop().create_future()
+                done[step.step_number].set_result(None)
+        return done
+
+    async def aplan_and_execute(self, query: str, session: Optional[Session] = None) -> Plan:
+        """
+        Streams the planner response and starts each independent step (known tool,
+        no depends_on) as soon as its JSON object is complete, overlapping planning with
+        tool execution. Once the whole plan parses, speculative runs of steps that match
+        it are kept and the rest of the plan executes as usual; if planning fails or
+        yields a different plan, speculative runs are cancelled and their results dropped.
+        Tools must be free of side effects for this to be safe, as all current tools are.
+        """
+        plan = await self._aplan_without_llm(query, session)
+        if plan is not None:
+            return await self.aexecute(plan, session=session)
+
+        logger.info(f"Planning for query (streaming): {query}")
+        parser = StepStreamParser()
+        speculative: Dict[int, Tuple[Step, asyncio.Future]] = {}
+        try:
+            with metrics.track_stage("plan"):
+                start = time.perf_counter()
+                async for chunk in astream_llm(self._planner_messages(query, session), model=self.models["planner"]):
+                    for data in parser.feed(chunk):
+                        self._start_speculative(data, speculative, session)
+                problem = self._plan_problem(parser.text)
+                if problem and self._can_escalate():
+                    # Speculative runs came from the rejected plan; the escalated plan runs normally
+                    self._escalate(problem)
+                    for _, run in speculative.values():
+                        run.cancel()
+                    speculative.clear()
+                    plan = await self._allm_plan(query, session, escalate=True)
+                else:
+                    plan = self._build_plan(parser.text)
+                    plan.planner_model = self.models["planner"]
+                self.router.record_planner_latency(time.perf_counter() - start)
+        except BaseException:
+            for _, run in speculative.values():
+                run.cancel()
+            raise
+
+        started: Dict[int, asyncio.Future] = {}
+        numbers = [s.step_number for s in plan.steps]
+        for index, step in enumerate(plan.steps):
+            spec = speculative.pop(step.step_number, None)
+            if spec is None:
+                continue
+            spec_step, run = spec
+            if (numbers.count(step.step_number) == 1 and not step.depends_on
+                    and (spec_step.tool_name, spec_step.tool_args) == (step.tool_name, step.tool_args)):
+                plan.steps[index] = spec_step
+                started[step.step_number] = run
+            else:
+                run.cancel()
+        for _, run in speculative.values():
+            run.cancel()
+        logger.info(f"Reusing {len(started)} speculative step(s) of {len(plan.steps)}")
+
+        if session is None or not session.turns:
+            await self.plan_cache.aput(query, plan)
+        with metrics.track_stage("execute"):
+            started.update(self._session_results(plan, session, skip=started))
+            return await self.executor.run(plan, started=started)
+
+    def _start_speculative(self, data: Dict[str, Any], speculative: Dict[int, Tuple[Step, asyncio.Future]],
+                           session: Optional[Session] = None) -> None:
+        try:
+            step = Step(**data)
+        except Exception:
+            return
+        if step.depends_on or step.tool_name not in self.tools or step.step_number in speculative:
+            return
+        if session is not None and self.sessions.has_result(session, step.tool_name, step.tool_args):
+            return
+        logger.info(f"Speculatively executing step {step.step_number}: {step.tool_name}")
+        speculative[step.step_number] = (step, asyncio.ensure_future(self.executor.run_step(step)))
+
+    async def averify(self, query: str, plan: Plan) -> str:
+        with metrics.track_stage("verify"):
+            response = await acall_llm(self._verifier_messages(query, plan), model=self.models["verifier"])
+        verification_data = parse_json_response(response)
+        return verification_data.get("status", "unknown")
+
+    async def _averify_in_time(self, query: str, plan: Plan) -> str:
+        """averify(), or "skipped" when the request deadline is near."""
+        if self._short_on_time():
+            return "skipped"
+        return await self.averify(query, plan)
+
+    async def agenerate_final_answer(self, query: str, plan: Plan) -> str:
+        with metrics.track_stage("answer"):
+            return await acall_llm(self._final_answer_messages(query, plan), model=self.models["answer"])
+
+    async def averify_and_answer(self, query: str, plan: Plan) -> Tuple[str, str]:
+        if self.answer_mode != "fused" and self._short_on_time():
+            return "skipped", await self.agenerate_final_answer(query, plan)
+        if self.answer_mode == "fused":
+            with metrics.track_stage("fused"):
+                return self._parse_fused(
+                    await acall_llm(self._fused_messages(query, plan), model=self.models["answer"]))
+        if self.answer_mode == "sequential":
+            return await self.averify(query, plan), await self.agenerate_final_answer(query, plan)
+        verification_status, final_answer = await asyncio.gather(
+            self.averify(query, plan), self.agenerate_final_answer(query, plan)
+        )
+        return verification_status, final_answer
+
+    async def _arun_tools(self, query: str, session: Optional[Session] = None,
+                          escalate: bool = False) -> Tuple[Plan, str, str]:
+        """
+        Native tool-calling engine. The model sees the tools as function schemas and may
+        request several calls per turn; they run in parallel through the executor and go
+        back as tool messages until the model replies without calling tools (at most
+        TOOL_ROUNDS turns), and that reply is the final answer. A query needing one round
+        of tools costs two sequential LLM round-trips: verification of the gathered results
+        runs alongside the next turn and is dropped if that turn calls more tools.
+        Fast-path queries skip the model and are answered as in the planner engine.
+        """
+        routed = None if escalate else self.router.route(query)
+        if routed is not None:
+            logger.info(f"Fast path plan: {routed.steps[0].tool_name}")
+            executed_plan = await self.aexecute(routed, session=session)
+            verification_status, final_answer = await self.averify_and_answer(query, executed_plan)
+            return executed_plan, verification_status, final_answer
+
+        model = self.planner_escalation_model if escalate else self.models["planner"]
+        messages = self._tool_calling_messages(query, session)
+        plan = Plan(steps=[], planner_model=model)
+        verification: Optional[asyncio.Future] = None
+        try:
+            for _ in range(config.TOOL_ROUNDS):
+                with metrics.track_stage("tools"):
+                    reply = await acall_llm_tools(messages, self.tool_schemas, model=model)
+                steps = self._tool_call_steps(reply, len(plan.steps) + 1)
+                if not steps:
+                    verification_status = await (verification or self._averify_in_time(query, plan))
+                    return plan, verification_status, reply["content"] or ""
+                if verification is not None:
+                    verification.cancel()
+                logger.info(f"Model requested {len(steps)} tool call(s)")
+                await self.aexecute(Plan(steps=steps), session=session)
+                plan = Plan(steps=plan.steps + steps, planner_model=model)
+                messages += self._tool_result_messages(reply, steps)
+                verification = asyncio.ensure_future(self._averify_in_time(query, plan))
+            # Still calling tools after the last round: answer from what was gathered
+            # (or at once with AGENT_TOOL_ROUNDS=0, when no verification was started)
+            final_answer = await self.agenerate_final_answer(query, plan)
+            return plan, await (verification or self._averify_in_time(query, plan)), final_answer
+        finally:
+            if verification is not None:
+                verification.cancel()
+
+    async def _arun_engine(self, query: str, session: Optional[Session] = None,
+                           escalate: bool = False) -> Tuple[Plan, str, str]:
+        """Returns (executed_plan, verification_status, final_answer) from the configured engine."""
+        if self.engine == "tools":
+            return await self._arun_tools(query, session, escalate)
+        if self.speculative_execution and not escalate:
+            executed_plan = await self.aplan_and_execute(query, session)
+        else:
+            plan = await self.aplan(query, session, escalate)
+            executed_plan = await self.aexecute(plan, session=session)
+        verification_status, final_answer = await self.averify_and_answer(query, executed_plan)
+        return executed_plan, verification_status, final_answer
+
+    async def arun(self, query: str, session_id: Optional[str] = None) -> AgentResponse:
+        """
+        Async counterpart of run() used by the API so requests don't block the event loop.
+        With a session_id the planner sees the session's prior turns, tool calls the
+        session already made are not repeated, and the turn is added to the session.
+        A plan from the first planner model that fails verification is re-planned once
+        with the planner escalation model, if one is set. Concurrent identical queries
+        outside a session share one run (see QueryCoalescer).
+        """
+        if session_id is None:
+            return await self.coalescer.run(query, lambda: self._arun(query))
+        return await self._arun(query, session_id)
+
+    async def _arun(self, query: str, session_id: Optional[str] = None) -> AgentResponse:
+        session = self.sessions.get(session_id) if session_id else None
+        executed_plan, verification_status, final_answer = await self._arun_engine(query, session)
+        if verification_status == "failed" and self._can_escalate(executed_plan) and not self._short_on_time():
+            self._escalate("verification_failed")
+            executed_plan, verification_status, final_answer = await self._arun_engine(
+                query, session, escalate=True)
+        if session is not None:
+            self.sessions.record_turn(session, query, executed_plan, final_answer)
+
+        return AgentResponse(
+            query=query,
+            plan=executed_plan,
+            final_answer=final_answer,
+            verification_status=verification_status,
+            session_id=session_id
+        )
+
+    async def arun_batch(self, queries: List[str],
+                         max_concurrency: int = config.BATCH_MAX_CONCURRENCY) -> List[BatchItemResult]:
+        """
+        Runs many queries with at most max_concurrency agent runs in flight and returns
+        results in submission order. Duplicate queries (ignoring case and whitespace)
+        share one run; distinct queries still share work through the plan and tool caches.
+        A failing query is reported in its own result without failing the batch.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        runs: Dict[str, asyncio.Task] = {}
+
+        async def run_limited(query: str) -> AgentResponse:
+            async with semaphore:
+                return await self.arun(query)
+
+        for query in queries:
+            key = normalize_query(query)
+            if key not in runs:
+                runs[key] = asyncio.ensure_future(run_limited(query))
+        await asyncio.gather(*runs.values(), return_exceptions=True)
+
+        results = []
+        for query in queries:
+            run = runs[normalize_query(query)]
+            if run.exception() is not None:
+                results.append(BatchItemResult(error=str(run.exception())))
+                continue
+            response = run.result().model_copy(deep=True)
+            response.query = query
+            results.append(BatchItemResult(response=response))
+        logger.info(f"Batch finished: {len(queries)} queries, {len(runs)} agent runs")
+        return results
+
+    async def astream(self, query: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Runs the agent and yields (event, data) pairs as each stage produces output:
+        "plan" once planning finishes, "step" per completed step, "answer" per streamed
+        final-answer chunk, then "verification" and finally "done" with the AgentResponse.
+        The verifier runs while the answer streams, so answer_mode does not apply here,
+        and neither does engine: streaming always plans with the planner engine.
+        """
+        plan = await self.aplan(query)
+        yield "plan", plan.model_dump()
+
+        completed: asyncio.Queue = asyncio.Queue()
+        execution = asyncio.ensure_future(self.aexecute(plan, on_step_done=completed.put_nowait))
+        try:
+            async for step in _relay(execution, completed):
+                yield "step", step.model_dump()
+            executed_plan = execution.result()
+        finally:
+            execution.cancel()
+
+        verification = asyncio.ensure_future(self._averify_in_time(query, executed_plan))
+        streamed: asyncio.Queue = asyncio.Queue()
+
+        async def stream_answer() -> None:
+            # Runs as its own task so the stage label stays out of the caller's context
+            with metrics.track_stage("answer"):
+                async for chunk in astream_llm(self._final_answer_messages(query, executed_plan),
+                                               model=self.models["answer"]):
+                    streamed.put_nowait(chunk)
+
+        answering = asyncio.ensure_future(stream_answer())
+        try:
+            chunks = []
+            async for chunk in _relay(answering, streamed):
+                chunks.append(chunk)
+                yield "answer", chunk
+            verification_status = await verification
+        finally:
+            answering.cancel()
+            verification.cancel()
+        yield "verification", {"status": verification_status}
+
+        yield "done", AgentResponse(
+            query=query,
+            plan=executed_plan,
+            final_answer="".join(chunks),
+            verification_status=verification_status
+        ).model_dump()
@@ -0,0 +1,64 @@
+"""
+Per-request deadlines. The API opens a scope per request, and every stage reads the
+remaining budget from context (asyncio tasks inherit it), so it needn't be threaded
+through every call: LLM and tool calls use it as their timeout and the pipeline skips
+optional work when it runs short.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+class Deadline:
+    """A time.monotonic() timestamp by which work must finish, or None for no limit."""
+    def __init__(self, at: Optional[float]):
+        self.at = at
+
+    def extend(self, at: Optional[float]) -> None:
+        """Moves the deadline out to at (None: lifts it), never in; for work shared by several requests."""
+        self.at = None if self.at is None or at is None else max(self.at, at)
+
+# Deadline of the code currently running, or None for no deadline
+current_deadline = ContextVar("current_deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before its work is done."""
+
+def current() -> Optional[float]:
+    """time.monotonic() by which the current work must finish, or None."""
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline.at
+
+@contextmanager
+def scope(seconds: Optional[float]) -> Iterator[None]:
+    """Gives the code inside at most seconds (None or <= 0: no limit); nested scopes only shorten it."""
+    at = current()
+    if seconds is not None and seconds > 0:
+        mine = time.monotonic() + seconds
+        at = mine if at is None else min(at, mine)
+    with use(Deadline(at)):
+        yield
+
+@contextmanager
+def use(deadline: Optional[Deadline]) -> Iterator[None]:
+    """Runs the code inside (and tasks started there) under deadline, which the caller may still extend."""
+    token = current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (negative once passed), or None without one."""
+    at = current()
+    return None if at is None else at - time.monotonic()
+
+def timeout(default: float) -> float:
+    """default, capped to the remaining budget."""
+    left = remaining()
+    return default if left is None else max(0.0, min(default, left))
+
+def check(what: str) -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Request deadline exceeded before {what}")
@@ -0,0 +1,244 @@
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from app import metrics
+from app.agent import deadline
+from app.agent.tool_cache import ToolResultCache
+from app.models import Plan, Step
+
+logger = logging.getLogger(__name__)
+
+def build_dependency_graph(steps: List[Step]) -> Dict[int, Set[int]]:
+    """
+    Maps each step_number to the step_numbers it depends on.
+    Unknown or self references are dropped; steps without depends_on are independent.
+    """
+    numbers = {s.step_number for s in steps}
+    graph = {}
+    for s in steps:
+        deps = set(s.depends_on or [])
+        graph[s.step_number] = {d for d in deps if d in numbers and d != s.step_number}
+    return graph
+
+def topological_order(graph: Dict[int, Set[int]]) -> List[int]:
+    """Kahn's algorithm. Steps that are part of a cycle are left out of the result."""
+    remaining = {n: set(deps) for n, deps in graph.items()}
+    order = []
+    ready = sorted(n for n, deps in remaining.items() if not deps)
+    while ready:
+        n = ready.pop(0)
+        order.append(n)
+        del remaining[n]
+        for other, deps in remaining.items():
+            if n in deps:
+                deps.discard(n)
+                if not deps:
+                    ready.append(other)
+        ready.sort()
+    return order
+
+class StepExecutor:
+    """
+    Runs plan steps concurrently on a bounded thread pool.
+    A step starts once every step in its depends_on has finished; each tool call
+    is bounded by its own timeout and the request deadline. Results are served from the optional cache when fresh,
+    and independent steps calling a tool listed in batch_tools share one batched call.
+
+    A timed-out call can't be stopped and keeps its thread until the tool returns, so
+    the pool it ran on is retired (it finishes what it already holds) and later calls
+    get a fresh one: hung tools can't use up the max_workers slots of later steps.
+    """
+    def __init__(self, tools: Dict[str, Callable], max_workers: int = 4,
+                 tool_timeouts: Optional[Dict[str, float]] = None, default_timeout: float = 10.0,
+                 cache: Optional[ToolResultCache] = None,
+                 batch_tools: Optional[Dict[str, Callable[[List[Dict]], List[str]]]] = None):
+        self.tools = tools
+        self.batch_tools = batch_tools or {}
+        self.cache = cache
+        self.max_workers = max_workers
+        self.tool_timeouts = tool_timeouts or {}
+        self.default_timeout = default_timeout
+        self.pool = self._new_pool()
+        self._pool_lock = threading.Lock()
+
+    def _new_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent-tool")
+
+    def _retire_pool(self, pool: ThreadPoolExecutor) -> None:
+        """Replaces pool, whose call timed out, unless another timeout already did."""
+        with self._pool_lock:
+            if self.pool is not pool:
+                return
+            self.pool = self._new_pool()
+        pool.shutdown(wait=False)
+
+    def timeout_for(self, tool_name: str) -> float:
+        """The tool's own timeout, capped to what is left of the request deadline."""
+        return deadline.timeout(self.tool_timeouts.get(tool_name, self.default_timeout))
+
+    def _call_tool(self, step: Step) -> str:
+        tool_func = self.tools[step.tool_name]
+        start = time.perf_counter()
+        result = tool_func(**(step.tool_args or {}))
+        metrics.TOOL_DURATION.observe(time.perf_counter() - start, tool=step.tool_name)
+        if self.cache is not None:
+            self.cache.put(step.tool_name, step.tool_args, result)
+        return result
+
+    async def run_step(self, step: Step) -> None:
+        if not (step.tool_name and step.tool_name in self.tools):
+            step.result = "No tool execution needed or tool not found."
+            return
+
+        if self.cache is not None:
+            cached = await self.cache.aget(step.tool_name, step.tool_args)
+            if cached is not None:
+                logger.info(f"Step {step.step_number}: {step.tool_name} served from cache")
+                step.result = cached
+                return
+
+        logger.info(f"Executing step {step.step_number}: {step.tool_name}")
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout_for(step.tool_name)
+        pool = self.pool
+        try:
+            # Tools are blocking calls, keep them off the event loop
+            step.result = await asyncio.wait_for(
+                loop.run_in_executor(pool, self._call_tool, step), timeout
+            )
+            logger.info(f"Tool {step.tool_name} success")
+        except asyncio.TimeoutError:
+            self._retire_pool(pool)
+            error_msg = f"Error executing tool: {step.tool_name} timed out after {timeout:g}s"
+            step.result = error_msg
+            metrics.TOOL_ERRORS.inc(tool=step.tool_name, reason="timeout")
+            logger.error(error_msg)
+        except Exception as e:
+            error_msg = f"Error executing tool: {str(e)}"
+            metrics.TOOL_ERRORS.inc(tool=step.tool_name, reason="exception")
+            step.result = error_msg
+            logger.error(error_msg)
+
+    def _call_batch(self, tool_name: str, steps: List[Step]) -> List[str]:
+        start = time.perf_counter()
+        results = self.batch_tools[tool_name]([s.tool_args or {} for s in steps])
+        metrics.TOOL_DURATION.observe(time.perf_counter() - start, tool=tool_name)
+        if self.cache is not None:
+            for step, result in zip(steps, results):
+                self.cache.put(tool_name, step.tool_args, result)
+        return results
+
+    async def run_batch(self, tool_name: str, steps: List[Step]) -> None:
+        """Runs several steps of the same tool as one batched call, serving cached ones first."""
+        if self.cache is not None:
+            pending = []
+            for step in steps:
+                cached = await self.cache.aget(tool_name, step.tool_args)
+                if cached is None:
+                    pending.append(step)
+                else:
+                    step.result = cached
+            steps = pending
+        if not steps:
+            return
+
+        logger.info(f"Executing steps {[s.step_number for s in steps]}: {tool_name} (batched)")
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout_for(tool_name)
+        pool = self.pool
+        try:
+            results = await asyncio.wait_for(
+                loop.run_in_executor(pool, self._call_batch, tool_name, steps), timeout
+            )
+            for step, result in zip(steps, results):
+                step.result = result
+            logger.info(f"Tool {tool_name} batch success")
+        except asyncio.TimeoutError:
+            self._retire_pool(pool)
+            error_msg = f"Error executing tool: {tool_name} timed out after {timeout:g}s"
+            for step in steps:
+                step.result = error_msg
+            metrics.TOOL_ERRORS.inc(tool=tool_name, reason="timeout")
+            logger.error(error_msg)
+        except Exception as e:
+            error_msg = f"Error executing tool: {str(e)}"
+            metrics.TOOL_ERRORS.inc(tool=tool_name, reason="exception")
+            for step in steps:
+                step.result = error_msg
+            logger.error(error_msg)
+
+    def _batch_groups(self, steps: List[Step], graph: Dict[int, Set[int]]) -> Dict[str, List[Step]]:
+        """
+        Groups independent steps by batchable tool; groups of one are left to run_step. So are
+        steps whose args don't fit the tool's signature, so a malformed step fails on its own
+        instead of failing every step batched with it.
+        """
+        groups: Dict[str, List[Step]] = {}
+        for step in steps:
+            if (step.tool_name in self.batch_tools and step.tool_name in self.tools
+                    and not graph[step.step_number] and self._args_fit(step)):
+                groups.setdefault(step.tool_name, []).append(step)
+        return {name: group for name, group in groups.items() if len(group) > 1}
+
+    def _args_fit(self, step: Step) -> bool:
+        try:
+            inspect.signature(self.tools[step.tool_name]).bind(**(step.tool_args or {}))
+        except TypeError:
+            return False
+        return True
+
+    async def run(self, plan: Plan, on_step_done: Optional[Callable[[Step], None]] = None,
+                  started: Optional[Dict[int, asyncio.Future]] = None) -> Plan:
+        """
+        Executes every step of plan in place. on_step_done, if given, is called
+        on the event loop with each step as soon as its result is set. started maps
+        step numbers to runs of those steps already in flight (speculative execution),
+        which are awaited instead of running the steps again.
+        """
+        started = started or {}
+        graph = build_dependency_graph(plan.steps)
+        order = topological_order(graph)
+        by_number: Dict[int, List[Step]] = {}
+        for step in plan.steps:
+            by_number.setdefault(step.step_number, []).append(step)
+        tasks: Dict[int, asyncio.Task] = {}
+        batch_tasks: Dict[int, asyncio.Task] = {}
+        unstarted = [s for s in plan.steps if s.step_number not in started]
+        for tool_name, group in self._batch_groups(unstarted, graph).items():
+            batch_task = asyncio.ensure_future(self.run_batch(tool_name, group))
+            for step in group:
+                batch_tasks[id(step)] = batch_task
+
+        async def run_when_ready(steps: List[Step], deps: Set[int]) -> None:
+            if deps:
+                await asyncio.gather(*(tasks[d] for d in deps))
+            await asyncio.gather(*(
+                started[s.step_number] if s.step_number in started
+                else batch_tasks[id(s)] if id(s) in batch_tasks else self.run_step(s)
+                for s in steps
+            ))
+            if on_step_done is not None:
+                for step in steps:
+                    on_step_done(step)
+
+        for number in order:
+            tasks[number] = asyncio.ensure_future(run_when_ready(by_number[number], graph[number]))
+
+        for step in plan.steps:
+            if step.step_number not in tasks:
+                step.result = "Error executing tool: circular dependency between steps."
+                logger.error(f"Step {step.step_number} skipped: circular dependency")
+                if on_step_done is not None:
+                    on_step_done(step)
+
+        if tasks:
+            await asyncio.gather(*tasks.values())
+
+        # Keep results in step_number order regardless of completion order
+        plan.steps.sort(key=lambda s: s.step_number)
+        return plan
@@ -0,0 +1,175 @@
+import gzip
+import heapq
+import json
+import math
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "about", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "kb", "me", "of", "on", "or", "our", "the", "to", "we", "what",
+    "which", "with", "articles", "article", "find", "search",
+}
+# Title terms count this many times towards term frequency
+TITLE_BOOST = 2
+
+def stem(token: str) -> str:
+    """Light suffix stripping so "transfers"/"transfer" and "opening"/"open" share a term."""
+    if len(token) > 4 and token.endswith("ies"):
+        token = token[:-3] + "y"
+    elif token.endswith("sses"):
+        token = token[:-2]
+    elif token.endswith("s") and not token.endswith(("ss", "us", "is")) and len(token) > 3:
+        token = token[:-1]
+    if len(token) > 5 and token.endswith("ing"):
+        token = token[:-3]
+    elif len(token) > 4 and token.endswith("ed"):
+        token = token[:-2]
+    if len(token) > 4 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+def analyze(text: str) -> List[str]:
+    return [stem(t) for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+def make_snippet(content: str, terms: Iterable[str], width: int = 160) -> str:
+    """Returns a window of content around the first token matching one of the query terms."""
+    terms = set(terms)
+    for match in TOKEN_PATTERN.finditer(content.lower()):
+        if stem(match.group(0)) in terms:
+            start = max(0, match.start() - width // 4)
+            end = min(len(content), start + width)
+            snippet = content[start:end].strip()
+            return ("..." if start > 0 else "") + snippet + ("..." if end < len(content) else "")
+    return content[:width] + ("..." if len(content) > width else "")
+
+class KBIndex:
+    """
+    Inverted index over KB articles with BM25 ranking.
+    Build it once with add_articles(), or save()/load() a prebuilt index from disk.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.articles: List[Dict[str, str]] = []
+        self.doc_lengths = array("I")
+        # term -> parallel arrays of doc ids and term frequencies
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        # term -> per-posting BM25 weight without idf, computed once after articles change
+        self._impacts: Dict[str, array] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def add_articles(self, articles: Iterable[Dict[str, str]]) -> None:
+        for article in articles:
+            doc_id = len(self.articles)
+            self.articles.append(article)
+            tokens = analyze(article["title"]) * TITLE_BOOST + analyze(article["content"])
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, tf in counts.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = (array("I"), array("H"))
+                posting[0].append(doc_id)
+                posting[1].append(min(tf, 65535))
+            self.doc_lengths.append(len(tokens))
+            self._total_length += len(tokens)
+        self._impacts = {}
+
+    def _compute_impacts(self) -> None:
+        if not self.articles:
+            return
+        avg_length = self._total_length / len(self.articles)
+        k1, b = self.k1, self.b
+        lengths = self.doc_lengths
+        self._impacts = {
+            term: array("f", [tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[d] / avg_length))
+                              for d, tf in zip(doc_ids, tfs)])
+            for term, (doc_ids, tfs) in self.postings.items()
+        }
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, object]]:
+        terms = list(dict.fromkeys(analyze(query)))
+        if not terms or not self.articles:
+            return []
+
+        if not self._impacts:
+            self._compute_impacts()
+
+        n_docs = len(self.articles)
+        scores: Dict[int, float] = {}
+        get_score = scores.get
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            doc_ids = posting[0]
+            idf = math.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            for doc_id, impact in zip(doc_ids, self._impacts[term]):
+                scores[doc_id] = get_score(doc_id, 0.0) + idf * impact
+
+        top = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        results = []
+        for doc_id, score in top:
+            article = self.articles[doc_id]
+            results.append({
+                **article,
+                "score": round(score, 4),
+                "snippet": make_snippet(article["content"], terms),
+            })
+        return results
+
+    def save(self, path: str) -> None:
+        """Writes the index as JSON, gzip-compressed when path ends with .gz."""
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "articles": self.articles,
+            "doc_lengths": self.doc_lengths.tolist(),
+            "postings": {t: [ids.tolist(), tfs.tolist()] for t, (ids, tfs) in self.postings.items()},
+        }
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str) -> "KBIndex":
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.articles = data["articles"]
+        index.doc_lengths = array("I", data["doc_lengths"])
+        index.postings = {t: (array("I", ids), array("H", tfs)) for t, (ids, tfs) in data["postings"].items()}
+        index._total_length = sum(index.doc_lengths)
+        index._compute_impacts()
+        return index
+
+def build_index(articles: Iterable[Dict[str, str]], path: Optional[str] = None) -> KBIndex:
+    """Builds an index from articles, or loads the prebuilt one at path if given."""
+    if path:
+        return KBIndex.load(path)
+    index = KBIndex()
+    index.add_articles(articles)
+    index._compute_impacts()
+    return index
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a prebuilt KB index for KB_INDEX_PATH.")
+    parser.add_argument("articles", help="JSON list or JSON-lines file of {id, title, content} articles")
+    parser.add_argument("output", help="Index path, gzip-compressed when it ends with .gz")
+    args = parser.parse_args()
+
+    with open(args.articles, encoding="utf-8") as f:
+        text = f.read().strip()
+    records = json.loads(text) if text.startswith("[") else [json.loads(line) for line in text.splitlines() if line]
+    build_index(records).save(args.output)
+    print(f"Indexed {len(records)} articles into {args.output}")
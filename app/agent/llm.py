@@ -1,28 +1,403 @@
+import asyncio
+import json
+import logging
 import os
-from openai import OpenAI
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
+from app import config, metrics
+from app.agent import deadline
+from app.agent.cassette import Cassette
+from app.agent.llm_cache import LLMResponseCache
+from app.cache.base import create_cache_backend, get_shared_cache
+from app.agent.rate_limit import ConcurrencyGovernor, RateLimiter
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+class LLMError(Exception):
+    """Raised when an LLM call fails for good: a non-retryable error or retries exhausted."""
+
+# Transient failures worth retrying: 429s, 5xx, timeouts and dropped connections
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+)
+
+# Completion tokens reserved per call against the tokens-per-minute budget, settled once usage is known
+EXPECTED_COMPLETION_TOKENS = 300
+
+HTTP_LIMITS = httpx.Limits(
+    max_connections=config.LLM_MAX_CONNECTIONS,
+    max_keepalive_connections=config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY,
+)
+HTTP_TIMEOUT = httpx.Timeout(config.LLM_TIMEOUT, connect=config.LLM_CONNECT_TIMEOUT)
+
+def create_clients(api_key: str, base_url: Optional[str] = None) -> Tuple[OpenAI, AsyncOpenAI]:
+    """
+    Builds sync and async clients with tuned connection pools. OpenAI's own retries
+    are disabled so ours can honor Retry-After and share the rate limiter.
+    """
+    sync_client = OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        max_retries=0,
+        http_client=httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+    )
+    async_client = AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        max_retries=0,
+        http_client=httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+    )
+    return sync_client, async_client
+
 # Initialize OpenAI client
 # Note: In a real app, you might want to handle missing keys more gracefully
 api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key) if api_key else None
+client, async_client = create_clients(api_key, config.OPENAI_BASE_URL) if api_key else (None, None)
+
+rate_limiter = RateLimiter(config.LLM_REQUESTS_PER_MINUTE, config.LLM_TOKENS_PER_MINUTE)
+governor = ConcurrencyGovernor(config.LLM_MAX_IN_FLIGHT)
+cassette = Cassette(config.LLM_CASSETTE_PATH, config.LLM_CASSETTE_MODE)
+
+def create_response_cache() -> LLMResponseCache:
+    disk = None
+    if config.LLM_CACHE_ENABLED:
+        disk = create_cache_backend("sqlite", config.LLM_CACHE_PATH) if config.LLM_CACHE_PATH else get_shared_cache()
+    return LLMResponseCache(
+        config.LLM_CACHE_STAGES,
+        ttl=config.LLM_CACHE_TTL,
+        max_entries=config.LLM_CACHE_MAX_ENTRIES,
+        max_bytes=config.LLM_CACHE_MAX_BYTES,
+        enabled=config.LLM_CACHE_ENABLED,
+        disk=disk,
+    )
+
+response_cache = create_response_cache()
+
+def estimate_tokens(messages: list, tools: Optional[List[Dict]] = None) -> int:
+    """Rough prompt size (~4 characters per token), including any tool schemas, plus the expected completion."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    if tools:
+        chars += len(json.dumps(tools))
+    return chars // 4 + 4 * len(messages) + EXPECTED_COMPLETION_TOKENS
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Reads Retry-After (or retry-after-ms) from an API error response, if present."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retry number attempt + 1. Honors the server's Retry-After
+    (plus a little jitter so waiting callers don't retry in lockstep), otherwise
+    exponential backoff with full jitter.
+    """
+    if retry_after is not None:
+        return retry_after * random.uniform(1.0, 1.1)
+    return random.uniform(0, min(config.LLM_BACKOFF_MAX, config.LLM_BACKOFF_BASE * 2 ** attempt))
+
+def _total_tokens(response, default: int) -> int:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) or default
+
+def _record_usage(response, model: str, start: float) -> None:
+    """Records duration and token usage of a finished call under the current pipeline stage."""
+    stage = metrics.current_stage.get()
+    metrics.record_llm_call()
+    metrics.LLM_DURATION.observe(time.perf_counter() - start, stage=stage, model=model)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        metrics.LLM_PROMPT_TOKENS.inc(usage.prompt_tokens or 0, stage=stage, model=model)
+        metrics.LLM_COMPLETION_TOKENS.inc(usage.completion_tokens or 0, stage=stage, model=model)
+
+def _request_options() -> Dict:
+    """Per-call timeout: the client's usual timeouts, capped to what is left of the request deadline."""
+    if deadline.remaining() is None:
+        return {}
+    return {"timeout": httpx.Timeout(deadline.timeout(config.LLM_TIMEOUT),
+                                     connect=deadline.timeout(config.LLM_CONNECT_TIMEOUT))}
+
+def _check_deadline() -> None:
+    deadline.check(f"the {metrics.current_stage.get()} LLM call")
+
+def _acquire(estimated: int) -> None:
+    """Waits for the rate limits; the reservation is refunded if the deadline has passed meanwhile."""
+    rate_limiter.acquire(estimated)
+    try:
+        _check_deadline()
+    except deadline.DeadlineExceeded:
+        rate_limiter.refund(estimated)
+        raise
+
+async def _aacquire(estimated: int) -> None:
+    await rate_limiter.aacquire(estimated)
+    try:
+        _check_deadline()
+    except deadline.DeadlineExceeded:
+        rate_limiter.refund(estimated)
+        raise
+
+def _retry_or_raise(error: Exception, attempt: int, model: str) -> float:
+    delay = backoff_delay(attempt, retry_after_seconds(error))
+    left = deadline.remaining()
+    out_of_time = left is not None and left <= delay
+    if not isinstance(error, RETRYABLE_ERRORS) or attempt >= config.LLM_MAX_RETRIES or out_of_time:
+        metrics.LLM_ERRORS.inc(stage=metrics.current_stage.get(), model=model)
+    if not isinstance(error, RETRYABLE_ERRORS):
+        raise LLMError(f"Error calling LLM: {error}") from error
+    if out_of_time:
+        raise deadline.DeadlineExceeded(f"Request deadline exceeded calling the LLM: {error}") from error
+    if attempt >= config.LLM_MAX_RETRIES:
+        raise LLMError(f"Error calling LLM after {attempt + 1} attempts: {error}") from error
+    logger.warning(f"LLM call failed ({type(error).__name__}), retrying in {delay:.2f}s")
+    return delay
+
+def _replay(messages: list, model: str, tools: Optional[List[Dict]] = None) -> Optional[str]:
+    content = cassette.replay(model, messages, tools)
+    if content is None and cassette.mode == "replay":
+        raise LLMError(f"No recorded LLM response for this request in {cassette.path} (replay mode)")
+    return content
+
+def _lookup(messages: list, model: str, tools: Optional[List[Dict]] = None) -> Optional[str]:
+    """Recorded or cached content for this request, or None if it must go to the network."""
+    content = _replay(messages, model, tools)
+    if content is None:
+        content = response_cache.get(metrics.current_stage.get(), model, messages, tools)
+        if content is not None:
+            cassette.record(model, messages, content, tools)
+    return content
+
+def _save(messages: list, model: str, content: str, response, tools: Optional[List[Dict]] = None) -> None:
+    cassette.record(model, messages, content, tools)
+    if content is not None:
+        response_cache.put(metrics.current_stage.get(), model, messages, content, _total_tokens(response, 0), tools)
+
+async def _alookup(messages: list, model: str, tools: Optional[List[Dict]] = None) -> Optional[str]:
+    """_lookup() for async callers: the response cache's disk tier is read off the event loop."""
+    content = _replay(messages, model, tools)
+    if content is None:
+        content = await response_cache.aget(metrics.current_stage.get(), model, messages, tools)
+        if content is not None:
+            cassette.record(model, messages, content, tools)
+    return content
+
+async def _asave(messages: list, model: str, content: str, response, tools: Optional[List[Dict]] = None) -> None:
+    cassette.record(model, messages, content, tools)
+    if content is not None:
+        await response_cache.aput(metrics.current_stage.get(), model, messages, content,
+                                  _total_tokens(response, 0), tools)
 
 def call_llm(messages: list, model: str = "gpt-4o") -> str:
     """
     Wrapper for calling OpenAI ChatCompletion.
     """
+    replayed = _lookup(messages, model)
+    if replayed is not None:
+        return replayed
     if not client:
         # Fallback for demo purposes if no key is provided
         return "Error: OPENAI_API_KEY not found in environment variables."
-        
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0.0, # Deterministic for agents
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error calling LLM: {str(e)}"
+
+    estimated = estimate_tokens(messages)
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        _acquire(estimated)
+        try:
+            with governor.slot():
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.0, # Deterministic for agents
+                    **_request_options(),
+                )
+            rate_limiter.settle(estimated, _total_tokens(response, estimated))
+            _record_usage(response, model, start)
+            content = response.choices[0].message.content
+            _save(messages, model, content, response)
+            return content
+        except openai.OpenAIError as e:
+            rate_limiter.refund(estimated)
+            time.sleep(_retry_or_raise(e, attempt, model))
+            attempt += 1
+
+async def acall_llm(messages: list, model: str = "gpt-4o") -> str:
+    """
+    Async wrapper for calling OpenAI ChatCompletion without blocking the event loop.
+    """
+    replayed = await _alookup(messages, model)
+    if replayed is not None:
+        return replayed
+    if not async_client:
+        return "Error: OPENAI_API_KEY not found in environment variables."
+
+    estimated = estimate_tokens(messages)
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        await _aacquire(estimated)
+        try:
+            async with governor.aslot():
+                response = await async_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.0,
+                    **_request_options(),
+                )
+            rate_limiter.settle(estimated, _total_tokens(response, estimated))
+            _record_usage(response, model, start)
+            content = response.choices[0].message.content
+            await _asave(messages, model, content, response)
+            return content
+        except openai.OpenAIError as e:
+            rate_limiter.refund(estimated)
+            await asyncio.sleep(_retry_or_raise(e, attempt, model))
+            attempt += 1
+
+def _tool_reply(message) -> Dict:
+    """The parts of an assistant message the tool-calling engine needs, as plain JSON-able data."""
+    return {
+        "content": message.content,
+        "tool_calls": [
+            {"id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+            for call in (message.tool_calls or [])
+        ],
+    }
+
+def call_llm_tools(messages: list, tools: List[Dict], model: str = "gpt-4o") -> Dict:
+    """
+    ChatCompletion with tool schemas. Returns {"content", "tool_calls"}, where each tool call
+    is {"id", "name", "arguments"} with arguments still a JSON string, as the model wrote it.
+    """
+    replayed = _lookup(messages, model, tools)
+    if replayed is not None:
+        return json.loads(replayed)
+    if not client:
+        return {"content": "Error: OPENAI_API_KEY not found in environment variables.", "tool_calls": []}
+
+    estimated = estimate_tokens(messages, tools)
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        _acquire(estimated)
+        try:
+            with governor.slot():
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    tools=tools,
+                    parallel_tool_calls=True,
+                    temperature=0.0,
+                    **_request_options(),
+                )
+            rate_limiter.settle(estimated, _total_tokens(response, estimated))
+            _record_usage(response, model, start)
+            reply = _tool_reply(response.choices[0].message)
+            _save(messages, model, json.dumps(reply), response, tools)
+            return reply
+        except openai.OpenAIError as e:
+            rate_limiter.refund(estimated)
+            time.sleep(_retry_or_raise(e, attempt, model))
+            attempt += 1
+
+async def acall_llm_tools(messages: list, tools: List[Dict], model: str = "gpt-4o") -> Dict:
+    """Async counterpart of call_llm_tools()."""
+    replayed = await _alookup(messages, model, tools)
+    if replayed is not None:
+        return json.loads(replayed)
+    if not async_client:
+        return {"content": "Error: OPENAI_API_KEY not found in environment variables.", "tool_calls": []}
+
+    estimated = estimate_tokens(messages, tools)
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        await _aacquire(estimated)
+        try:
+            async with governor.aslot():
+                response = await async_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    tools=tools,
+                    parallel_tool_calls=True,
+                    temperature=0.0,
+                    **_request_options(),
+                )
+            rate_limiter.settle(estimated, _total_tokens(response, estimated))
+            _record_usage(response, model, start)
+            reply = _tool_reply(response.choices[0].message)
+            await _asave(messages, model, json.dumps(reply), response, tools)
+            return reply
+        except openai.OpenAIError as e:
+            rate_limiter.refund(estimated)
+            await asyncio.sleep(_retry_or_raise(e, attempt, model))
+            attempt += 1
+
+async def astream_llm(messages: list, model: str = "gpt-4o") -> AsyncIterator[str]:
+    """
+    Streams the ChatCompletion response as text chunks as they arrive.
+    Failures are retried until the first chunk is received; after that they raise LLMError.
+    """
+    replayed = await _alookup(messages, model)
+    if replayed is not None:
+        yield replayed
+        return
+    if not async_client:
+        yield "Error: OPENAI_API_KEY not found in environment variables."
+        return
+
+    estimated = estimate_tokens(messages)
+    start = time.perf_counter()
+    usage_chunk = None
+    chunks = []
+    attempt = 0
+    async with governor.aslot():
+        while True:
+            await _aacquire(estimated)
+            try:
+                stream = await async_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.0,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **_request_options(),
+                )
+                break
+            except openai.OpenAIError as e:
+                rate_limiter.refund(estimated)
+                await asyncio.sleep(_retry_or_raise(e, attempt, model))
+                attempt += 1
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage_chunk = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        except openai.OpenAIError as e:
+            metrics.LLM_ERRORS.inc(stage=metrics.current_stage.get(), model=model)
+            raise LLMError(f"Error streaming from LLM: {e}") from e
+        _record_usage(usage_chunk, model, start)
+        await _asave(messages, model, "".join(chunks), usage_chunk)
@@ -0,0 +1,183 @@
+"""
+Exact-match cache of LLM responses. Every call runs at temperature 0, so the same model,
+messages and tool schemas get the same answer; the verifier and final-answer prompts
+repeat whenever a query and its tool results do.
+
+Entries live in an in-process LRU and, with a CacheBackend, on disk under the "llm"
+namespace, which also shares them between workers and across restarts.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.cache.base import CacheBackend, seconds_left
+
+NAMESPACE = "llm"
+
+def make_key(model: str, messages: List[Dict], tools: Optional[List[Dict]] = None,
+             temperature: float = 0.0) -> str:
+    """Content address of a request: everything that can change the response."""
+    request = {"model": model, "messages": messages, "temperature": temperature}
+    if tools:
+        request["tools"] = tools
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    LRU of responses bounded by entry count and total size, with one TTL for all entries.
+    Only calls made inside one of stages (the pipeline stage labelling the call) are
+    cached. Each entry keeps the tokens its call used, so hits report the tokens saved.
+    Async callers use aget/aput, which keep disk I/O off the event loop.
+    """
+    def __init__(self, stages: Iterable[str], ttl: float = 3600, max_entries: int = 10000,
+                 max_bytes: int = 50 * 1024 * 1024, enabled: bool = True,
+                 disk: Optional[CacheBackend] = None):
+        self.stages = set(stages)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.disk = disk
+        # key -> (expires_at, content, tokens)
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.tokens_saved: Dict[str, int] = {}
+        self.disk_hits = 0
+        self.evictions = 0
+
+    def caches(self, stage: str) -> bool:
+        return self.enabled and self.ttl > 0 and stage in self.stages
+
+    def _remove(self, key: str) -> None:
+        _, content, _ = self._entries.pop(key)
+        self._bytes -= len(content)
+
+    def _hit(self, stage: str, tokens: int) -> None:
+        self.hits[stage] = self.hits.get(stage, 0) + 1
+        self.tokens_saved[stage] = self.tokens_saved.get(stage, 0) + tokens
+
+    def get(self, stage: str, model: str, messages: List[Dict],
+            tools: Optional[List[Dict]] = None) -> Optional[str]:
+        if not self.caches(stage):
+            return None
+        key = make_key(model, messages, tools)
+        content = self._memory_get(stage, key)
+        if content is None:
+            found = self.disk.get_entry(NAMESPACE, key) if self.disk is not None else None
+            content = self._from_disk(stage, key, found)
+        return content
+
+    async def aget(self, stage: str, model: str, messages: List[Dict],
+                   tools: Optional[List[Dict]] = None) -> Optional[str]:
+        if not self.caches(stage):
+            return None
+        key = make_key(model, messages, tools)
+        content = self._memory_get(stage, key)
+        if content is None:
+            found = await self.disk.aget_entry(NAMESPACE, key) if self.disk is not None else None
+            content = self._from_disk(stage, key, found)
+        return content
+
+    def _memory_get(self, stage: str, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._hit(stage, entry[2])
+            return entry[1]
+
+    def _from_disk(self, stage: str, key: str, found: Optional[Tuple[str, float]]) -> Optional[str]:
+        """Counts a lookup the memory tier missed, keeping what the disk tier found."""
+        content, tokens = None, 0
+        if found is not None:
+            try:
+                record = json.loads(found[0])
+                content, tokens = record["content"], int(record["tokens"])
+            except (ValueError, KeyError, TypeError):
+                pass
+            if not isinstance(content, str):
+                # A malformed row is a miss, like any other failing lookup
+                content = None
+        with self._lock:
+            if content is None:
+                self.misses[stage] = self.misses.get(stage, 0) + 1
+                return None
+            self._hit(stage, tokens)
+            self.disk_hits += 1
+        # Kept in memory only for what is left of the disk entry's TTL
+        self._store(key, content, tokens, min(self.ttl, seconds_left(found[1])))
+        return content
+
+    def put(self, stage: str, model: str, messages: List[Dict], content: str, tokens: int = 0,
+            tools: Optional[List[Dict]] = None) -> None:
+        key = self._put_memory(stage, model, messages, content, tokens, tools)
+        if key is not None and self.disk is not None:
+            self.disk.set(NAMESPACE, key, json.dumps({"content": content, "tokens": tokens}), self.ttl)
+
+    async def aput(self, stage: str, model: str, messages: List[Dict], content: str, tokens: int = 0,
+                   tools: Optional[List[Dict]] = None) -> None:
+        key = self._put_memory(stage, model, messages, content, tokens, tools)
+        if key is not None and self.disk is not None:
+            await self.disk.aset(NAMESPACE, key, json.dumps({"content": content, "tokens": tokens}), self.ttl)
+
+    def _put_memory(self, stage: str, model: str, messages: List[Dict], content: str, tokens: int,
+                    tools: Optional[List[Dict]]) -> Optional[str]:
+        """The entry's key once stored in memory, or None if this call isn't cached."""
+        if not self.caches(stage) or len(content) > self.max_bytes:
+            return None
+        key = make_key(model, messages, tools)
+        self._store(key, content, tokens, self.ttl)
+        return key
+
+    def _store(self, key: str, content: str, tokens: int, ttl: float) -> None:
+        if ttl <= 0 or len(content) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, content, tokens)
+            self._bytes += len(content)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        if self.disk is not None:
+            self.disk.clear(NAMESPACE)
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+            return {
+                "enabled": self.enabled,
+                "stages": sorted(self.stages),
+                "disk": self.disk is not None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": hits,
+                "disk_hits": self.disk_hits,
+                "misses": misses,
+                "evictions": self.evictions,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "tokens_saved": sum(self.tokens_saved.values()),
+                "per_stage": {
+                    stage: {"hits": self.hits.get(stage, 0), "misses": self.misses.get(stage, 0),
+                            "tokens_saved": self.tokens_saved.get(stage, 0)}
+                    for stage in sorted(set(self.hits) | set(self.misses))
+                },
+            }
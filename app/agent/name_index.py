@@ -0,0 +1,50 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+class NameIndex:
+    """
+    Case-insensitive partial-name lookup, e.g. "bob", "jon" or "bob jo" -> "Bob Jones".
+    Every word-start suffix of each name ("bob jones", "jones") is kept in one sorted
+    list, so a lookup is a binary search plus a scan of at most `limit` neighbours.
+    Matches are anchored at word starts; a fragment from the middle of a word ("ones") does not match.
+    """
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = list(names)
+        keys: List[str] = []
+        ids = array("I")
+        for name_id, name in enumerate(self.names):
+            normalized = normalize_name(name)
+            start = 0
+            while True:
+                keys.append(normalized[start:])
+                ids.append(name_id)
+                start = normalized.find(" ", start) + 1
+                if start == 0:
+                    break
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._keys = [keys[i] for i in order]
+        self._ids = array("I", (ids[i] for i in order))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, query: str, limit: int = 10) -> List[str]:
+        """Returns up to `limit` names containing query at a word start, in alphabetical order of the match."""
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+        keys = self._keys
+        matches: List[str] = []
+        seen = set()
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and len(matches) < limit and keys[i].startswith(prefix):
+            name_id = self._ids[i]
+            if name_id not in seen:
+                seen.add(name_id)
+                matches.append(self.names[name_id])
+            i += 1
+        return matches
@@ -0,0 +1,237 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.cache.base import CacheBackend, seconds_left
+from app.models import Plan
+
+ACCOUNT_ID_PATTERN = re.compile(r"\bACC-\d+\b", re.IGNORECASE)
+# Runs of capitalized words, e.g. "Alice" or "Bob Jones"
+NAME_PATTERN = re.compile(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b")
+# Capitalized words that are not client names
+NON_NAME_WORDS = {
+    "What", "Who", "Where", "When", "Why", "How", "Which", "Is", "Are", "Can", "Could", "Do", "Does",
+    "Please", "Find", "Get", "Check", "Show", "Give", "Look", "Lookup", "Search", "Tell", "List",
+    "And", "The", "For", "Of", "About", "Also", "I", "My", "Our",
+}
+
+def _slot_marker(slot: str) -> str:
+    return f"<<{slot}>>"
+
+def extract_slots(query: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Normalizes a query into a template key plus the entity values pulled out of it.
+    "CRM notes for Bob Jones" -> ("crm notes for <<name_0>>", {"name_0": "Bob Jones"})
+    """
+    slots: Dict[str, str] = {}
+
+    def replace_account(match):
+        slot = f"account_{sum(1 for s in slots if s.startswith('account_'))}"
+        slots[slot] = match.group(0).upper()
+        return _slot_marker(slot)
+
+    def replace_name(match):
+        words = match.group(0).split()
+        if match.start() == 0:
+            # The first word of a query is capitalized anyway
+            words = words[1:]
+        words = [w for w in words if w not in NON_NAME_WORDS]
+        if not words:
+            return match.group(0)
+        name = " ".join(words)
+        slot = f"name_{sum(1 for s in slots if s.startswith('name_'))}"
+        slots[slot] = name
+        return match.group(0).replace(name, _slot_marker(slot))
+
+    template = ACCOUNT_ID_PATTERN.sub(replace_account, query)
+    template = NAME_PATTERN.sub(replace_name, template)
+    template = re.sub(r"\s+", " ", template).strip().rstrip("?.!").strip().lower()
+    return template, slots
+
+def _arg_values(value) -> Iterator[str]:
+    """Every string inside a tool arg value, including those nested in lists and dicts."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _arg_values(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _arg_values(v)
+
+def _substitute(plan: Plan, replacements: Dict[str, str]) -> Plan:
+    """
+    Returns a deep copy of plan with each tool arg value that equals a key of
+    replacements swapped, whole, for its value; other args are kept as they are.
+    Descriptions are prose, so the keys are replaced wherever they appear as words.
+    """
+    def sub(value):
+        if isinstance(value, str):
+            return replacements.get(value, value)
+        if isinstance(value, dict):
+            return {k: sub(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [sub(v) for v in value]
+        return value
+
+    # Longest first so "Bob Jones" is replaced before "Bob"
+    words = sorted(replacements, key=len, reverse=True)
+    pattern = re.compile("|".join(rf"(?<!\w){re.escape(w)}(?!\w)" for w in words)) if words else None
+
+    data = plan.model_dump()
+    for step in data["steps"]:
+        if pattern is not None:
+            step["description"] = pattern.sub(lambda m: replacements[m.group(0)], step["description"])
+        step["tool_args"] = sub(step["tool_args"])
+        step["result"] = None
+    return Plan(**data)
+
+class PlanCache:
+    """
+    LRU + TTL cache of plan templates keyed on the normalized query shape.
+    Entity slots (account IDs, client names) are re-filled on a hit, so
+    "balance of ACC-123" and "balance of ACC-456" share one planner call.
+    With a shared backend, templates are written through to it and local misses
+    are looked up there, so one worker's planner call serves every worker; async
+    code uses aget/aput so that I/O stays off the event loop.
+    """
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, enabled: bool = True,
+                 shared: Optional[CacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, Plan]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.shared_hits = 0
+
+    def get(self, query: str) -> Optional[Plan]:
+        if not self.enabled:
+            return None
+        template, slots = extract_slots(query)
+        entry = self._local_get(template)
+        if entry is None:
+            found = self.shared.get_entry("plan", template) if self.shared is not None else None
+            entry = self._from_shared(template, found)
+        return self._fill(entry, slots)
+
+    async def aget(self, query: str) -> Optional[Plan]:
+        if not self.enabled:
+            return None
+        template, slots = extract_slots(query)
+        entry = self._local_get(template)
+        if entry is None:
+            found = await self.shared.aget_entry("plan", template) if self.shared is not None else None
+            entry = self._from_shared(template, found)
+        return self._fill(entry, slots)
+
+    def _local_get(self, template: str) -> Optional[Tuple[float, Plan]]:
+        with self._lock:
+            entry = self._entries.get(template)
+            if entry and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[template]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(template)
+                self.hits += 1
+            return entry
+
+    def _from_shared(self, template: str, found: Optional[Tuple[str, float]]) -> Optional[Tuple[float, Plan]]:
+        """Counts a lookup the local entries missed, keeping what the shared backend found."""
+        entry = None
+        if found is not None:
+            try:
+                plan = Plan.model_validate_json(found[0])
+            except ValueError:
+                plan = None
+            if plan is not None:
+                # Backdated so the local copy expires with the shared one
+                entry = (time.monotonic() - max(0.0, self.ttl_seconds - seconds_left(found[1])), plan)
+                self._store(template, entry)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.shared_hits += 1
+        return entry
+
+    @staticmethod
+    def _fill(entry: Optional[Tuple[float, Plan]], slots: Dict[str, str]) -> Optional[Plan]:
+        if entry is None:
+            return None
+        plan = _substitute(entry[1], {_slot_marker(k): v for k, v in slots.items()})
+        if any("<<" in value for step in plan.steps for value in _arg_values(step.tool_args)):
+            # A marker left inside an arg (e.g. a template written by an older version) would be sent as is
+            return None
+        return plan
+
+    def put(self, query: str, plan: Plan) -> bool:
+        """
+        Stores plan as a template for the query's shape. Plans are only cached when
+        every extracted entity is the whole value of some tool arg and no other arg
+        contains one, so a hit swaps whole arg values. Args that don't mention an
+        entity are reused as planned, so a template can still carry values the
+        planner derived from the original query's wording rather than its entities.
+        """
+        stored = self._put_local(query, plan)
+        if stored is not None and self.shared is not None:
+            self.shared.set("plan", stored[0], stored[1].model_dump_json(), self.ttl_seconds)
+        return stored is not None
+
+    async def aput(self, query: str, plan: Plan) -> bool:
+        stored = self._put_local(query, plan)
+        if stored is not None and self.shared is not None:
+            await self.shared.aset("plan", stored[0], stored[1].model_dump_json(), self.ttl_seconds)
+        return stored is not None
+
+    def _put_local(self, query: str, plan: Plan) -> Optional[Tuple[str, Plan]]:
+        """(template, templated plan) as stored locally, or None if the plan can't be cached."""
+        if not self.enabled or not plan.steps:
+            return None
+        template, slots = extract_slots(query)
+        values = set(slots.values())
+        args = [value for step in plan.steps for value in _arg_values(step.tool_args)]
+        # An arg that only contains an entity (the planner expanded "Bob" to "Bob Jones")
+        # can't be refilled for another query, nor can two slots with the same value
+        if (len(values) < len(slots) or not values <= set(args)
+                or any(arg not in values and entity in arg for arg in args for entity in values)):
+            with self._lock:
+                self.uncacheable += 1
+            return None
+
+        replacements = {v: _slot_marker(k) for k, v in slots.items()}
+        templated = _substitute(plan, replacements)
+        self._store(template, (time.monotonic(), templated))
+        return template, templated
+
+    def _store(self, template: str, entry: Tuple[float, Plan]) -> None:
+        with self._lock:
+            self._entries[template] = entry
+            self._entries.move_to_end(template)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        if self.shared is not None:
+            self.shared.clear("plan")
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "uncacheable": self.uncacheable,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,73 @@
+"""
+Incremental parsing of a streamed planner response, so steps can start before the plan is complete.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+class StepStreamParser:
+    """
+    Scans planner output chunk by chunk and returns each element of the top-level
+    "steps" array as soon as its closing brace arrives. Text around the JSON (such as
+    a markdown fence) is ignored. The scan is a single pass over each new character.
+    """
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._steps_depth: Optional[int] = None  # depth inside the steps array, once found
+        self._step_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Appends chunk and returns the steps completed by it, in order."""
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = text[self._string_start + 1:i]
+                continue
+            if self.done or (self._depth == 0 and char != "{"):
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._last_key == "steps" and self._steps_depth is None:
+                    self._steps_depth = 2
+                elif char == "{" and self._depth == self._steps_depth:
+                    self._step_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._depth == self._steps_depth and self._step_start is not None:
+                    step = self._decode(text[self._step_start:i + 1])
+                    if step is not None:
+                        completed.append(step)
+                    self._step_start = None
+                elif char == "]" and self._steps_depth is not None and self._depth == self._steps_depth - 1:
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                self._last_key = None
+        self._pos = len(text)
+        return completed
+
+    @staticmethod
+    def _decode(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(fragment)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
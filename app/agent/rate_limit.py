@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most capacity.
+    acquire() reserves tokens immediately and returns how long the caller must wait
+    for the reservation to be covered, so concurrent callers queue up fairly.
+    """
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Takes amount tokens (possibly going into debt) and returns the seconds to wait."""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        """Returns (positive) or takes (negative) tokens after the real cost is known."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+    def acquire(self, amount: float = 1.0) -> float:
+        wait = self.reserve(amount)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, amount: float = 1.0) -> float:
+        wait = self.reserve(amount)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits applied together. A limit of 0 disables it."""
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        return wait
+
+    def acquire(self, estimated_tokens: int) -> float:
+        wait = self._reserve(estimated_tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, estimated_tokens: int) -> float:
+        wait = self._reserve(estimated_tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Corrects the token bucket once the response reports real usage."""
+        if self.tokens:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+    def refund(self, estimated_tokens: int) -> None:
+        """Gives back the tokens reserved for a call that failed or was never sent; its request still counts."""
+        self.settle(estimated_tokens, 0)
+
+class ConcurrencyGovernor:
+    """
+    Caps the number of LLM calls in flight. Sync callers share one thread semaphore;
+    async callers share one asyncio semaphore per event loop (one per uvicorn worker).
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._thread_semaphore = threading.BoundedSemaphore(limit)
+        self._loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def _loop_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._loop_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._loop_semaphores[loop] = asyncio.Semaphore(self.limit)
+            return semaphore
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self.in_flight += delta
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._thread_semaphore:
+            self._track(1)
+            try:
+                yield
+            finally:
+                self._track(-1)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        async with self._loop_semaphore():
+            self._track(1)
+            try:
+                yield
+            finally:
+                self._track(-1)
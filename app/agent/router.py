@@ -0,0 +1,100 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+from app.models import Plan, Step
+
+_ACCOUNT = r"(?P<account_id>(?i:ACC)-\d+)"
+# One to three capitalized words, e.g. "Bob" or "Charlie Brown"
+_NAME = r"(?P<client_name>[A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*){0,2})"
+_TOPIC = r"(?P<query>[\w$%' -]+)"
+
+def _account_plan(account_id: str) -> List[Step]:
+    account_id = account_id.upper()
+    return [Step(step_number=1, description=f"Look up account details for {account_id}",
+                 tool_name="account_lookup", tool_args={"account_id": account_id})]
+
+def _crm_plan(client_name: str) -> List[Step]:
+    return [Step(step_number=1, description=f"Retrieve CRM notes for {client_name}",
+                 tool_name="crm_notes", tool_args={"client_name": client_name})]
+
+def _kb_plan(query: str) -> List[Step]:
+    return [Step(step_number=1, description=f"Search KB for {query}",
+                 tool_name="kb_search", tool_args={"query": query})]
+
+# (intent, pattern, plan builder). Patterns must match the whole query.
+RULES: List[Tuple[str, Pattern, Callable[..., List[Step]]]] = [
+    ("account_lookup", re.compile(
+        r"(?i:(?:(?:what(?:'s| is)|show(?: me)?|get|check|look ?up|tell me)\s+)?(?:the\s+)?(?:current\s+)?"
+        r"(?:balance|details|account details|owner|account type|type)\s+(?:of|for|on)\s+(?:account\s+)?)"
+        + _ACCOUNT + r"$"), _account_plan),
+    ("account_lookup", re.compile(
+        r"(?i:(?:look ?up|check|show(?: me)?|get)\s+(?:account\s+)?)" + _ACCOUNT + r"$"), _account_plan),
+    ("crm_notes", re.compile(
+        r"(?i:(?:(?:get|find|show(?: me)?|check|retrieve|pull(?: up)?)\s+)?(?:the\s+)?(?:crm\s+)?notes\s+"
+        r"(?:for|on|about)\s+(?:client\s+)?)" + _NAME + r"$"), _crm_plan),
+    ("kb_search", re.compile(
+        r"(?i:(?:(?:find|search|show(?: me)?|get|look up)\s+)?(?:the\s+)?(?:kb|knowledge base)(?:\s+articles?)?\s+"
+        r"(?:about|on|for|regarding)\s+)" + _TOPIC + r"$"), _kb_plan),
+]
+
+# Connectives that signal a multi-intent query the LLM planner should handle
+COMPOUND = re.compile(r"\b(?:and|also|then|plus|as well as)\b|[,;&]", re.IGNORECASE)
+
+class FastPathRouter:
+    """
+    Rule-based router that builds single-step plans for common intents (balance of
+    ACC-xxx, CRM notes for <name>, KB articles about <topic>) without calling the LLM.
+    Anything that does not match a rule exactly returns None and goes to the planner.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.fast_path: Dict[str, int] = {}
+        self.fallbacks = 0
+        self.route_seconds = 0.0
+        self.planner_calls = 0
+        self.planner_seconds = 0.0
+
+    def route(self, query: str) -> Optional[Plan]:
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        text = " ".join(query.split()).rstrip("?.!").strip()
+        match = None
+        if not COMPOUND.search(text):
+            for intent, pattern, build in RULES:
+                match = pattern.match(text)
+                if match:
+                    break
+        with self._lock:
+            self.route_seconds += time.perf_counter() - start
+            if not match:
+                self.fallbacks += 1
+                return None
+            self.fast_path[intent] = self.fast_path.get(intent, 0) + 1
+        return Plan(steps=build(**match.groupdict()))
+
+    def record_planner_latency(self, seconds: float) -> None:
+        """Called after each LLM planner call, so stats can estimate what the fast path saves."""
+        with self._lock:
+            self.planner_calls += 1
+            self.planner_seconds += seconds
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            fast = sum(self.fast_path.values())
+            routed = fast + self.fallbacks
+            avg_planner = self.planner_seconds / self.planner_calls if self.planner_calls else 0.0
+            avg_route = self.route_seconds / routed if routed else 0.0
+            return {
+                "enabled": self.enabled,
+                "fast_path": fast,
+                "fast_path_by_intent": dict(self.fast_path),
+                "fallbacks": self.fallbacks,
+                "fast_path_rate": fast / routed if routed else 0.0,
+                "avg_route_ms": avg_route * 1000,
+                "avg_planner_ms": avg_planner * 1000,
+                "estimated_saved_ms": fast * max(avg_planner - avg_route, 0.0) * 1000,
+            }
@@ -0,0 +1,150 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.agent.tool_cache import make_key
+from app.models import Plan
+
+# (query, final answer, tool calls made) for one finished turn
+Turn = Tuple[str, str, List[str]]
+
+class Session:
+    """Prior turns of one conversation and the tool results they fetched."""
+    def __init__(self, session_id: str, max_turns: int):
+        self.session_id = session_id
+        self.turns: Deque[Turn] = deque(maxlen=max_turns)
+        # make_key(tool, args) -> (expires_at, result), oldest first
+        self.tool_results: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.last_used = time.monotonic()
+        self.bytes = 0
+
+    def lookup(self, tool_name: str, tool_args: Optional[Dict[str, Any]]) -> Optional[str]:
+        """The result fetched earlier in the session, unless it is older than its tool's TTL."""
+        entry = self.tool_results.get(make_key(tool_name, tool_args))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def _measure(self) -> int:
+        turns = sum(len(q) + len(a) + sum(len(c) for c in calls) for q, a, calls in self.turns)
+        return turns + sum(len(k) + len(v) for k, (_, v) in self.tool_results.items())
+
+class SessionStore:
+    """
+    In-memory multi-turn sessions for this worker. Each session keeps its last
+    max_turns turns and at most max_session_bytes of turns plus tool results
+    (oldest tool results, then oldest turns, are dropped first). A tool result is
+    reused for the tool's TTL in result_ttls, like the tool result cache; results of
+    tools without one are never reused. Sessions idle for
+    idle_ttl seconds expire, and the least recently used ones are evicted once there
+    are more than max_sessions or they hold more than max_bytes in total.
+    """
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 1800.0,
+                 max_bytes: int = 64 * 1024 * 1024, max_session_bytes: int = 1024 * 1024,
+                 max_turns: int = 10, result_ttls: Optional[Dict[str, float]] = None):
+        self.result_ttls = result_ttls or {}
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.max_session_bytes = max_session_bytes
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.tool_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def create(self) -> str:
+        session_id = uuid.uuid4().hex
+        self.get(session_id)
+        return session_id
+
+    def get(self, session_id: str) -> Session:
+        """Returns the session, creating it if it is new or was evicted."""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id, self.max_turns)
+                self._evict()
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._bytes -= session.bytes
+            return True
+
+    def lookup(self, session: Session, tool_name: str, tool_args: Optional[Dict[str, Any]]) -> Optional[str]:
+        with self._lock:
+            result = session.lookup(tool_name, tool_args)
+            if result is not None:
+                self.tool_hits += 1
+            return result
+
+    def has_result(self, session: Session, tool_name: str, tool_args: Optional[Dict[str, Any]]) -> bool:
+        """Like lookup(), without counting a hit; for deciding whether to start the call at all."""
+        with self._lock:
+            return session.lookup(tool_name, tool_args) is not None
+
+    def record_turn(self, session: Session, query: str, plan: Plan, final_answer: str) -> None:
+        """Stores a finished turn and its successful tool results, then re-applies the memory caps."""
+        calls = []
+        with self._lock:
+            for step in plan.steps:
+                if not step.tool_name:
+                    continue
+                key = make_key(step.tool_name, step.tool_args)
+                calls.append(key)
+                ttl = self.result_ttls.get(step.tool_name)
+                if ttl and step.result is not None and not step.result.startswith("Error executing tool"):
+                    session.tool_results.pop(key, None)
+                    session.tool_results[key] = (time.monotonic() + ttl, step.result)
+            session.turns.append((query, final_answer, calls))
+
+            size = session._measure()
+            while size > self.max_session_bytes and (session.tool_results or len(session.turns) > 1):
+                if session.tool_results:
+                    session.tool_results.popitem(last=False)
+                else:
+                    session.turns.popleft()
+                size = session._measure()
+            if session.session_id in self._sessions:
+                self._bytes += size - session.bytes
+            session.bytes = size
+            self._evict()
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_used >= cutoff:
+                break
+            self._remove(oldest.session_id)
+            self.expirations += 1
+
+    def _evict(self) -> None:
+        # Never evict the session just used (the most recent one)
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._sessions)))
+            self.evictions += 1
+
+    def _remove(self, session_id: str) -> None:
+        self._bytes -= self._sessions.pop(session_id).bytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "tool_hits": self.tool_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
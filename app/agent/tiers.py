@@ -0,0 +1,68 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from app import metrics
+
+# USD per 1M tokens (prompt, completion); models not listed are reported without a cost
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+# Reasons the planner escalates from its first model to the escalation model
+ESCALATION_REASONS = ("unparseable", "invalid_step", "unknown_tool", "verification_failed")
+
+def estimate_cost(model: str, prompt_tokens: float, completion_tokens: float,
+                  prices: Optional[Dict[str, Tuple[float, float]]] = None) -> Optional[float]:
+    price = (prices or MODEL_PRICES).get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+class TierStats:
+    """Planner escalation counts, plus a cost/latency report per stage and model built from the LLM metrics."""
+    def __init__(self):
+        self.escalations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record_escalation(self, reason: str) -> None:
+        with self._lock:
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+
+    def report(self) -> Dict[str, Any]:
+        durations = metrics.LLM_DURATION.totals()
+        prompt = metrics.LLM_PROMPT_TOKENS.values()
+        completion = metrics.LLM_COMPLETION_TOKENS.values()
+        by_stage: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        by_model: Dict[str, Dict[str, Any]] = {}
+        for (stage, model), (calls, seconds) in sorted(durations.items()):
+            prompt_tokens = int(prompt.get((stage, model), 0))
+            completion_tokens = int(completion.get((stage, model), 0))
+            by_stage.setdefault(stage, {})[model] = self._entry(model, calls, seconds, prompt_tokens, completion_tokens)
+            total = by_model.setdefault(model, {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+            total["calls"] += calls
+            total["seconds"] += seconds
+            total["prompt_tokens"] += prompt_tokens
+            total["completion_tokens"] += completion_tokens
+        with self._lock:
+            escalations = dict(self.escalations)
+        return {
+            "escalations": escalations,
+            "by_model": {model: self._entry(model, t["calls"], t["seconds"], t["prompt_tokens"], t["completion_tokens"])
+                         for model, t in by_model.items()},
+            "by_stage": by_stage,
+        }
+
+    @staticmethod
+    def _entry(model: str, calls: int, seconds: float, prompt_tokens: int, completion_tokens: int) -> Dict[str, Any]:
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        return {
+            "calls": calls,
+            "avg_latency_ms": round(seconds / calls * 1000, 1) if calls else 0.0,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": round(cost, 6) if cost is not None else None,
+        }
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.cache.base import CacheBackend, seconds_left
+
+def make_key(tool_name: str, tool_args: Optional[Dict[str, Any]]) -> str:
+    """Canonical cache key for a tool call, independent of argument order."""
+    return f"{tool_name}:{json.dumps(tool_args or {}, sort_keys=True, default=str)}"
+
+class ToolResultCache:
+    """
+    LRU cache of tool results with a TTL per tool.
+    Memory is bounded both by entry count and by the total size of cached results.
+    Tools without a TTL are never cached. With a shared backend, results are written
+    through to it and local misses are looked up there, so workers share results; put()
+    runs on the tool threads and async code looks results up with aget().
+    """
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 10000,
+                 max_bytes: int = 50 * 1024 * 1024, enabled: bool = True,
+                 shared: Optional[CacheBackend] = None):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.shared = shared
+        # key -> (expires_at, tool_name, result)
+        self._entries: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+        self.shared_hits = 0
+
+    def _remove(self, key: str) -> None:
+        _, _, result = self._entries.pop(key)
+        self._bytes -= len(result)
+
+    def get(self, tool_name: str, tool_args: Optional[Dict[str, Any]]) -> Optional[str]:
+        if not self.enabled or tool_name not in self.ttls:
+            return None
+        key = make_key(tool_name, tool_args)
+        result = self._local_get(tool_name, key)
+        if result is None:
+            found = self.shared.get_entry(f"tool:{tool_name}", key) if self.shared is not None else None
+            result = self._from_shared(tool_name, key, found)
+        return result
+
+    async def aget(self, tool_name: str, tool_args: Optional[Dict[str, Any]]) -> Optional[str]:
+        if not self.enabled or tool_name not in self.ttls:
+            return None
+        key = make_key(tool_name, tool_args)
+        result = self._local_get(tool_name, key)
+        if result is None:
+            found = await self.shared.aget_entry(f"tool:{tool_name}", key) if self.shared is not None else None
+            result = self._from_shared(tool_name, key, found)
+        return result
+
+    def _local_get(self, tool_name: str, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits[tool_name] = self.hits.get(tool_name, 0) + 1
+            return entry[2]
+
+    def _from_shared(self, tool_name: str, key: str, found: Optional[Tuple[str, float]]) -> Optional[str]:
+        """Counts a lookup the local entries missed, keeping what the shared backend found."""
+        if found is not None:
+            # Kept locally only for what is left of the shared entry's TTL
+            self._store(tool_name, key, found[0], min(self.ttls[tool_name], seconds_left(found[1])))
+        with self._lock:
+            if found is None:
+                self.misses[tool_name] = self.misses.get(tool_name, 0) + 1
+                return None
+            self.hits[tool_name] = self.hits.get(tool_name, 0) + 1
+            self.shared_hits += 1
+        return found[0]
+
+    def put(self, tool_name: str, tool_args: Optional[Dict[str, Any]], result: str) -> None:
+        ttl = self.ttls.get(tool_name)
+        if not self.enabled or not ttl or len(result) > self.max_bytes:
+            return
+        key = make_key(tool_name, tool_args)
+        self._store(tool_name, key, result, ttl)
+        if self.shared is not None:
+            self.shared.set(f"tool:{tool_name}", key, result, ttl)
+
+    def _store(self, tool_name: str, key: str, result: str, ttl: float) -> None:
+        if ttl <= 0 or len(result) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, tool_name, result)
+            self._bytes += len(result)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tool_name: str, tool_args: Optional[Dict[str, Any]]) -> bool:
+        """Drops a single cached result, e.g. after a balance changes. Returns True if it was cached."""
+        key = make_key(tool_name, tool_args)
+        removed = self.shared is not None and self.shared.delete(f"tool:{tool_name}", key)
+        with self._lock:
+            if key not in self._entries:
+                return removed
+            self._remove(key)
+            return True
+
+    def invalidate_tool(self, tool_name: str) -> int:
+        """Drops every cached result for a tool, e.g. after a KB reload. Returns the number removed locally."""
+        if self.shared is not None:
+            self.shared.clear(f"tool:{tool_name}")
+        with self._lock:
+            keys = [k for k, entry in self._entries.items() if entry[1] == tool_name]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        if self.shared is not None:
+            for tool_name in self.ttls:
+                self.shared.clear(f"tool:{tool_name}")
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": hits,
+                "shared_hits": self.shared_hits,
+                "misses": misses,
+                "evictions": self.evictions,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "per_tool": {
+                    name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                    for name in sorted(set(self.hits) | set(self.misses))
+                },
+            }
@@ -0,0 +1,46 @@
+"""
+OpenAI tool (function-calling) schemas generated from the tool functions' signatures,
+type hints and docstrings, so what the model is told can't drift from what runs.
+"""
+import inspect
+from typing import Any, Callable, Dict, List, Union, get_args, get_origin, get_type_hints
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+def json_schema(annotation: Any) -> Dict[str, Any]:
+    """JSON schema for a parameter annotation; unknown or missing annotations accept anything."""
+    if annotation in _JSON_TYPES:
+        return {"type": _JSON_TYPES[annotation]}
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Union:
+        # Optional[X] is X as far as the model is concerned; the default makes it optional
+        members = [a for a in args if a is not type(None)]
+        return json_schema(members[0]) if len(members) == 1 else {}
+    if annotation is list or origin is list:
+        return {"type": "array", "items": json_schema(args[0])} if args else {"type": "array"}
+    if annotation is dict or origin is dict:
+        return {"type": "object"}
+    return {}
+
+def function_schema(name: str, func: Callable) -> Dict[str, Any]:
+    hints = get_type_hints(func)
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    for param in inspect.signature(func).parameters.values():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        properties[param.name] = json_schema(hints.get(param.name, inspect.Parameter.empty))
+        if param.default is param.empty:
+            required.append(param.name)
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": " ".join((inspect.getdoc(func) or "").split("\n\n")[0].split()),
+            "parameters": {"type": "object", "properties": properties, "required": required},
+        },
+    }
+
+def tool_schemas(tools: Dict[str, Callable]) -> List[Dict[str, Any]]:
+    return [function_schema(name, func) for name, func in tools.items()]
@@ -1,75 +1,62 @@
 import json
 from typing import Dict, List, Optional
+from app import config
+from app.agent.kb_index import build_index
+from app.agent.name_index import NameIndex
+from app.data.base import get_store
+
+def _format_account(account_id: str, account: Optional[Dict]) -> str:
+    if account:
+        return json.dumps(account, indent=2)
+    return f"Account {account_id} not found."
 
 def account_lookup(account_id: str) -> str:
     """
-    Simulates looking up account details by ID.
+    Looks up account details by ID.
     """
-    # Mock data
-    accounts = {
-        "ACC-123": {"id": "ACC-123", "owner": "Alice Smith", "balance": 15000.00, "type": "Checking"},
-        "ACC-456": {"id": "ACC-456", "owner": "Bob Jones", "balance": 2500.50, "type": "Savings"},
-        "ACC-789": {"id": "ACC-789", "owner": "Charlie Brown", "balance": 1000000.00, "type": "Investment"},
-    }
-    
-    result = accounts.get(account_id)
-    if result:
-        return json.dumps(result, indent=2)
-    return f"Account {account_id} not found."
+    return _format_account(account_id, get_store().get_account(account_id))
 
-def kb_search(query: str) -> str:
+def account_lookup_many(account_ids: List[str]) -> str:
     """
-    Simulates searching a knowledge base.
+    Looks up several accounts in one round-trip.
     """
-    # Mock KB articles
-    kb_articles = [
-        {"id": "KB-001", "title": "Wire Transfer Limits", "content": "Standard wire transfer limit is $50,000 per day. High-value clients can request up to $250,000."},
-        {"id": "KB-002", "title": "Account Opening Requirements", "content": "Valid ID, proof of address, and initial deposit of $100 required."},
-        {"id": "KB-003", "title": "Investment Products", "content": "We offer ETFs, Mutual Funds, and High-Yield Savings accounts."},
-    ]
-    
-    # Simple keyword match
-    results = []
-    query_terms = query.lower().split()
-    for article in kb_articles:
-        # Check if the full query is in the text OR if significant words match
-        text = (article["title"] + " " + article["content"]).lower()
-        
-        # Match if the exact query is found
-        if query.lower() in text:
-            results.append(article)
-            continue
-            
-        # Fallback: Match if all query terms (longer than 3 chars) are present
-        # This handles "wire transfers" matching "wire transfer" if we strip 's' or just match "wire" and "transfer"
-        # For simplicity in this mock, let's just check if *any* significant term matches if the full phrase fails
-        # But to be safer, let's check if the query *stem* is roughly there. 
-        # Actually, let's just check if "wire" AND "transfer" are in the text.
-        
-        if all(term.rstrip('s') in text for term in query_terms if len(term) > 3):
-             results.append(article)
+    accounts = get_store().get_accounts(account_ids)
+    return json.dumps({aid: accounts.get(aid, f"Account {aid} not found.") for aid in account_ids}, indent=2)
 
-            
+def account_lookup_batch(calls: List[Dict]) -> List[str]:
+    """
+    Batch variant of account_lookup used by the executor: one store round-trip for
+    several account_lookup steps, returning each step's result in the same format.
+    """
+    account_ids = [call["account_id"] for call in calls]
+    accounts = get_store().get_accounts(account_ids)
+    return [_format_account(aid, accounts.get(aid)) for aid in account_ids]
+
+# Built once at startup, or loaded from a prebuilt index when KB_INDEX_PATH is set
+if config.KB_INDEX_PATH:
+    KB_INDEX = build_index([], path=config.KB_INDEX_PATH)
+else:
+    KB_INDEX = build_index(get_store().kb_articles())
+
+def kb_search(query: str) -> str:
+    """
+    Searches the knowledge base, returning the top-ranked articles with snippets.
+    """
+    results = KB_INDEX.search(query, top_k=config.KB_TOP_K)
     if results:
         return json.dumps(results, indent=2)
     return "No relevant articles found."
 
+# Partial-name index over client names, built once at startup
+CRM_NAME_INDEX = NameIndex(get_store().client_names())
+
 def crm_notes(client_name: str) -> str:
     """
-    Simulates retrieving CRM notes for a client.
+    Retrieves CRM notes for a client.
     """
-    # Mock CRM data
-    notes = {
-        "Alice Smith": ["Interested in home loans.", "Called about wire transfer fees on 10/20."],
-        "Bob Jones": ["Saving for a new car.", "Prefer email communication."],
-        "Charlie Brown": ["High net worth individual.", "Looking for tax-efficient investment strategies."],
-    }
-    
-    # Partial match for name
-    found_notes = {}
-    for name, note_list in notes.items():
-        if client_name.lower() in name.lower():
-            found_notes[name] = note_list
+    # Partial match for name, capped so a short fragment can't return every client
+    matches = CRM_NAME_INDEX.lookup(client_name, limit=config.CRM_MAX_MATCHES)
+    found_notes = get_store().get_notes(matches) if matches else {}
             
     if found_notes:
         return json.dumps(found_notes, indent=2)
@@ -77,6 +64,28 @@ def crm_notes(client_name: str) -> str:
 
 AVAILABLE_TOOLS = {
     "account_lookup": account_lookup,
+    "account_lookup_many": account_lookup_many,
     "kb_search": kb_search,
     "crm_notes": crm_notes,
 }
+
+# Batch implementations the executor uses when several independent steps call the same tool
+BATCH_TOOLS = {
+    "account_lookup": account_lookup_batch,
+}
+
+# Per-tool execution timeouts in seconds
+TOOL_TIMEOUTS = {
+    "account_lookup": 5.0,
+    "account_lookup_many": 10.0,
+    "kb_search": 10.0,
+    "crm_notes": 5.0,
+}
+
+# Per-tool result cache TTLs in seconds: balances change quickly, KB articles rarely do
+TOOL_CACHE_TTLS = {
+    "account_lookup": 30.0,
+    "account_lookup_many": 30.0,
+    "kb_search": 3600.0,
+    "crm_notes": 300.0,
+}
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app import config
+
+class CacheBackend:
+    """
+    Key-value store the in-process caches can share across workers. Values are strings
+    (callers serialize), grouped by namespace, and expire after a per-entry TTL.
+    Backends are best effort: a failing lookup is a miss and a failing write is dropped,
+    so a cache problem never fails a request. Calls block on I/O, so async code uses the
+    a-prefixed variants, which run them on the loop's default executor.
+    """
+    def get_entry(self, namespace: str, key: str) -> Optional[Tuple[str, float]]:
+        """(value, expires_at as a time.time() timestamp), or None if missing or expired."""
+        raise NotImplementedError
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        entry = self.get_entry(namespace, key)
+        return entry[0] if entry else None
+
+    def set(self, namespace: str, key: str, value: str, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def aget_entry(self, namespace: str, key: str) -> Optional[Tuple[str, float]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_entry, namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: str, ttl: float) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.set, namespace, key, value, ttl)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """Drops every entry in namespace (all entries if None). Returns the number removed."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+def seconds_left(expires_at: float) -> float:
+    """Remaining TTL of a shared entry, for callers that keep their own monotonic-clock expiry."""
+    return expires_at - time.time()
+
+_backend: Optional[CacheBackend] = None
+
+def create_cache_backend(backend: str, path: Optional[str] = None) -> Optional[CacheBackend]:
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        from app.cache.sqlite import SQLiteCacheBackend
+        return SQLiteCacheBackend(
+            path or config.SHARED_CACHE_PATH,
+            max_entries=config.SHARED_CACHE_MAX_ENTRIES,
+            max_bytes=config.SHARED_CACHE_MAX_BYTES,
+            pool_size=config.SHARED_CACHE_POOL_SIZE,
+        )
+    raise ValueError(f"Unknown shared cache backend '{backend}', expected 'none' or 'sqlite'")
+
+def get_shared_cache() -> Optional[CacheBackend]:
+    """Returns the process-wide backend selected by AGENT_SHARED_CACHE (None when off), creating it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_cache_backend(config.SHARED_CACHE)
+    return _backend
+
+def set_shared_cache(backend: Optional[CacheBackend]) -> None:
+    global _backend
+    _backend = backend
@@ -0,0 +1,214 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.cache.base import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at);
+CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+"""
+
+# A hit refreshes the entry's LRU position at most this often, so hot keys don't turn every read into a write
+TOUCH_INTERVAL = 5.0
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache shared by every process that opens the same file. WAL mode lets readers in all
+    workers proceed while one writes, and synchronous=NORMAL skips the fsync per write
+    (a crash can lose the last writes, which for a cache is a few misses).
+
+    Expired entries and, past max_entries or max_bytes, the least recently used ones are
+    swept on a background thread every sweep_every writes from this process, so the limits
+    are soft by at most that many entries per worker and no write waits for a sweep.
+    """
+    def __init__(self, path: str, max_entries: int = 100000, max_bytes: int = 256 * 1024 * 1024,
+                 pool_size: int = 4, sweep_every: int = 100, busy_timeout: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_every = max(1, sweep_every)
+        self.busy_timeout = busy_timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self._sweeper: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit: each statement is its own short transaction unless one is opened explicitly
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64,
+                               timeout=self.busy_timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _failed(self, action: str, error: sqlite3.Error) -> None:
+        self._count("errors")
+        logger.warning(f"Shared cache {action} failed: {error}")
+
+    def get_entry(self, namespace: str, key: str) -> Optional[Tuple[str, float]]:
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at, accessed_at FROM cache WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                ).fetchone()
+                if row is None or row[1] <= now:
+                    self._count("misses")
+                    return None
+                if now - row[2] > TOUCH_INTERVAL:
+                    conn.execute("UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                                 (now, namespace, key))
+        except sqlite3.Error as e:
+            self._failed("read", e)
+            return None
+        self._count("hits")
+        return row[0], row[1]
+
+    def set(self, namespace: str, key: str, value: str, ttl: float) -> None:
+        if ttl <= 0 or len(value) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (namespace, key, value, len(value), now + ttl, now),
+                )
+        except sqlite3.Error as e:
+            self._failed("write", e)
+            return
+        with self._lock:
+            self.writes += 1
+            self._writes_since_sweep += 1
+            if self._writes_since_sweep >= self.sweep_every and not self.sweeping:
+                self._writes_since_sweep = 0
+                self._sweeper = threading.Thread(target=self.sweep, name="cache-sweep", daemon=True)
+                self._sweeper.start()
+
+    @property
+    def sweeping(self) -> bool:
+        return self._sweeper is not None and self._sweeper.is_alive()
+
+    def wait_for_sweep(self) -> None:
+        sweeper = self._sweeper
+        if sweeper is not None:
+            sweeper.join()
+
+    def sweep(self) -> int:
+        """Drops expired entries, then least recently used ones until within limits. Returns the number removed."""
+        try:
+            with self._connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    removed = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+                    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+                    if entries > self.max_entries or size > self.max_bytes:
+                        cursor = conn.execute("SELECT namespace, key, size FROM cache ORDER BY accessed_at")
+                        victims = []
+                        for namespace, key, entry_size in cursor:
+                            if entries <= self.max_entries and size <= self.max_bytes:
+                                break
+                            victims.append((namespace, key))
+                            entries -= 1
+                            size -= entry_size
+                        cursor.close()
+                        conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", victims)
+                        removed += len(victims)
+                        self._count("evictions", len(victims))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            self._failed("sweep", e)
+            return 0
+        return removed
+
+    def delete(self, namespace: str, key: str) -> bool:
+        try:
+            with self._connection() as conn:
+                return conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?",
+                                    (namespace, key)).rowcount > 0
+        except sqlite3.Error as e:
+            self._failed("delete", e)
+            return False
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        try:
+            with self._connection() as conn:
+                if namespace is None:
+                    return conn.execute("DELETE FROM cache").rowcount
+                return conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,)).rowcount
+        except sqlite3.Error as e:
+            self._failed("clear", e)
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self._connection() as conn:
+                entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        except sqlite3.Error as e:
+            self._failed("stats", e)
+            entries = size = None
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "entries": entries,
+                "bytes": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        self.wait_for_sweep()
+        while not self._pool.empty():
+            self._pool.get().close()
@@ -0,0 +1,109 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# LLM client
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # e.g. a local fake server for offline tests
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))  # 0 disables the limit
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))  # 0 disables the limit
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "32"))
+
+# LLM record/replay: "off", "record", "replay" (no network) or "auto" (replay, record misses)
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "eval/cassettes/llm.jsonl.gz")
+
+# Model per pipeline stage. With a planner escalation model set, the planner model is tried
+# first and the escalation model re-plans when its plan is unusable or fails verification.
+PLANNER_MODEL = os.getenv("AGENT_PLANNER_MODEL", "gpt-4o")
+PLANNER_ESCALATION_MODEL = os.getenv("AGENT_PLANNER_ESCALATION_MODEL") or None
+VERIFIER_MODEL = os.getenv("AGENT_VERIFIER_MODEL", "gpt-4o")
+ANSWER_MODEL = os.getenv("AGENT_ANSWER_MODEL", "gpt-4o")  # also used for the fused verify+answer call
+
+# Executor settings
+MAX_PARALLEL_TOOLS = int(os.getenv("AGENT_MAX_PARALLEL_TOOLS", "4"))
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("AGENT_TOOL_TIMEOUT", "10.0"))
+
+# How the agent picks tool calls: "planner" (JSON plan, then verify/answer) or "tools"
+# (native parallel tool calling, the model answers once it stops calling tools)
+ENGINE = os.getenv("AGENT_ENGINE", "planner")
+TOOL_ROUNDS = int(os.getenv("AGENT_TOOL_ROUNDS", "3"))  # max tool-calling turns per query
+
+# Verify/final-answer stages: "sequential", "concurrent" or "fused" (single LLM call)
+ANSWER_MODE = os.getenv("AGENT_ANSWER_MODE", "concurrent")
+
+# Plan template cache
+PLAN_CACHE_ENABLED = os.getenv("AGENT_PLAN_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PLAN_CACHE_SIZE = int(os.getenv("AGENT_PLAN_CACHE_SIZE", "1024"))
+PLAN_CACHE_TTL = float(os.getenv("AGENT_PLAN_CACHE_TTL", "3600"))
+
+# Tool result cache
+TOOL_CACHE_ENABLED = os.getenv("AGENT_TOOL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("AGENT_TOOL_CACHE_MAX_ENTRIES", "10000"))
+TOOL_CACHE_MAX_BYTES = int(os.getenv("AGENT_TOOL_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Cache shared by all workers behind the in-process plan and tool caches: "none" or "sqlite"
+SHARED_CACHE = os.getenv("AGENT_SHARED_CACHE", "none")
+SHARED_CACHE_PATH = os.getenv("AGENT_SHARED_CACHE_PATH", "data/cache.db")
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("AGENT_SHARED_CACHE_MAX_ENTRIES", "100000"))
+SHARED_CACHE_MAX_BYTES = int(os.getenv("AGENT_SHARED_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+SHARED_CACHE_POOL_SIZE = int(os.getenv("AGENT_SHARED_CACHE_POOL_SIZE", "4"))
+
+# Exact-match LLM response cache, for calls made in the listed pipeline stages. The disk tier is
+# a SQLite file at LLM_CACHE_PATH or, if that is unset, the shared cache when one is configured.
+LLM_CACHE_ENABLED = os.getenv("AGENT_LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_STAGES = [s.strip() for s in os.getenv("AGENT_LLM_CACHE_STAGES", "plan,verify,answer,fused,tools").split(",")
+                    if s.strip()]
+LLM_CACHE_TTL = float(os.getenv("AGENT_LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("AGENT_LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("AGENT_LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+LLM_CACHE_PATH = os.getenv("AGENT_LLM_CACHE_PATH") or None
+
+# Knowledge base search
+KB_INDEX_PATH = os.getenv("KB_INDEX_PATH")  # prebuilt index written by KBIndex.save()
+KB_TOP_K = int(os.getenv("KB_TOP_K", "5"))
+
+# CRM notes: maximum number of clients a partial name may match
+CRM_MAX_MATCHES = int(os.getenv("CRM_MAX_MATCHES", "10"))
+
+# Data layer backing the tools: "memory" (mock data) or "sqlite"
+DATA_BACKEND = os.getenv("DATA_BACKEND", "memory")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/copilot.db")
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+
+# Batch endpoint: maximum number of agent runs in flight per batch
+BATCH_MAX_CONCURRENCY = int(os.getenv("AGENT_BATCH_MAX_CONCURRENCY", "8"))
+
+# Rule-based fast path that skips the LLM planner for simple single-intent queries
+FAST_PATH_ENABLED = os.getenv("AGENT_FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Token budgets for the executed plan included in the verifier and final-answer prompts
+VERIFIER_CONTEXT_TOKENS = int(os.getenv("AGENT_VERIFIER_CONTEXT_TOKENS", "2000"))
+ANSWER_CONTEXT_TOKENS = int(os.getenv("AGENT_ANSWER_CONTEXT_TOKENS", "6000"))
+
+# Multi-turn sessions (per worker, in memory)
+SESSION_MAX_SESSIONS = int(os.getenv("AGENT_SESSION_MAX_SESSIONS", "1000"))
+SESSION_IDLE_TTL = float(os.getenv("AGENT_SESSION_IDLE_TTL", "1800"))
+SESSION_MAX_BYTES = int(os.getenv("AGENT_SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_MAX_SESSION_BYTES = int(os.getenv("AGENT_SESSION_MAX_SESSION_BYTES", str(1024 * 1024)))
+SESSION_MAX_TURNS = int(os.getenv("AGENT_SESSION_MAX_TURNS", "10"))
+SESSION_CONTEXT_TOKENS = int(os.getenv("AGENT_SESSION_CONTEXT_TOKENS", "800"))  # prior turns shown to the planner
+
+# Per-request deadline in seconds (0: none); an X-Request-Timeout header can shorten it per request.
+# With less than DEADLINE_SKIP_VERIFY_BELOW seconds left after execution, verification is skipped.
+REQUEST_TIMEOUT = float(os.getenv("AGENT_REQUEST_TIMEOUT", "0"))
+DEADLINE_SKIP_VERIFY_BELOW = float(os.getenv("AGENT_DEADLINE_SKIP_VERIFY_BELOW", "5"))
+
+# Concurrent identical queries (ignoring case and whitespace) share one agent run
+COALESCE_ENABLED = os.getenv("AGENT_COALESCE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Stream the planner response and start independent steps as soon as they are complete
+SPECULATIVE_EXECUTION = os.getenv("AGENT_SPECULATIVE_EXECUTION", "false").lower() in ("1", "true", "yes")
@@ -0,0 +1,51 @@
+from typing import Dict, Iterable, List, Optional
+
+from app import config
+
+class DataStore:
+    """
+    Data access interface the tools sit on. Backends return plain dicts so tool
+    output stays the same whichever store is configured.
+    """
+    def get_account(self, account_id: str) -> Optional[Dict]:
+        return self.get_accounts([account_id]).get(account_id)
+
+    def get_accounts(self, account_ids: List[str]) -> Dict[str, Dict]:
+        """Fetches several accounts in one round-trip. Unknown IDs are left out of the result."""
+        raise NotImplementedError
+
+    def kb_articles(self) -> Iterable[Dict[str, str]]:
+        raise NotImplementedError
+
+    def client_names(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def get_notes(self, client_names: List[str]) -> Dict[str, List[str]]:
+        """Fetches CRM notes for several clients (exact names) in one round-trip."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+_store: Optional[DataStore] = None
+
+def create_store(backend: str, sqlite_path: Optional[str] = None) -> DataStore:
+    if backend == "memory":
+        from app.data.memory import InMemoryStore
+        return InMemoryStore()
+    if backend == "sqlite":
+        from app.data.sqlite import SQLiteStore
+        return SQLiteStore(sqlite_path or config.SQLITE_PATH, pool_size=config.SQLITE_POOL_SIZE)
+    raise ValueError(f"Unknown data backend '{backend}', expected 'memory' or 'sqlite'")
+
+def get_store() -> DataStore:
+    """Returns the process-wide store selected by DATA_BACKEND, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = create_store(config.DATA_BACKEND)
+    return _store
+
+def set_store(store: Optional[DataStore]) -> None:
+    """Swaps the process-wide store, e.g. to point tools at a test database."""
+    global _store
+    _store = store
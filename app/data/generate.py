@@ -0,0 +1,115 @@
+"""
+Generates a synthetic SQLite dataset for offline performance testing.
+
+    python -m app.data.generate data/copilot.db --accounts 1000000 --clients 200000 --articles 10000
+
+The mock records (ACC-123, Alice Smith, KB-001, ...) are always included so the
+usual example queries keep working against the generated database.
+"""
+import argparse
+import os
+import random
+import time
+from typing import Dict, Iterator, List
+
+from app.data import memory
+from app.data.sqlite import SQLiteStore
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Edward", "Fatima", "George", "Hannah", "Ivan", "Julia",
+    "Kenji", "Laura", "Mohammed", "Nina", "Oscar", "Priya", "Quentin", "Rosa", "Samuel", "Tara",
+]
+SYLLABLES = ["ab", "ber", "can", "dor", "el", "fin", "gar", "hol", "ing", "jo", "kel", "lam",
+             "mor", "nes", "ol", "per", "quin", "ros", "son", "tan", "ul", "vin", "wes", "yor"]
+ACCOUNT_TYPES = ["Checking", "Savings", "Investment", "Credit"]
+NOTE_TEMPLATES = [
+    "Interested in {product}.", "Called about {product} fees.", "Prefers {channel} communication.",
+    "Review {product} options next quarter.", "Asked about {product} rates.",
+]
+PRODUCTS = ["home loans", "wire transfers", "ETFs", "mutual funds", "credit cards", "retirement accounts"]
+CHANNELS = ["email", "phone", "in-branch"]
+TOPICS = ["Wire Transfer", "Mortgage", "Savings", "Overdraft", "Fraud", "Card", "Investment", "Tax"]
+ASPECTS = ["Limits", "Fees", "Requirements", "Policy", "Eligibility", "Disputes"]
+
+CHUNK = 50000
+
+def client_names(count: int, rng: random.Random) -> List[str]:
+    names = set(memory.CRM_NOTES)
+    while len(names) < count:
+        last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+        names.add(f"{rng.choice(FIRST_NAMES)} {last}")
+    return sorted(names)
+
+def accounts(count: int, owners: List[str], rng: random.Random) -> Iterator[Dict]:
+    yield from memory.ACCOUNTS.values()
+    for i in range(1000, 1000 + count):
+        yield {
+            "id": f"ACC-{i}",
+            "owner": rng.choice(owners),
+            "balance": round(rng.lognormvariate(9, 1.5), 2),
+            "type": rng.choice(ACCOUNT_TYPES),
+        }
+
+def articles(count: int, rng: random.Random) -> Iterator[Dict[str, str]]:
+    yield from memory.KB_ARTICLES
+    for i in range(100, 100 + count):
+        topic, aspect = rng.choice(TOPICS), rng.choice(ASPECTS)
+        limit = rng.choice([1000, 5000, 10000, 50000, 250000])
+        yield {
+            "id": f"KB-{i}",
+            "title": f"{topic} {aspect}",
+            "content": f"{topic} {aspect.lower()} for {rng.choice(PRODUCTS)}: the standard limit is "
+                       f"${limit:,} and exceptions require approval from a {rng.choice(CHANNELS)} specialist.",
+        }
+
+def notes(names: List[str], rng: random.Random) -> Iterator[Dict[str, List[str]]]:
+    for start in range(0, len(names), CHUNK):
+        chunk = {}
+        for name in names[start:start + CHUNK]:
+            chunk[name] = memory.CRM_NOTES.get(name) or [
+                rng.choice(NOTE_TEMPLATES).format(product=rng.choice(PRODUCTS), channel=rng.choice(CHANNELS))
+                for _ in range(rng.randint(1, 4))
+            ]
+        yield chunk
+
+def _chunks(items: Iterator[Dict]) -> Iterator[List[Dict]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def generate(path: str, n_accounts: int, n_clients: int, n_articles: int, seed: int = 7) -> SQLiteStore:
+    rng = random.Random(seed)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    store = SQLiteStore(path, pool_size=1)
+    names = client_names(n_clients, rng)
+    for chunk in _chunks(accounts(n_accounts, names, rng)):
+        store.insert_accounts(chunk)
+    for chunk in _chunks(articles(n_articles, rng)):
+        store.insert_kb_articles(chunk)
+    for chunk in notes(names, rng):
+        store.insert_notes(chunk)
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="SQLite database to create or extend")
+    parser.add_argument("--accounts", type=int, default=100000)
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate(args.path, args.accounts, args.clients, args.articles, args.seed).close()
+    print(f"Wrote {args.accounts} accounts, {args.clients} clients and {args.articles} articles "
+          f"to {args.path} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from typing import Dict, Iterable, List, Optional
+
+from app.data.base import DataStore
+
+# Mock data
+ACCOUNTS = {
+    "ACC-123": {"id": "ACC-123", "owner": "Alice Smith", "balance": 15000.00, "type": "Checking"},
+    "ACC-456": {"id": "ACC-456", "owner": "Bob Jones", "balance": 2500.50, "type": "Savings"},
+    "ACC-789": {"id": "ACC-789", "owner": "Charlie Brown", "balance": 1000000.00, "type": "Investment"},
+}
+
+KB_ARTICLES = [
+    {"id": "KB-001", "title": "Wire Transfer Limits", "content": "Standard wire transfer limit is $50,000 per day. High-value clients can request up to $250,000."},
+    {"id": "KB-002", "title": "Account Opening Requirements", "content": "Valid ID, proof of address, and initial deposit of $100 required."},
+    {"id": "KB-003", "title": "Investment Products", "content": "We offer ETFs, Mutual Funds, and High-Yield Savings accounts."},
+]
+
+CRM_NOTES = {
+    "Alice Smith": ["Interested in home loans.", "Called about wire transfer fees on 10/20."],
+    "Bob Jones": ["Saving for a new car.", "Prefer email communication."],
+    "Charlie Brown": ["High net worth individual.", "Looking for tax-efficient investment strategies."],
+}
+
+class InMemoryStore(DataStore):
+    """Dict-backed store, seeded with the mock data by default."""
+    def __init__(self, accounts: Optional[Dict[str, Dict]] = None,
+                 kb_articles: Optional[List[Dict[str, str]]] = None,
+                 crm_notes: Optional[Dict[str, List[str]]] = None):
+        self.accounts = ACCOUNTS if accounts is None else accounts
+        self.articles = KB_ARTICLES if kb_articles is None else kb_articles
+        self.notes = CRM_NOTES if crm_notes is None else crm_notes
+
+    def get_accounts(self, account_ids: List[str]) -> Dict[str, Dict]:
+        return {aid: self.accounts[aid] for aid in account_ids if aid in self.accounts}
+
+    def kb_articles(self) -> Iterable[Dict[str, str]]:
+        return self.articles
+
+    def client_names(self) -> Iterable[str]:
+        return list(self.notes)
+
+    def get_notes(self, client_names: List[str]) -> Dict[str, List[str]]:
+        return {name: self.notes[name] for name in client_names if name in self.notes}
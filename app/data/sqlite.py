@@ -0,0 +1,122 @@
+import queue
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List
+
+from app.data.base import DataStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    balance REAL NOT NULL,
+    type TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS kb_articles (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS crm_notes (
+    client_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    note TEXT NOT NULL,
+    PRIMARY KEY (client_name, position)
+) WITHOUT ROWID;
+"""
+
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds)
+MAX_PARAMS = 500
+
+class SQLiteStore(DataStore):
+    """
+    SQLite-backed store. Connections come from a fixed-size pool so tool threads
+    don't share one connection; each connection keeps a statement cache, so the
+    parameterized queries below are prepared once per connection.
+    """
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def get_accounts(self, account_ids: List[str]) -> Dict[str, Dict]:
+        accounts = {}
+        ids = list(dict.fromkeys(account_ids))
+        with self._connection() as conn:
+            for i in range(0, len(ids), MAX_PARAMS):
+                chunk = ids[i:i + MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT id, owner, balance, type FROM accounts WHERE id IN ({placeholders})", chunk
+                )
+                for aid, owner, balance, acc_type in rows:
+                    accounts[aid] = {"id": aid, "owner": owner, "balance": balance, "type": acc_type}
+        return accounts
+
+    def kb_articles(self) -> Iterable[Dict[str, str]]:
+        with self._connection() as conn:
+            rows = conn.execute("SELECT id, title, content FROM kb_articles ORDER BY id").fetchall()
+        return [{"id": aid, "title": title, "content": content} for aid, title, content in rows]
+
+    def client_names(self) -> Iterable[str]:
+        with self._connection() as conn:
+            rows = conn.execute("SELECT DISTINCT client_name FROM crm_notes").fetchall()
+        return [row[0] for row in rows]
+
+    def get_notes(self, client_names: List[str]) -> Dict[str, List[str]]:
+        notes: Dict[str, List[str]] = {}
+        names = list(dict.fromkeys(client_names))
+        with self._connection() as conn:
+            for i in range(0, len(names), MAX_PARAMS):
+                chunk = names[i:i + MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT client_name, note FROM crm_notes WHERE client_name IN ({placeholders}) "
+                    "ORDER BY client_name, position", chunk
+                )
+                for name, note in rows:
+                    notes.setdefault(name, []).append(note)
+        # Keep the caller's order, like the in-memory store
+        return {name: notes[name] for name in names if name in notes}
+
+    def insert_accounts(self, accounts: Iterable[Dict]) -> None:
+        with self._connection() as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO accounts (id, owner, balance, type) VALUES (?, ?, ?, ?)",
+                ((a["id"], a["owner"], a["balance"], a["type"]) for a in accounts),
+            )
+
+    def insert_kb_articles(self, articles: Iterable[Dict[str, str]]) -> None:
+        with self._connection() as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO kb_articles (id, title, content) VALUES (?, ?, ?)",
+                ((a["id"], a["title"], a["content"]) for a in articles),
+            )
+
+    def insert_notes(self, notes: Dict[str, List[str]]) -> None:
+        with self._connection() as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO crm_notes (client_name, position, note) VALUES (?, ?, ?)",
+                ((name, i, note) for name, note_list in notes.items() for i, note in enumerate(note_list)),
+            )
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get().close()
@@ -1,6 +1,14 @@
-from fastapi import FastAPI, HTTPException
-from app.models import ChatRequest, AgentResponse
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import Awaitable, Iterator, Optional, TypeVar
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from app.models import ChatRequest, AgentResponse, BatchChatRequest, BatchChatResponse, SessionResponse
+from app.agent import deadline, llm
 from app.agent.core import AgentCore
+from app.agent.llm import LLMError
+from app import config, metrics
 import uvicorn
 
 import uvicorn
@@ -16,16 +24,154 @@ logger = logging.getLogger(__name__)
 app = FastAPI(title="Relationship Manager Co-Pilot")
 agent = AgentCore()
 
+# Seconds the client is willing to wait; can only shorten AGENT_REQUEST_TIMEOUT
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+# Non-standard status (as in nginx) logged for requests whose client went away
+CLIENT_CLOSED_REQUEST = 499
+
+T = TypeVar("T")
+
+class ClientDisconnected(Exception):
+    pass
+
+def request_timeout(http_request: Request) -> Optional[float]:
+    header = http_request.headers.get(REQUEST_TIMEOUT_HEADER)
+    if header is None:
+        return None
+    try:
+        return float(header)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{REQUEST_TIMEOUT_HEADER} must be a number of seconds")
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Deadline scope for one request: AGENT_REQUEST_TIMEOUT, shortened by the client's timeout."""
+    with deadline.scope(config.REQUEST_TIMEOUT), deadline.scope(seconds):
+        yield
+
+async def _wait_for_disconnect(http_request: Request) -> None:
+    # The body has already been read, so the next ASGI message is http.disconnect
+    while (await http_request.receive())["type"] != "http.disconnect":
+        pass
+
+async def run_request(http_request: Request, work: Awaitable[T]) -> T:
+    """
+    Awaits work as its own task, cancelling it if the client disconnects first
+    (ClientDisconnected) or the request deadline passes (DeadlineExceeded), so nobody
+    spends tokens on an answer that will never be read.
+    """
+    task = asyncio.ensure_future(work)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(http_request))
+    left = deadline.remaining()
+    try:
+        done, _ = await asyncio.wait({task, disconnected}, timeout=None if left is None else max(0.0, left),
+                                     return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnected.cancel()
+        task.cancel()
+    if task in done:
+        return task.result()
+    if disconnected in done:
+        raise ClientDisconnected()
+    raise deadline.DeadlineExceeded("Request deadline exceeded")
+
 @app.post("/chat", response_model=AgentResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     logger.info(f"Received chat request: {request.query}")
     try:
-        response = agent.run(request.query)
+        with request_deadline(request_timeout(http_request)):
+            response = await run_request(http_request, agent.arun(request.query, session_id=request.session_id))
         logger.info(f"Agent finished. Verification: {response.verification_status}")
         return response
+    except ClientDisconnected:
+        logger.info("Client disconnected, agent run cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except deadline.DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except LLMError as e:
+        # Upstream LLM unavailable or rate limited after retries
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/sessions", response_model=SessionResponse)
+async def create_session():
+    """Starts a multi-turn session; pass its session_id with each /chat request."""
+    return SessionResponse(session_id=agent.sessions.create())
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    if not agent.sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"status": "deleted"}
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest, http_request: Request):
+    logger.info(f"Received batch chat request with {len(request.requests)} queries")
+    if any(r.session_id for r in request.requests):
+        # Batched queries run concurrently and are deduplicated, so they can't be turns of a conversation
+        raise HTTPException(status_code=400, detail="session_id is not supported in /chat/batch; send session turns to /chat")
+    max_concurrency = min(request.max_concurrency or config.BATCH_MAX_CONCURRENCY, config.BATCH_MAX_CONCURRENCY)
+    try:
+        with request_deadline(request_timeout(http_request)):
+            results = await run_request(http_request, agent.arun_batch(
+                [r.query for r in request.requests], max_concurrency=max_concurrency))
+    except ClientDisconnected:
+        logger.info("Client disconnected, batch cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except deadline.DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    return BatchChatResponse(results=results)
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Server-sent events version of /chat: plan, step, answer (token chunks),
+    verification and done events, in that order.
+    """
+    logger.info(f"Received streaming chat request: {request.query}")
+    seconds = request_timeout(http_request)
+
+    async def events():
+        try:
+            with request_deadline(seconds):
+                async for event, data in agent.astream(request.query):
+                    yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Streaming chat failed: {e}")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/stats")
+async def stats():
+    """Fast-path router and cache counters for this worker."""
+    return {
+        "router": agent.router.stats(),
+        "plan_cache": agent.plan_cache.stats(),
+        "tool_cache": agent.tool_cache.stats(),
+        "shared_cache": agent.shared_cache.stats() if agent.shared_cache else None,
+        "llm_cache": llm.response_cache.stats(),
+        "context": agent.context.stats(),
+        "sessions": agent.sessions.stats(),
+        "coalescer": agent.coalescer.stats(),
+        "engine": agent.engine,
+        "models": {**agent.models, "planner_escalation": agent.planner_escalation_model},
+        "tiers": agent.tiers.report(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage latencies, token usage and error counts in Prometheus text format."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
@@ -0,0 +1,173 @@
+"""
+Minimal in-process metrics with Prometheus text exposition, served on /metrics.
+Recording is a dict update under a lock, cheap enough to leave on in production.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = ['%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+             for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels.get(n, "")) for n in self.labelnames), 0.0)
+
+    def values(self) -> Dict[LabelValues, float]:
+        """Snapshot of every label set recorded so far."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(tuple(str(labels.get(n, "")) for n in self.labelnames))
+        return sum(entry[0]) if entry else 0
+
+    def totals(self) -> Dict[LabelValues, Tuple[int, float]]:
+        """Snapshot of (count, sum) for every label set recorded so far."""
+        with self._lock:
+            return {key: (sum(counts), total[0]) for key, (counts, total) in self._values.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, 'le="%g"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                cumulative += counts[-1]
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total[0]:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "agent_stage_duration_seconds", "Duration of agent pipeline stages.", ["stage"])
+STAGE_ERRORS = REGISTRY.counter(
+    "agent_stage_errors_total", "Agent pipeline stages that raised an exception.", ["stage"])
+TOOL_DURATION = REGISTRY.histogram(
+    "agent_tool_duration_seconds", "Duration of tool calls (cache hits excluded).", ["tool"])
+TOOL_ERRORS = REGISTRY.counter(
+    "agent_tool_errors_total", "Tool calls that failed or timed out.", ["tool", "reason"])
+LLM_DURATION = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Duration of LLM calls including retries.", ["stage", "model"])
+LLM_PROMPT_TOKENS = REGISTRY.counter(
+    "llm_prompt_tokens_total", "Prompt tokens reported by the LLM API.", ["stage", "model"])
+LLM_COMPLETION_TOKENS = REGISTRY.counter(
+    "llm_completion_tokens_total", "Completion tokens reported by the LLM API.", ["stage", "model"])
+LLM_ERRORS = REGISTRY.counter(
+    "llm_errors_total", "LLM calls that failed after retries.", ["stage", "model"])
+
+# Pipeline stage of the code currently running, used to label LLM metrics
+current_stage = ContextVar("current_stage", default="unknown")
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """
+    Times a pipeline stage, counts its errors and labels LLM calls made inside it.
+    Cancellation (a client disconnect, a dropped speculative or verification task) isn't an error.
+    """
+    token = current_stage.set(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=stage)
+        current_stage.reset(token)
+
+# LLM calls made on behalf of one agent run, tallied only inside count_llm_calls()
+_llm_call_tally = ContextVar("llm_call_tally", default=None)
+
+@contextmanager
+def count_llm_calls() -> Iterator[List[int]]:
+    """Tallies LLM calls made inside the block, including by tasks it starts, in tally[0]."""
+    tally = [0]
+    token = _llm_call_tally.set(tally)
+    try:
+        yield tally
+    finally:
+        _llm_call_tally.reset(token)
+
+def record_llm_call() -> None:
+    tally = _llm_call_tally.get()
+    if tally is not None:
+        tally[0] += 1
@@ -3,19 +3,37 @@ from typing import List, Optional, Dict, Any
 
 class ChatRequest(BaseModel):
     query: str
+    session_id: Optional[str] = None  # continue a multi-turn session (created on first use)
 
 class Step(BaseModel):
     step_number: int
     description: str
     tool_name: Optional[str] = None
     tool_args: Optional[Dict[str, Any]] = None
+    depends_on: Optional[List[int]] = None  # step_numbers that must finish first
     result: Optional[str] = None
 
 class Plan(BaseModel):
     steps: List[Step]
+    planner_model: Optional[str] = None  # LLM that produced the plan; None for fast-path plans
 
 class AgentResponse(BaseModel):
     query: str
     plan: Plan
     final_answer: str
-    verification_status: str  # "verified", "failed", "unknown"
+    verification_status: str  # "verified", "failed", "unknown", or "skipped" when the deadline was near
+    session_id: Optional[str] = None
+
+class SessionResponse(BaseModel):
+    session_id: str
+
+class BatchChatRequest(BaseModel):
+    requests: List[ChatRequest]
+    max_concurrency: Optional[int] = None  # capped by BATCH_MAX_CONCURRENCY
+
+class BatchItemResult(BaseModel):
+    response: Optional[AgentResponse] = None
+    error: Optional[str] = None
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchItemResult]  # same order as the submitted requests
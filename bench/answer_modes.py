@@ -0,0 +1,80 @@
+"""
+Compares end-to-end latency of the verify/final-answer modes against the sequential path.
+
+The LLM is simulated with a log-normal latency per call, so no API key is needed:
+    python bench/answer_modes.py --requests 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+from unittest.mock import patch
+
+# Add project root to path so we can import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.core import AgentCore, ANSWER_MODES
+from app.agent.prompts import PLANNER_SYSTEM_PROMPT, VERIFIER_SYSTEM_PROMPT, FUSED_ANSWER_PROMPT
+
+PLAN = json.dumps({"steps": [{
+    "step_number": 1,
+    "description": "Look up account details for ACC-123",
+    "tool_name": "account_lookup",
+    "tool_args": {"account_id": "ACC-123"}
+}]})
+
+def make_fake_llm(median_ms: float, sigma: float, rng: random.Random):
+    async def fake_llm(messages: list, model: str = "gpt-4o") -> str:
+        await asyncio.sleep(rng.lognormvariate(0, sigma) * median_ms / 1000)
+        system_prompt = messages[0]["content"]
+        if system_prompt == PLANNER_SYSTEM_PROMPT:
+            return PLAN
+        if system_prompt == VERIFIER_SYSTEM_PROMPT:
+            return '{"status": "verified", "reason": "ok"}'
+        if system_prompt == FUSED_ANSWER_PROMPT:
+            return '{"status": "verified", "reason": "ok", "answer": "The balance is $15,000."}'
+        return "The balance is $15,000."
+    return fake_llm
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def measure(mode: str, requests: int) -> List[float]:
+    agent = AgentCore(answer_mode=mode)
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await agent.arun("What is the balance of account ACC-123?")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--median-ms", type=float, default=150.0, help="Median simulated LLM latency")
+    parser.add_argument("--sigma", type=float, default=0.4, help="Log-normal spread of LLM latency")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    for mode in ANSWER_MODES:
+        fake_llm = make_fake_llm(args.median_ms, args.sigma, random.Random(args.seed))
+        with patch("app.agent.core.acall_llm", side_effect=fake_llm):
+            latencies = asyncio.run(measure(mode, args.requests))
+        results[mode] = {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95)}
+
+    baseline = results["sequential"]
+    print(f"{'mode':<12}{'p50 ms':>10}{'p95 ms':>10}{'p50 gain':>10}{'p95 gain':>10}")
+    for mode, stats in results.items():
+        p50_gain = 1 - stats["p50"] / baseline["p50"]
+        p95_gain = 1 - stats["p95"] / baseline["p95"]
+        print(f"{mode:<12}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{p50_gain:>10.1%}{p95_gain:>10.1%}")
+
+if __name__ == "__main__":
+    main()
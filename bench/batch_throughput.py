@@ -0,0 +1,77 @@
+"""
+Compares a serial loop over AgentCore.arun (how overnight briefing jobs call /chat today)
+with AgentCore.arun_batch, using simulated LLM latency.
+
+    python bench/batch_throughput.py --queries 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from unittest.mock import patch
+
+# Add project root to path so we can import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.core import AgentCore
+from app.agent.prompts import PLANNER_SYSTEM_PROMPT, VERIFIER_SYSTEM_PROMPT
+
+CLIENTS = ["Alice", "Bob", "Charlie"]
+ACCOUNTS = ["ACC-123", "ACC-456", "ACC-789"]
+
+def make_queries(count: int, rng: random.Random):
+    templates = [
+        "Prepare a briefing for {client}: CRM notes and account {account}.",
+        "What is the balance of {account}?",
+        "Find CRM notes for {client} and check wire transfer limits.",
+    ]
+    return [rng.choice(templates).format(client=rng.choice(CLIENTS), account=rng.choice(ACCOUNTS))
+            for _ in range(count)]
+
+def make_fake_llm(latency_ms: float):
+    async def fake_llm(messages: list, model: str = "gpt-4o") -> str:
+        await asyncio.sleep(latency_ms / 1000)
+        system_prompt = messages[0]["content"]
+        if system_prompt == PLANNER_SYSTEM_PROMPT:
+            return json.dumps({"steps": [{
+                "step_number": 1, "description": "Retrieve CRM notes",
+                "tool_name": "crm_notes", "tool_args": {"client_name": "Alice"},
+            }]})
+        if system_prompt == VERIFIER_SYSTEM_PROMPT:
+            return '{"status": "verified", "reason": "ok"}'
+        return "Briefing ready."
+    return fake_llm
+
+async def serial(agent: AgentCore, queries):
+    return [await agent.arun(q) for q in queries]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Simulated latency per LLM call")
+    parser.add_argument("--unique", action="store_true", help="Make every query distinct (no shared runs)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries, random.Random(args.seed))
+    if args.unique:
+        queries = [f"{q} (request {i})" for i, q in enumerate(queries)]
+    print(f"{len(queries)} queries, {len(set(queries))} distinct")
+
+    with patch("app.agent.core.acall_llm", side_effect=make_fake_llm(args.latency_ms)):
+        for label, run in [
+            ("serial loop", lambda agent: serial(agent, queries)),
+            (f"batch x{args.concurrency}", lambda agent: agent.arun_batch(queries, max_concurrency=args.concurrency)),
+        ]:
+            agent = AgentCore(plan_cache_enabled=False)
+            start = time.perf_counter()
+            asyncio.run(run(agent))
+            elapsed = time.perf_counter() - start
+            print(f"{label:<14} {elapsed:>7.2f}s  {len(queries) / elapsed:>7.1f} queries/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures crm_notes partial-name lookups against a synthetic client base.
+
+    python bench/crm_lookup.py --clients 5000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+# Add project root to path so we can import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.name_index import NameIndex
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Edward", "Fatima", "George", "Hannah", "Ivan", "Julia",
+    "Kenji", "Laura", "Mohammed", "Nina", "Oscar", "Priya", "Quentin", "Rosa", "Samuel", "Tara",
+    "Umar", "Victor", "Wendy", "Xavier", "Yara", "Zoe", "John", "Mary", "David", "Sarah",
+]
+SYLLABLES = ["ab", "ber", "can", "dor", "el", "fin", "gar", "hol", "ing", "jo", "kel", "lam",
+             "mor", "nes", "ol", "per", "quin", "ros", "son", "tan", "ul", "vin", "wes", "yor"]
+
+def generate_names(count: int, rng: random.Random) -> List[str]:
+    names = set()
+    while len(names) < count:
+        last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+        names.add(f"{rng.choice(FIRST_NAMES)} {last}")
+    return list(names)
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000000)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = generate_names(args.clients, rng)
+    start = time.perf_counter()
+    index = NameIndex(names)
+    print(f"Indexed {len(index)} clients in {time.perf_counter() - start:.1f}s")
+
+    # Mix of first names, full names, last names and partial last names
+    queries = []
+    for name in rng.sample(names, args.queries):
+        first, last = name.split(" ", 1)
+        queries.append(rng.choice([first, name, last, last[:4], f"{first} {last[:3]}"]))
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.lookup(query, limit=args.limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"lookup p50 {percentile(latencies, 50):.4f}ms  p95 {percentile(latencies, 95):.4f}ms  "
+          f"p99 {percentile(latencies, 99):.4f}ms  max {max(latencies):.4f}ms")
+
+    # Linear scan like the original crm_notes, on a sample of queries
+    sample = queries[:20]
+    start = time.perf_counter()
+    for query in sample:
+        lowered = query.lower()
+        [n for n in names if lowered in n.lower()][:args.limit]
+    print(f"linear scan mean {(time.perf_counter() - start) * 1000 / len(sample):.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares one-at-a-time account lookups with batched lookups on a generated SQLite dataset.
+
+    python bench/data_layer.py --accounts 1000000 --batch 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add project root to path so we can import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.data.generate import generate
+from app.data.sqlite import SQLiteStore
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="Existing database from app.data.generate (default: generate a temporary one)")
+    parser.add_argument("--accounts", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=20, help="Accounts touched by one plan")
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        if args.db:
+            store = SQLiteStore(args.db)
+        else:
+            store = generate(os.path.join(tmp, "bench.db"), args.accounts, n_clients=1000, n_articles=100,
+                             seed=args.seed)
+        print(f"Dataset ready in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(args.seed)
+        batches = [[f"ACC-{rng.randint(1000, 1000 + args.accounts - 1)}" for _ in range(args.batch)]
+                   for _ in range(args.rounds)]
+
+        start = time.perf_counter()
+        for ids in batches:
+            for aid in ids:
+                store.get_account(aid)
+        single_ms = (time.perf_counter() - start) * 1000 / args.rounds
+
+        start = time.perf_counter()
+        for ids in batches:
+            store.get_accounts(ids)
+        batch_ms = (time.perf_counter() - start) * 1000 / args.rounds
+        store.close()
+
+    print(f"{args.batch} accounts per plan: one-by-one {single_ms:.3f}ms, batched {batch_ms:.3f}ms "
+          f"({single_ms / batch_ms:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compares the planner engine with the native tool-calling engine on the eval dataset:
+LLM round-trips, prompt/completion tokens, end-to-end latency and whether the expected
+tools were called, per query.
+
+By default the LLM is the fake OpenAI server (canned outputs, simulated latency), so no
+API key is needed and the numbers show the pipeline's shape; --live uses the real API
+(OPENAI_API_KEY), where token counts and tool choices are the model's own:
+    python bench/engines.py --latency-ms 300
+    python bench/engines.py --live --repeat 1 --output bench/results/engines.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+# Add project root to path so we can import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import metrics
+from app.agent import llm
+from app.agent.core import AgentCore, ENGINES
+from fake_openai_server import (
+    LATENCY_DISTRIBUTIONS, FakeOpenAIServer, agent_responder, agent_tool_responder, make_latency
+)
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def llm_totals() -> Dict[str, float]:
+    return {
+        "calls": sum(count for count, _ in metrics.LLM_DURATION.totals().values()),
+        "prompt_tokens": sum(metrics.LLM_PROMPT_TOKENS.values().values()),
+        "completion_tokens": sum(metrics.LLM_COMPLETION_TOKENS.values().values()),
+    }
+
+async def measure(engine: str, cases: List[Dict], answer_mode: str) -> Dict[str, float]:
+    # Caches and the fast path off: every case pays for its own LLM calls
+    agent = AgentCore(engine=engine, answer_mode=answer_mode, plan_cache_enabled=False,
+                      tool_cache_enabled=False, fast_path_enabled=False)
+    llm.response_cache.enabled = False
+    latencies = []
+    tools_ok = 0
+    before = llm_totals()
+    for case in cases:
+        start = time.perf_counter()
+        response = await agent.arun(case["query"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        called = {s.tool_name for s in response.plan.steps if s.tool_name}
+        tools_ok += set(case.get("expected_tools", [])) <= called
+    after = llm_totals()
+    count = len(cases)
+    return {
+        "llm_calls": (after["calls"] - before["calls"]) / count,
+        "prompt_tokens": (after["prompt_tokens"] - before["prompt_tokens"]) / count,
+        "completion_tokens": (after["completion_tokens"] - before["completion_tokens"]) / count,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "tools_ok": tools_ok / count,
+    }
+
+async def measure_all(cases: List[Dict], answer_mode: str) -> Dict[str, Dict[str, float]]:
+    # One event loop for every engine: the async LLM client's connections are bound to it
+    return {engine: await measure(engine, cases, answer_mode) for engine in ENGINES}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default="eval/dataset.json")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the dataset per engine")
+    parser.add_argument("--live", action="store_true", help="Call the real API instead of the fake server")
+    parser.add_argument("--answer-mode", default="concurrent", help="Planner engine verify/answer mode")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Median simulated LLM latency")
+    parser.add_argument("--latency-spread", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with open(args.dataset) as f:
+        cases = json.load(f) * args.repeat
+
+    fake = None
+    if not args.live:
+        fake = FakeOpenAIServer(responder=agent_responder, tool_responder=agent_tool_responder, retry_after=None,
+                                latency=make_latency(args.latency, args.latency_ms, args.latency_spread,
+                                                     random.Random(args.seed))).start()
+        llm.client, llm.async_client = llm.create_clients("fake-key", fake.base_url)
+    try:
+        results = asyncio.run(measure_all(cases, args.answer_mode))
+    finally:
+        if fake:
+            fake.stop()
+
+    baseline = results["planner"]
+    print(f"{len(cases)} queries ({args.dataset} x{args.repeat}, {'live API' if args.live else 'fake server'})")
+    print(f"{'engine':<10}{'LLM calls':>10}{'prompt tok':>12}{'compl tok':>11}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p50 gain':>10}{'tools ok':>10}")
+    for engine, stats in results.items():
+        print(f"{engine:<10}{stats['llm_calls']:>10.2f}{stats['prompt_tokens']:>12.0f}"
+              f"{stats['completion_tokens']:>11.0f}{stats['p50_ms']:>9.0f}{stats['p95_ms']:>9.0f}"
+              f"{1 - stats['p50_ms'] / baseline['p50_ms']:>10.1%}{stats['tools_ok']:>10.0%}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"dataset": args.dataset, "live": args.live, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
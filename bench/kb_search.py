@@ -0,0 +1,74 @@
+"""
+Measures kb_search index build time and query latency on synthetic article corpora.
+
+    python bench/kb_search.py --sizes 1000 100000 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterator, List
+
+# Add project root to path so we can import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.kb_index import KBIndex
+
+TOPICS = [
+    "wire", "transfer", "limit", "mortgage", "loan", "savings", "checking", "investment", "fund",
+    "etf", "deposit", "fee", "overdraft", "card", "credit", "debit", "fraud", "dispute", "branch",
+    "statement", "tax", "retirement", "ira", "rate", "interest", "currency", "exchange", "account",
+]
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+    # Spread the topic words through the frequency ranks instead of making them the most common
+    for i, topic in enumerate(TOPICS):
+        words.insert(50 + i * 40, topic)
+    return words
+
+def generate_articles(count: int, vocabulary: List[str], rng: random.Random) -> Iterator[Dict[str, str]]:
+    # Zipf-like word frequencies, so a few terms are very common like in real policy text
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for i in range(count):
+        title = " ".join(rng.choices(TOPICS, k=3)).title()
+        content = " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=40))
+        yield {"id": f"KB-{i:07d}", "title": title, "content": content}
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    queries = [" ".join(rng.sample(TOPICS, 2)) for _ in range(args.queries)]
+
+    print(f"{'articles':>10}{'build s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for size in args.sizes:
+        articles = list(generate_articles(size, vocabulary, random.Random(args.seed)))
+        index = KBIndex()
+        start = time.perf_counter()
+        index.add_articles(articles)
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, top_k=5)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{size:>10}{build_seconds:>10.1f}{percentile(latencies, 50):>10.2f}"
+              f"{percentile(latencies, 95):>10.2f}{percentile(latencies, 99):>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Measures the exact-match LLM response cache on the eval dataset repeated --repeat times:
+LLM calls and tokens per query, latency and hit rate with the cache off and on. The plan
+and tool caches and the fast path are off, so every saved call is the response cache's.
+
+The LLM is the fake OpenAI server with simulated latency, so no API key is needed:
+    python bench/llm_cache.py --repeat 5 --latency-ms 300
+    python bench/llm_cache.py --disk /tmp/llm_cache.db  # SQLite tier; rerun to start warm
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Add project root to path so we can import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import config, metrics
+from app.agent import llm
+from app.agent.core import AgentCore
+from app.agent.llm_cache import LLMResponseCache
+from app.cache.base import create_cache_backend
+from fake_openai_server import LATENCY_DISTRIBUTIONS, FakeOpenAIServer, agent_responder, make_latency
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def llm_totals() -> Dict[str, float]:
+    return {
+        "calls": sum(count for count, _ in metrics.LLM_DURATION.totals().values()),
+        "prompt_tokens": sum(metrics.LLM_PROMPT_TOKENS.values().values()),
+        "completion_tokens": sum(metrics.LLM_COMPLETION_TOKENS.values().values()),
+    }
+
+async def measure(cases: List[Dict], cache: LLMResponseCache) -> Dict[str, float]:
+    llm.response_cache = cache
+    agent = AgentCore(plan_cache_enabled=False, tool_cache_enabled=False, fast_path_enabled=False)
+    latencies = []
+    before = llm_totals()
+    for case in cases:
+        start = time.perf_counter()
+        await agent.arun(case["query"])
+        latencies.append((time.perf_counter() - start) * 1000)
+    after = llm_totals()
+    stats = cache.stats()
+    count = len(cases)
+    return {
+        "llm_calls": (after["calls"] - before["calls"]) / count,
+        "tokens": (after["prompt_tokens"] + after["completion_tokens"]
+                   - before["prompt_tokens"] - before["completion_tokens"]) / count,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "hit_rate": stats["hit_rate"],
+        "tokens_saved": stats["tokens_saved"] / count,
+    }
+
+async def measure_all(cases: List[Dict], disk_path: Optional[str]) -> Dict[str, Dict[str, float]]:
+    # One event loop for both runs: the async LLM client's connections are bound to it
+    def cache(enabled: bool, disk=None) -> LLMResponseCache:
+        return LLMResponseCache(config.LLM_CACHE_STAGES, ttl=config.LLM_CACHE_TTL, enabled=enabled, disk=disk)
+    results = {"off": await measure(cases, cache(False)), "memory": await measure(cases, cache(True))}
+    if disk_path:
+        # A fresh memory tier over the disk file, as after a restart or in another worker
+        disk = create_cache_backend("sqlite", disk_path)
+        try:
+            results["disk"] = await measure(cases, cache(True, disk))
+        finally:
+            disk.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default="eval/dataset.json")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the dataset")
+    parser.add_argument("--disk", help="Also run with a SQLite disk tier at this path")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Median simulated LLM latency")
+    parser.add_argument("--latency-spread", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with open(args.dataset) as f:
+        cases = json.load(f) * args.repeat
+
+    fake = FakeOpenAIServer(responder=agent_responder, retry_after=None,
+                            latency=make_latency(args.latency, args.latency_ms, args.latency_spread,
+                                                 random.Random(args.seed))).start()
+    llm.client, llm.async_client = llm.create_clients("fake-key", fake.base_url)
+    try:
+        results = asyncio.run(measure_all(cases, args.disk))
+    finally:
+        fake.stop()
+
+    print(f"{len(cases)} queries ({args.dataset} x{args.repeat}), stages cached: {', '.join(config.LLM_CACHE_STAGES)}")
+    print(f"{'cache':<8}{'LLM calls':>10}{'tokens':>9}{'p50 ms':>9}{'p95 ms':>9}{'hit rate':>10}{'tok saved':>11}")
+    for name, stats in results.items():
+        print(f"{name:<8}{stats['llm_calls']:>10.2f}{stats['tokens']:>9.0f}{stats['p50_ms']:>9.0f}"
+              f"{stats['p95_ms']:>9.0f}{stats['hit_rate']:>10.0%}{stats['tokens_saved']:>11.0f}")
+
+if __name__ == "__main__":
+    main()
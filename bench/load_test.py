@@ -0,0 +1,198 @@
+"""
+Load test for /chat with no OpenAI spend: closed-loop clients at a fixed concurrency drive
+the API, which talks to the fake OpenAI server with canned agent outputs and simulated
+latency. Reports req/s and latency percentiles and writes them as JSON for comparison
+across commits.
+
+    python bench/load_test.py --concurrency 32 --requests 500 --output bench/results/load.json
+    python bench/load_test.py --compare bench/results/load.json --output bench/results/load-new.json
+
+With --url the load goes to an already running server instead (e.g. several uvicorn
+workers pointed at `python fake_openai_server.py --agent`); nothing is started in-process.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+
+# Add project root to path so we can import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_openai_server import (
+    LATENCY_DISTRIBUTIONS, FakeOpenAIServer, agent_responder, agent_tool_responder, make_latency
+)
+
+CLIENTS = ["Alice", "Bob", "Charlie", "Diana", "Edward", "Fatima", "George", "Hannah"]
+TEMPLATES = [
+    "What is the balance of ACC-{n}?",
+    "Find CRM notes for {client}.",
+    "Prepare a briefing for {client}: CRM notes and account ACC-{n}.",
+    "What is the wire transfer limit for ACC-{n}?",
+    "Compare accounts ACC-{n} and ACC-{m}.",
+]
+
+def make_queries(count: int, rng: random.Random) -> List[str]:
+    return [rng.choice(TEMPLATES).format(n=rng.randint(100, 999), m=rng.randint(100, 999),
+                                         client=rng.choice(CLIENTS))
+            for _ in range(count)]
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def start_api(fake_base_url: str, shortcuts: bool) -> uvicorn.Server:
+    """Runs app.main on a background uvicorn server whose LLM client points at the fake server."""
+    from app.agent import llm
+    from app.main import agent, app
+
+    llm.client, llm.async_client = llm.create_clients("fake-key", fake_base_url)
+    if not shortcuts:
+        agent.router.enabled = False
+        agent.plan_cache.enabled = False
+        agent.tool_cache.enabled = False
+        llm.response_cache.enabled = False
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=free_port(), log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+async def drive(url: str, queries: List[str], concurrency: int, duration: Optional[float]) -> Dict:
+    """Closed loop: each client sends its next query as soon as the previous one returns."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    pending = iter(queries)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120.0) as client:
+        start = time.perf_counter()
+        deadline = start + duration if duration else None
+
+        async def worker():
+            for query in pending:
+                if deadline and time.perf_counter() > deadline:
+                    return
+                sent = time.perf_counter()
+                try:
+                    response = await client.post("/chat", json={"query": query})
+                    if response.status_code == 200:
+                        latencies.append(time.perf_counter() - sent)
+                        continue
+                    key = str(response.status_code)
+                except httpx.HTTPError as e:
+                    key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    summary = {"requests": len(latencies) + sum(errors.values()), "errors": errors,
+               "duration_s": round(elapsed, 3), "throughput_rps": round(len(latencies) / elapsed, 2)}
+    if latencies:
+        summary["latency_ms"] = {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1),
+            **{f"p{p}": round(percentile(latencies, p) * 1000, 1) for p in (50, 95, 99)},
+            "max": round(max(latencies) * 1000, 1),
+        }
+    return summary
+
+def print_comparison(baseline: Dict, result: Dict) -> None:
+    rows = [("req/s", baseline.get("throughput_rps"), result.get("throughput_rps"))]
+    for key in ("p50", "p95", "p99"):
+        rows.append((f"{key} ms", baseline.get("latency_ms", {}).get(key), result.get("latency_ms", {}).get(key)))
+    print(f"\nvs baseline {baseline.get('commit') or '?'}:")
+    for name, before, after in rows:
+        if before and after:
+            print(f"  {name:<7}{before:>10}{after:>10}{(after - before) / before * 100:>+9.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--duration", type=float, help="Stop sending after this many seconds")
+    parser.add_argument("--warmup", type=int, default=10, help="Requests sent (and discarded) before measuring")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Median simulated latency per LLM call")
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--no-shortcuts", action="store_true",
+                        help="Disable the fast-path router and the plan/tool caches (in-process only)")
+    parser.add_argument("--url", help="Load an already running API instead of starting one")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Print deltas against an earlier results JSON")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="Keep the API's per-request INFO logs")
+    args = parser.parse_args()
+    if not args.verbose:
+        # Per-request log lines from the in-process API would dominate both output and CPU
+        logging.disable(logging.INFO)
+
+    rng = random.Random(args.seed)
+    fake = api = None
+    url = args.url
+    if not url:
+        fake = FakeOpenAIServer(responder=agent_responder, tool_responder=agent_tool_responder, retry_after=None,
+                                latency=make_latency(args.latency, args.latency_ms, args.latency_spread, rng)).start()
+        api = start_api(fake.base_url, shortcuts=not args.no_shortcuts)
+        url = f"http://127.0.0.1:{api.config.port}"
+
+    try:
+        if args.warmup:
+            asyncio.run(drive(url, make_queries(args.warmup, rng), min(args.concurrency, args.warmup), None))
+        llm_calls_before = len(fake.requests) if fake else 0
+        summary = asyncio.run(drive(url, make_queries(args.requests, rng), args.concurrency, args.duration))
+    finally:
+        if api:
+            api.should_exit = True
+        if fake:
+            fake.stop()
+
+    result = {
+        "benchmark": "load_test",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "verbose")},
+        **summary,
+    }
+    if fake:
+        result["llm_calls_per_request"] = round((len(fake.requests) - llm_calls_before) / max(1, summary["requests"]), 2)
+
+    latency = result.get("latency_ms", {})
+    print(f"{result['requests']} requests at concurrency {args.concurrency} in {result['duration_s']}s: "
+          f"{result['throughput_rps']} req/s, p50 {latency.get('p50')}ms  p95 {latency.get('p95')}ms  "
+          f"p99 {latency.get('p99')}ms, errors {result['errors'] or 0}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), result)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
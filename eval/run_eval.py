@@ -1,32 +1,57 @@
+"""
+Runs the eval dataset through the agent and scores it with an LLM judge.
+
+    python eval/run_eval.py --concurrency 4 --judge-batch 4
+    python eval/run_eval.py --fresh   # ignore eval/results.json and rerun every case
+    python eval/run_eval.py --fresh --cassette record   # then --cassette replay: offline, identical results
+
+Cases run concurrently and finished answers are judged several per judge call.
+eval/results.json is rewritten after every judged case, so an interrupted run resumes
+where it stopped: cases already scored without error are skipped.
+"""
+import argparse
 import json
 import os
 import sys
 import asyncio
-from typing import List, Dict
+import time
+from typing import Any, Dict, List, Tuple
 from dotenv import load_dotenv
 
 # Add project root to path so we can import app modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.agent.core import AgentCore
-from app.agent.llm import call_llm
+from app import metrics
+from app.agent.core import AgentCore, parse_json_response
+from app.agent import llm
+from app.agent.cassette import CASSETTE_MODES, Cassette
+from app.agent.llm import call_llm, acall_llm
+from app.agent.tiers import MODEL_PRICES
+from app.models import AgentResponse
 
 load_dotenv()
 
-def evaluate_fact_recall(query: str, final_answer: str, expected_facts: List[str]) -> Dict:
-    """
-    Uses LLM-as-a-judge to check if expected facts are present in the answer.
-    """
+# Judge model; the agent's own models come from AGENT_*_MODEL
+JUDGE_MODEL = os.getenv("EVAL_JUDGE_MODEL", "gpt-4o")
+
+def _fact_prompt(query: str, final_answer: str, expected_facts: List[str]) -> str:
     facts_str = "\n".join([f"- {fact}" for fact in expected_facts])
-    prompt = f"""
-    You are an impartial judge evaluating an AI agent's response.
-    
+    return f"""
     User Query: {query}
     Agent Response: {final_answer}
-    
+
     Expected Facts:
     {facts_str}
-    
+    """
+
+def evaluate_fact_recall(query: str, final_answer: str, expected_facts: List[str],
+                         model: str = JUDGE_MODEL) -> Dict:
+    """
+    Uses LLM-as-a-judge to check if expected facts are present in the answer.
+    """
+    prompt = f"""
+    You are an impartial judge evaluating an AI agent's response.
+    {_fact_prompt(query, final_answer, expected_facts)}
     Task: Check if the Agent Response contains the information from the Expected Facts.
     For each fact, determine if it is present (Pass) or missing (Fail).
     
@@ -41,75 +66,213 @@ def evaluate_fact_recall(query: str, final_answer: str, expected_facts: List[str
     """
     
     messages = [{"role": "user", "content": prompt}]
-    response = call_llm(messages)
-    
-    try:
-        # Basic cleanup for JSON parsing
-        clean_response = response.strip()
-        if clean_response.startswith("```json"):
-            clean_response = clean_response.split("```json")[1]
-        if clean_response.endswith("```"):
-            clean_response = clean_response.rsplit("```", 1)[0]
-        return json.loads(clean_response)
-    except:
+    with metrics.track_stage("judge"):
+        response = call_llm(messages, model=model)
+    judgment = parse_json_response(response)
+    if "score" not in judgment:
         return {"results": [], "score": 0.0, "error": "Failed to parse LLM judgment"}
+    return judgment
 
-def run_eval():
-    # Load dataset
-    with open("eval/dataset.json", "r") as f:
-        dataset = json.load(f)
-    
-    agent = AgentCore()
-    results = []
-    
-    print(f"Starting evaluation of {len(dataset)} cases...\n")
-    
-    for case in dataset:
-        print(f"Running Case: {case['id']}")
-        
-        # Run Agent
+async def aevaluate_fact_recall_batch(cases: List[Tuple[Dict, AgentResponse]],
+                                      model: str = JUDGE_MODEL) -> Dict[str, Dict]:
+    """
+    Judges several (case, response) pairs in one LLM call and returns judgments by case id.
+    Cases missing from (or unparseable in) the batched reply are judged on their own.
+    """
+    sections = "\n".join(
+        f"### Case {case['id']}\n{_fact_prompt(case['query'], response.final_answer, case['expected_facts'])}"
+        for case, response in cases
+    )
+    prompt = f"""
+    You are an impartial judge evaluating an AI agent's responses to several independent cases.
+
+    {sections}
+
+    Task: For each case, check if the Agent Response contains the information from its Expected Facts.
+    For each fact, determine if it is present (Pass) or missing (Fail). Judge every case on its own.
+
+    Output JSON format:
+    {{
+        "cases": [
+            {{
+                "id": "case id",
+                "results": [{{"fact": "fact text", "status": "Pass"}}],
+                "score": <number of passed facts / total facts>
+            }}
+        ]
+    }}
+    """
+    with metrics.track_stage("judge"):
+        response = await acall_llm([{"role": "user", "content": prompt}], model=model)
+    judged = {}
+    for item in parse_json_response(response).get("cases", []):
+        if isinstance(item, dict) and "score" in item and "id" in item:
+            judged[str(item["id"])] = {"results": item.get("results", []), "score": item["score"]}
+
+    missing = [(case, resp) for case, resp in cases if case["id"] not in judged]
+    if len(cases) > 1:
+        # A single-case call is the smallest unit; don't retry it forever
+        for (case, _), judgment in zip(missing, await asyncio.gather(
+                *(aevaluate_fact_recall_batch([pair], model) for pair in missing))):
+            judged[case["id"]] = judgment[case["id"]]
+    else:
+        for case, _ in missing:
+            judged[case["id"]] = {"results": [], "score": 0.0, "error": "Failed to parse LLM judgment"}
+    return judged
+
+class ResultStore:
+    """eval/results.json as a list in dataset order, rewritten atomically after every update."""
+    def __init__(self, path: str, case_ids: List[str], fresh: bool = False):
+        self.path = path
+        self.order = {case_id: i for i, case_id in enumerate(case_ids)}
+        self.results: Dict[str, Dict] = {}
+        if not fresh and os.path.exists(path):
+            with open(path, "r") as f:
+                for result in json.load(f):
+                    if result.get("id") in self.order:
+                        self.results[result["id"]] = result
+
+    def completed(self, case_id: str) -> bool:
+        result = self.results.get(case_id)
+        return result is not None and "error" not in result and "error" not in result.get("details", {})
+
+    def record(self, result: Dict) -> None:
+        self.results[result["id"]] = result
+        ordered = sorted(self.results.values(), key=lambda r: self.order[r["id"]])
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(ordered, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+def case_result(case: Dict, response: AgentResponse, fact_eval: Dict) -> Dict:
+    """Combines the tool usage metric with the judge's fact recall score."""
+    executed_tools = [s.tool_name for s in response.plan.steps if s.tool_name]
+    # Simple set match for tools (ignoring order/duplicates for now)
+    tool_match = set(case["expected_tools"]).issubset(set(executed_tools))
+
+    print(f"{case['id']}: tools {'OK' if tool_match else 'MISSING'} ({executed_tools}), "
+          f"facts {fact_eval.get('score', 0):.2f}")
+    return {
+        "id": case["id"],
+        "tool_match": tool_match,
+        "fact_score": fact_eval.get("score", 0),
+        "details": fact_eval
+    }
+
+async def evaluate_cases(agent: AgentCore, cases: List[Dict], store: ResultStore,
+                         concurrency: int = 4, judge_batch: int = 4, judge_model: str = JUDGE_MODEL) -> None:
+    """
+    Runs cases under the concurrency limit and judges them in batches of judge_batch
+    consecutive cases, each sent once all its cases have finished. Fixed batches keep
+    judge prompts identical from run to run, so recorded judge calls replay.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    batches = [cases[i:i + max(1, judge_batch)] for i in range(0, len(cases), max(1, judge_batch))]
+    batch_of = {case["id"]: index for index, batch in enumerate(batches) for case in batch}
+    remaining = [len(batch) for batch in batches]
+    responses: Dict[str, AgentResponse] = {}
+    judging: List[asyncio.Future] = []
+
+    async def judge(batch: List[Tuple[Dict, AgentResponse]]) -> None:
         try:
-            response = agent.run(case["query"])
-            
-            # 1. Tool Usage Metric
-            executed_tools = [s.tool_name for s in response.plan.steps if s.tool_name]
-            expected_tools = case["expected_tools"]
-            
-            # Simple set match for tools (ignoring order/duplicates for now)
-            tool_match = set(expected_tools).issubset(set(executed_tools))
-            
-            # 2. Fact Recall Metric
-            fact_eval = evaluate_fact_recall(case["query"], response.final_answer, case["expected_facts"])
-            
-            case_result = {
-                "id": case["id"],
-                "tool_match": tool_match,
-                "fact_score": fact_eval.get("score", 0),
-                "details": fact_eval
-            }
-            results.append(case_result)
-            
-            print(f"  -> Tools: {'OK' if tool_match else 'MISSING'} ({executed_tools})")
-            print(f"  -> Facts: {fact_eval.get('score', 0):.2f}")
-            
+            judgments = await aevaluate_fact_recall_batch(batch, judge_model)
         except Exception as e:
-            print(f"  -> Error: {e}")
-            results.append({"id": case["id"], "error": str(e)})
-            
+            judgments = {case["id"]: {"results": [], "score": 0.0, "error": f"Judge failed: {e}"}
+                         for case, _ in batch}
+        for case, response in batch:
+            store.record(case_result(case, response, judgments[case["id"]]))
+
+    async def run_case(case: Dict) -> None:
+        async with semaphore:
+            try:
+                responses[case["id"]] = await agent.arun(case["query"])
+            except Exception as e:
+                print(f"{case['id']}: error {e}")
+                store.record({"id": case["id"], "error": str(e)})
+        index = batch_of[case["id"]]
+        remaining[index] -= 1
+        if remaining[index] == 0:
+            ready = [(c, responses[c["id"]]) for c in batches[index] if c["id"] in responses]
+            if ready:
+                judging.append(asyncio.ensure_future(judge(ready)))
+
+    await asyncio.gather(*(run_case(case) for case in cases))
+    await asyncio.gather(*judging)
+
+def llm_spend(before: Dict[Any, float], after: Dict[Any, float], default_price: Tuple[float, float]) -> Dict:
+    """Token and estimated USD spend per stage between two snapshots of the token counters."""
+    spend: Dict[str, Dict[str, float]] = {}
+    for kind in ("prompt", "completion"):
+        for (stage, model), value in after[kind].items():
+            tokens = value - before[kind].get((stage, model), 0.0)
+            if not tokens:
+                continue
+            price = MODEL_PRICES.get(model, default_price)[0 if kind == "prompt" else 1]
+            entry = spend.setdefault(stage, {"prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+            entry[f"{kind}_tokens"] += int(tokens)
+            entry["cost_usd"] += tokens * price / 1_000_000
+    return spend
+
+def token_snapshot() -> Dict[str, Dict[Any, float]]:
+    return {"prompt": metrics.LLM_PROMPT_TOKENS.values(), "completion": metrics.LLM_COMPLETION_TOKENS.values()}
+
+def run_eval(dataset_path: str = "eval/dataset.json", results_path: str = "eval/results.json",
+             concurrency: int = 4, judge_batch: int = 4, fresh: bool = False,
+             default_price: Tuple[float, float] = MODEL_PRICES["gpt-4o"], judge_model: str = JUDGE_MODEL):
+    # Load dataset
+    with open(dataset_path, "r") as f:
+        dataset = json.load(f)
+
+    store = ResultStore(results_path, [case["id"] for case in dataset], fresh=fresh)
+    pending = [case for case in dataset if not store.completed(case["id"])]
+    print(f"Starting evaluation of {len(dataset)} cases ({len(dataset) - len(pending)} already done, "
+          f"concurrency {concurrency}, judge batch {judge_batch})...\n")
+
+    tokens_before = token_snapshot()
+    start = time.perf_counter()
+    # No plan cache: it would depend on case completion order and hide planner behaviour
+    agent = AgentCore(plan_cache_enabled=False)
+    asyncio.run(evaluate_cases(agent, pending, store, concurrency, judge_batch, judge_model))
+    wall_time = time.perf_counter() - start
+    spend = llm_spend(tokens_before, token_snapshot(), default_price)
+
     # Summary
+    results = list(store.results.values())
     print("\n--- Evaluation Summary ---")
     total_cases = len(dataset)
     passed_tools = sum(1 for r in results if r.get("tool_match"))
     avg_fact_score = sum(r.get("fact_score", 0) for r in results) / total_cases if total_cases > 0 else 0
-    
+
     print(f"Total Cases: {total_cases}")
     print(f"Tool Usage Accuracy: {passed_tools/total_cases:.2%}")
     print(f"Average Fact Recall: {avg_fact_score:.2%}")
-    
-    # Save detailed results
-    with open("eval/results.json", "w") as f:
-        json.dump(results, f, indent=2)
-    print("\nDetailed results saved to eval/results.json")
+    print(f"Wall Time: {wall_time:.1f}s for {len(pending)} cases")
+    for stage, entry in sorted(spend.items()):
+        print(f"  {stage:<8} {entry['prompt_tokens']:>8} in {entry['completion_tokens']:>7} out  "
+              f"${entry['cost_usd']:.4f}")
+    print(f"LLM Spend: ${sum(e['cost_usd'] for e in spend.values()):.4f}")
+    if llm.cassette.mode != "off":
+        stats = llm.cassette.stats()
+        print(f"Cassette ({stats['mode']}): {stats['hits']} replayed, {stats['recorded']} recorded")
+    print(f"\nDetailed results saved to {results_path}")
 
 if __name__ == "__main__":
-    run_eval()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default="eval/dataset.json")
+    parser.add_argument("--results", default="eval/results.json")
+    parser.add_argument("--concurrency", type=int, default=4, help="Agent runs in flight")
+    parser.add_argument("--judge-batch", type=int, default=4, help="Cases scored per judge call")
+    parser.add_argument("--fresh", action="store_true", help="Ignore existing results and rerun every case")
+    parser.add_argument("--judge-model", default=JUDGE_MODEL)
+    parser.add_argument("--price-in", type=float, default=MODEL_PRICES["gpt-4o"][0],
+                        help="USD per 1M prompt tokens for models without a known price")
+    parser.add_argument("--price-out", type=float, default=MODEL_PRICES["gpt-4o"][1],
+                        help="USD per 1M completion tokens for models without a known price")
+    parser.add_argument("--cassette", choices=CASSETTE_MODES,
+                        help="Record or replay LLM calls (default: LLM_CASSETTE_MODE)")
+    parser.add_argument("--cassette-path", default=llm.cassette.path)
+    args = parser.parse_args()
+    if args.cassette or args.cassette_path != llm.cassette.path:
+        llm.cassette = Cassette(args.cassette_path, args.cassette or llm.cassette.mode)
+    run_eval(args.dataset, args.results, args.concurrency, args.judge_batch, args.fresh,
+             (args.price_in, args.price_out), args.judge_model)
@@ -0,0 +1,252 @@
+"""
+Local fake of the OpenAI Chat Completions API for offline tests and benchmarks.
+
+    python fake_openai_server.py --port 8100 --agent --latency lognormal --latency-ms 400
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8100/v1 uvicorn app.main:app
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+def echo_responder(messages: List[Dict], model: str) -> str:
+    return f"Echo: {messages[-1].get('content', '')}"
+
+def _canned_plan(query: str) -> Dict:
+    """A plausible plan for the query: account lookups, CRM notes and/or a KB search."""
+    steps = [("account_lookup", {"account_id": account}) for account in re.findall(r"ACC-\d+", query)]
+    if re.search(r"\b(notes?|crm|briefing|meeting)\b", query, re.I):
+        names = re.findall(r"\b[A-Z][a-z]+\b", query)[1:]
+        if names:
+            steps.append(("crm_notes", {"client_name": names[0]}))
+    if not steps or re.search(r"\b(policy|limits?|fees?|rules?|kyc)\b", query, re.I):
+        steps.append(("kb_search", {"query": query}))
+    return {"steps": [
+        {"step_number": i, "description": f"Call {tool}", "tool_name": tool, "tool_args": tool_args}
+        for i, (tool, tool_args) in enumerate(steps, 1)
+    ]}
+
+def agent_responder(messages: List[Dict], model: str) -> str:
+    """Canned planner, verifier, fused and final-answer outputs, picked by the system prompt."""
+    system = messages[0].get("content", "") if messages else ""
+    user = messages[-1].get("content", "") if messages else ""
+    if "Planner" in system:
+        return json.dumps(_canned_plan(user))
+    if "Verifier" in system:
+        return '{"status": "verified", "reason": "The tool results cover the query."}'
+    answer = "According to the account records and CRM notes, everything requested is summarized above."
+    if '"answer"' in system:
+        return json.dumps({"status": "verified", "reason": "ok", "answer": answer})
+    return answer
+
+def agent_tool_responder(messages: List[Dict], tools: List[Dict], model: str) -> Dict:
+    """
+    Native tool calling: all of the canned plan's calls in one turn (skipping tools not offered),
+    then a final answer once tool results are in the conversation.
+    """
+    if any(m.get("role") == "tool" for m in messages):
+        return {"content": "According to the account records and CRM notes, everything requested is summarized above.",
+                "tool_calls": []}
+    offered = {t["function"]["name"] for t in tools}
+    query = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    return {"content": None, "tool_calls": [
+        {"id": f"call_{uuid.uuid4().hex[:12]}", "name": s["tool_name"], "arguments": json.dumps(s["tool_args"])}
+        for s in _canned_plan(query)["steps"] if s["tool_name"] in offered
+    ]}
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+def make_latency(distribution: str, median_ms: float, spread: float = 0.5,
+                 rng: Optional[random.Random] = None) -> Callable[[], float]:
+    """
+    Returns a latency() callable in seconds. "uniform" draws from median_ms * (1 +- spread);
+    "lognormal" uses spread as sigma, giving the long right tail real LLM APIs show.
+    """
+    rng = rng or random.Random()
+    if distribution == "fixed":
+        return lambda: median_ms / 1000
+    if distribution == "uniform":
+        return lambda: rng.uniform(1 - spread, 1 + spread) * median_ms / 1000
+    if distribution == "lognormal":
+        return lambda: rng.lognormvariate(0, spread) * median_ms / 1000
+    raise ValueError(f"Unknown latency distribution {distribution!r}, expected one of {LATENCY_DISTRIBUTIONS}")
+
+class FakeOpenAIServer:
+    """
+    Serves POST /v1/chat/completions (plain and stream=True) on a background thread.
+
+    responder(messages, model) produces the reply text, and tool_responder(messages, tools,
+    model) the {"content", "tool_calls"} reply to requests that offer tools. latency() gives
+    the seconds to wait before answering, and the first fail_first requests get fail_status
+    (429 by default) with a Retry-After header, to exercise client retries.
+    """
+    def __init__(self, responder: Callable[[List[Dict], str], str] = echo_responder,
+                 latency: Optional[Callable[[], float]] = None, fail_first: int = 0,
+                 fail_status: int = 429, retry_after: Optional[float] = 0.05,
+                 host: str = "127.0.0.1", port: int = 0,
+                 tool_responder: Optional[Callable[[List[Dict], List[Dict], str], Dict]] = None):
+        self.responder = responder
+        self.tool_responder = tool_responder
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.requests: List[Dict] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                with server._lock:
+                    server.requests.append(body)
+                    failing = len(server.requests) <= server.fail_first
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency())
+                    if failing:
+                        headers = {}
+                        if server.retry_after is not None:
+                            headers["Retry-After"] = str(server.retry_after)
+                        self._send_json(server.fail_status, {"error": {
+                            "message": "Rate limit reached", "type": "rate_limit_error", "code": "rate_limit_exceeded",
+                        }}, headers)
+                        return
+                    if body.get("tools") and server.tool_responder:
+                        reply = server.tool_responder(body.get("messages", []), body["tools"], body.get("model", ""))
+                        self._send_json(200, completion(body, reply["content"], reply["tool_calls"]))
+                        return
+                    content = server.responder(body.get("messages", []), body.get("model", ""))
+                    if body.get("stream"):
+                        self._stream(body, content)
+                    else:
+                        self._send_json(200, completion(body, content))
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _stream(self, body: Dict, content: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                words = content.split(" ")
+                for i, word in enumerate(words):
+                    piece = word if i == len(words) - 1 else word + " "
+                    chunk = {
+                        "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": body.get("model", ""),
+                        "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    # Like OpenAI, a final chunk with no choices carries the usage for the whole stream
+                    usage = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": body.get("model", ""), "choices": [], "usage": completion(body, content)["usage"]}
+                    self.wfile.write(f"data: {json.dumps(usage)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+def completion(request: Dict, content: Optional[str], tool_calls: Optional[List[Dict]] = None) -> Dict:
+    # Tool schemas and earlier tool calls count towards the prompt, as they do for the real API
+    prompt_chars = sum(len(m.get("content") or "") + (len(json.dumps(m["tool_calls"])) if m.get("tool_calls") else 0)
+                       for m in request.get("messages", []))
+    if request.get("tools"):
+        prompt_chars += len(json.dumps(request["tools"]))
+    prompt_tokens = prompt_chars // 4
+    message: Dict = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+            for call in tool_calls
+        ]
+    completion_tokens = max(1, len(content or json.dumps(message.get("tool_calls", []))) // 4)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", ""),
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI Chat Completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Median latency per request")
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--agent", action="store_true", help="Reply with canned planner/verifier/answer outputs and tool calls")
+    args = parser.parse_args()
+
+    fake = FakeOpenAIServer(responder=agent_responder if args.agent else echo_responder,
+                            tool_responder=agent_tool_responder if args.agent else None,
+                            latency=make_latency(args.latency, args.latency_ms, args.latency_spread),
+                            host=args.host, port=args.port)
+    print(f"Fake OpenAI server listening on {fake.base_url}")
+    try:
+        fake._httpd.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -1,7 +1,22 @@
+import asyncio
+import json
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock
+from app.agent import deadline
 from app.agent.core import AgentCore
-from app.models import Plan, Step
+from app.agent.prompts import PLANNER_SYSTEM_PROMPT, VERIFIER_SYSTEM_PROMPT, FUSED_ANSWER_PROMPT
+from app.models import AgentResponse, Plan, Step
+
+def route_by_prompt(planner_response, verifier_response, final_answer):
+    """Builds an LLM fake that answers by system prompt, since Verify and Final Answer run concurrently."""
+    def fake_llm(messages, model="gpt-4o"):
+        system_prompt = messages[0]["content"]
+        if system_prompt == PLANNER_SYSTEM_PROMPT:
+            return planner_response
+        if system_prompt == VERIFIER_SYSTEM_PROMPT:
+            return verifier_response
+        return final_answer
+    return fake_llm
 
 class TestAgentCore(unittest.TestCase):
     @patch('app.agent.core.call_llm')
@@ -32,12 +47,14 @@ class TestAgentCore(unittest.TestCase):
         final_answer = "The balance is $15,000."
         
         # Set side_effects for the 3 calls: Plan, Verify, Final Answer
-        mock_llm.side_effect = [planner_response, verifier_response, final_answer]
+        mock_llm.side_effect = route_by_prompt(planner_response, verifier_response, final_answer)
         
-        agent = AgentCore()
+        # The fast path would route this query without the planner
+        agent = AgentCore(fast_path_enabled=False, plan_cache_enabled=False)
         response = agent.run("Check balance for ACC-123")
         
         # Assertions
+        self.assertEqual(mock_llm.call_args_list[0].args[0][0]["content"], PLANNER_SYSTEM_PROMPT)
         self.assertEqual(len(response.plan.steps), 1)
         self.assertEqual(response.plan.steps[0].tool_name, "account_lookup")
         self.assertIn("Alice Smith", response.plan.steps[0].result) # Check if tool actually ran and got real mock data
@@ -45,5 +62,349 @@ class TestAgentCore(unittest.TestCase):
         self.assertEqual(response.final_answer, "The balance is $15,000.")
         print("Agent Loop Test Passed!")
 
+class TestAgentCoreAsync(unittest.IsolatedAsyncioTestCase):
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_async_agent_loop(self, mock_llm):
+        planner_response = json.dumps({"steps": [{
+            "step_number": 1,
+            "description": "Look up account details",
+            "tool_name": "account_lookup",
+            "tool_args": {"account_id": "ACC-456"}
+        }]})
+        verifier_response = '{"status": "verified", "reason": "Account details found."}'
+        mock_llm.side_effect = route_by_prompt(planner_response, verifier_response, "The balance is $2,500.50.")
+
+        agent = AgentCore(fast_path_enabled=False)
+        response = await agent.arun("Check balance for ACC-456")
+
+        self.assertEqual(mock_llm.await_count, 3)
+        self.assertIn("Bob Jones", response.plan.steps[0].result)
+        self.assertEqual(response.verification_status, "verified")
+        self.assertEqual(response.final_answer, "The balance is $2,500.50.")
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_fused_answer_mode(self, mock_llm):
+        planner_response = json.dumps({"steps": [{
+            "step_number": 1,
+            "description": "Look up account details",
+            "tool_name": "account_lookup",
+            "tool_args": {"account_id": "ACC-123"}
+        }]})
+        fused_response = json.dumps({"status": "verified", "reason": "Found.", "answer": "The balance is $15,000."})
+        mock_llm.side_effect = [planner_response, fused_response]
+
+        agent = AgentCore(answer_mode="fused", fast_path_enabled=False)
+        response = await agent.arun("Check balance for ACC-123")
+
+        self.assertEqual(mock_llm.await_count, 2)
+        self.assertEqual(mock_llm.await_args_list[1].args[0][0]["content"], FUSED_ANSWER_PROMPT)
+        self.assertEqual(response.verification_status, "verified")
+        self.assertEqual(response.final_answer, "The balance is $15,000.")
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_fused_answer_mode_unparseable(self, mock_llm):
+        mock_llm.side_effect = ['{"steps": []}', "Plain text answer"]
+
+        agent = AgentCore(answer_mode="fused")
+        response = await agent.arun("Hello")
+
+        self.assertEqual(response.verification_status, "unknown")
+        self.assertEqual(response.final_answer, "Plain text answer")
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_verification_skipped_near_deadline(self, mock_llm):
+        mock_llm.side_effect = route_by_prompt('{"steps": []}', '{"status": "verified"}', "Quick answer")
+
+        agent = AgentCore(fast_path_enabled=False, plan_cache_enabled=False, coalesce_enabled=False)
+        with deadline.scope(2):
+            response = await agent.arun("Hello")
+
+        self.assertEqual(response.verification_status, "skipped")
+        self.assertEqual(response.final_answer, "Quick answer")
+        self.assertEqual(mock_llm.await_count, 2)  # planner and answer, no verifier
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_plan_cache_skips_planner(self, mock_llm):
+        planner_response = json.dumps({"steps": [{
+            "step_number": 1,
+            "description": "Look up account details for ACC-123",
+            "tool_name": "account_lookup",
+            "tool_args": {"account_id": "ACC-123"}
+        }]})
+        mock_llm.side_effect = route_by_prompt(planner_response, '{"status": "verified"}', "Done")
+
+        agent = AgentCore(fast_path_enabled=False)
+        await agent.arun("What is the balance of ACC-123?")
+        response = await agent.arun("What is the balance of ACC-456?")
+
+        planner_calls = [c for c in mock_llm.await_args_list if c.args[0][0]["content"] == PLANNER_SYSTEM_PROMPT]
+        self.assertEqual(len(planner_calls), 1)
+        self.assertEqual(response.plan.steps[0].tool_args, {"account_id": "ACC-456"})
+        self.assertIn("Bob Jones", response.plan.steps[0].result)
+        self.assertEqual(agent.plan_cache.stats()["hits"], 1)
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_fast_path_skips_planner(self, mock_llm):
+        mock_llm.side_effect = route_by_prompt('{"steps": []}', '{"status": "verified"}', "Done")
+
+        agent = AgentCore()
+        response = await agent.arun("CRM notes for Charlie Brown")
+
+        system_prompts = [c.args[0][0]["content"] for c in mock_llm.await_args_list]
+        self.assertNotIn(PLANNER_SYSTEM_PROMPT, system_prompts)
+        self.assertEqual(response.plan.steps[0].tool_args, {"client_name": "Charlie Brown"})
+        self.assertIn("High net worth", response.plan.steps[0].result)
+        self.assertEqual(agent.router.stats()["fast_path"], 1)
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_batch_dedupes_and_keeps_order(self, mock_llm):
+        mock_llm.side_effect = route_by_prompt('{"steps": []}', '{"status": "verified"}', "Done")
+
+        agent = AgentCore(plan_cache_enabled=False)
+        queries = ["Market update?", "Hello", "market  UPDATE?", "Market update?"]
+        results = await agent.arun_batch(queries)
+
+        self.assertEqual([r.response.query for r in results], queries)
+        # Two distinct queries, three LLM calls each
+        self.assertEqual(mock_llm.await_count, 6)
+
+    async def test_batch_concurrency_cap_and_errors(self):
+        agent = AgentCore()
+        in_flight = 0
+        peak = 0
+
+        async def fake_arun(query):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if query == "bad":
+                raise RuntimeError("boom")
+            return AgentResponse(query=query, plan=Plan(steps=[]), final_answer=query, verification_status="verified")
+
+        with patch.object(agent, "arun", side_effect=fake_arun):
+            results = await agent.arun_batch([f"q{i}" for i in range(10)] + ["bad"], max_concurrency=3)
+
+        self.assertEqual(peak, 3)
+        self.assertEqual(results[3].response.final_answer, "q3")
+        self.assertEqual(results[-1].error, "boom")
+
+    def speculative_agent(self, chunks, calls):
+        """Agent whose planner streams chunks and whose lookup tool records when it ran."""
+        agent = AgentCore(fast_path_enabled=False, plan_cache_enabled=False, tool_cache_enabled=False,
+                          speculative_execution=True)
+        events = []
+
+        def lookup(account_id):
+            calls.append(account_id)
+            events.append(("tool", account_id))
+            return f"Account {account_id}"
+
+        async def fake_stream(messages, model="gpt-4o"):
+            for chunk in chunks:
+                yield chunk
+                await asyncio.sleep(0.02)
+            events.append(("planned", None))
+
+        agent.tools = agent.executor.tools = {"account_lookup": lookup}
+        patcher = patch("app.agent.core.astream_llm", side_effect=fake_stream)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return agent, events
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_speculative_execution_overlaps_planning(self, mock_llm):
+        mock_llm.side_effect = route_by_prompt("", '{"status": "verified"}', "Done")
+        plan = json.dumps({"steps": [
+            {"step_number": 1, "description": "A", "tool_name": "account_lookup", "tool_args": {"account_id": "ACC-1"}},
+            {"step_number": 2, "description": "B", "tool_name": "account_lookup", "tool_args": {"account_id": "ACC-2"},
+             "depends_on": [1]},
+            {"step_number": 3, "description": "C", "tool_name": "account_lookup", "tool_args": {"account_id": "ACC-3"}},
+        ]})
+        calls = []
+        agent, events = self.speculative_agent([plan[i:i + 40] for i in range(0, len(plan), 40)], calls)
+
+        response = await agent.arun("Check ACC-1, ACC-2 and ACC-3")
+
+        # Independent steps ran while the plan was still streaming, each exactly once
+        planned_at = events.index(("planned", None))
+        self.assertLess(events.index(("tool", "ACC-1")), planned_at)
+        self.assertLess(events.index(("tool", "ACC-3")), planned_at)
+        self.assertGreater(events.index(("tool", "ACC-2")), planned_at)
+        self.assertEqual(sorted(calls), ["ACC-1", "ACC-2", "ACC-3"])
+        self.assertEqual([s.result for s in response.plan.steps], ["Account ACC-1", "Account ACC-2", "Account ACC-3"])
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_speculative_results_discarded_for_invalid_plan(self, mock_llm):
+        mock_llm.side_effect = route_by_prompt("", '{"status": "failed"}', "Sorry")
+        step = {"step_number": 1, "description": "A", "tool_name": "account_lookup", "tool_args": {"account_id": "ACC-1"}}
+        calls = []
+        # The planner stops mid-plan, so the response never parses as a whole
+        agent, _ = self.speculative_agent(['{"steps": [', json.dumps(step), ', {"step_number": 2'], calls)
+
+        response = await agent.arun("Check ACC-1")
+
+        self.assertEqual(calls, ["ACC-1"])
+        self.assertEqual(response.plan.steps, [])
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_session_follow_up_reuses_context_and_results(self, mock_llm):
+        plans = iter([
+            json.dumps({"steps": [{"step_number": 1, "description": "Account", "tool_name": "account_lookup",
+                                   "tool_args": {"account_id": "ACC-456"}}]}),
+            json.dumps({"steps": [
+                {"step_number": 1, "description": "Account", "tool_name": "account_lookup",
+                 "tool_args": {"account_id": "ACC-456"}},
+                {"step_number": 2, "description": "Notes", "tool_name": "crm_notes",
+                 "tool_args": {"client_name": "Bob Jones"}},
+            ]}),
+        ])
+        planner_messages = []
+
+        def fake_llm(messages, model="gpt-4o"):
+            if messages[0]["content"] == PLANNER_SYSTEM_PROMPT:
+                planner_messages.append(messages)
+                return next(plans)
+            if messages[0]["content"] == VERIFIER_SYSTEM_PROMPT:
+                return '{"status": "verified"}'
+            return "ACC-456 belongs to Bob Jones."
+        mock_llm.side_effect = fake_llm
+
+        agent = AgentCore(fast_path_enabled=False, tool_cache_enabled=False)
+        first = await agent.arun("Who owns ACC-456?", session_id="s1")
+        with patch.dict(agent.tools, {"account_lookup": lambda **kwargs: self.fail("should come from session")}):
+            second = await agent.arun("And what about his CRM notes?", session_id="s1")
+
+        self.assertEqual(first.session_id, "s1")
+        # The follow-up planner call sees the earlier turn before the new query
+        history = [m["content"] for m in planner_messages[1][1:]]
+        self.assertEqual(history[0], "Who owns ACC-456?")
+        self.assertIn("Bob Jones", history[1])
+        self.assertEqual(history[-1], "And what about his CRM notes?")
+        self.assertEqual(second.plan.steps[0].result, first.plan.steps[0].result)
+        self.assertIn("Saving for a new car", second.plan.steps[1].result)
+        self.assertEqual(agent.sessions.stats()["tool_hits"], 1)
+
+    def tiered_llm(self, plans, verdicts):
+        """Fake LLM answering the planner from plans[model] and the verifier from verdicts in turn."""
+        calls = []
+        verdicts = iter(verdicts)
+
+        def fake_llm(messages, model="gpt-4o"):
+            system_prompt = messages[0]["content"]
+            calls.append((system_prompt, model))
+            if system_prompt == PLANNER_SYSTEM_PROMPT:
+                return plans[model]
+            if system_prompt == VERIFIER_SYSTEM_PROMPT:
+                return next(verdicts)
+            return "Done"
+        return fake_llm, calls
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_planner_escalates_on_unusable_plan(self, mock_llm):
+        good = json.dumps({"steps": [{"step_number": 1, "description": "Lookup", "tool_name": "account_lookup",
+                                      "tool_args": {"account_id": "ACC-123"}}]})
+        unknown_tool = json.dumps({"steps": [{"step_number": 1, "description": "Lookup", "tool_name": "balance_api"}]})
+        for small_plan, reason in [("Sure! Here is a plan.", "unparseable"), (unknown_tool, "unknown_tool")]:
+            fake_llm, calls = self.tiered_llm({"small": small_plan, "large": good}, ['{"status": "verified"}'])
+            mock_llm.side_effect = fake_llm
+            agent = AgentCore(fast_path_enabled=False, plan_cache_enabled=False,
+                              models={"planner": "small", "verifier": "verifier-model"},
+                              planner_escalation_model="large")
+
+            response = await agent.arun("Balance of ACC-123")
+
+            self.assertEqual(response.plan.planner_model, "large")
+            self.assertIn("Alice Smith", response.plan.steps[0].result)
+            self.assertEqual(agent.tiers.escalations, {reason: 1})
+            self.assertIn((VERIFIER_SYSTEM_PROMPT, "verifier-model"), calls)
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_planner_escalates_once_on_failed_verification(self, mock_llm):
+        plan = json.dumps({"steps": [{"step_number": 1, "description": "Lookup", "tool_name": "account_lookup",
+                                      "tool_args": {"account_id": "ACC-123"}}]})
+        fake_llm, calls = self.tiered_llm({"small": plan, "large": plan},
+                                          ['{"status": "failed"}', '{"status": "failed"}'])
+        mock_llm.side_effect = fake_llm
+        agent = AgentCore(fast_path_enabled=False, plan_cache_enabled=False,
+                          models={"planner": "small"}, planner_escalation_model="large")
+
+        response = await agent.arun("Balance of ACC-123")
+
+        planner_models = [model for prompt, model in calls if prompt == PLANNER_SYSTEM_PROMPT]
+        self.assertEqual(planner_models, ["small", "large"])
+        self.assertEqual(response.verification_status, "failed")
+        self.assertEqual(agent.tiers.escalations, {"verification_failed": 1})
+
+    @patch('app.agent.core.acall_llm_tools', new_callable=AsyncMock)
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_tool_calling_engine_runs_parallel_calls(self, mock_llm, mock_tools):
+        mock_tools.side_effect = [
+            {"content": None, "tool_calls": [
+                {"id": "call_1", "name": "account_lookup", "arguments": '{"account_id": "ACC-123"}'},
+                {"id": "call_2", "name": "kb_search", "arguments": '{"query": "wire transfer limits"}'},
+            ]},
+            {"content": "Alice Smith's balance is $15,000.00.", "tool_calls": []},
+        ]
+        mock_llm.return_value = '{"status": "verified", "reason": "ok"}'
+        agent = AgentCore(engine="tools", fast_path_enabled=False, tool_cache_enabled=False)
+
+        response = await agent.arun("Balance of ACC-123 and the wire limits?")
+
+        self.assertEqual([s.tool_name for s in response.plan.steps], ["account_lookup", "kb_search"])
+        self.assertIn("Alice Smith", response.plan.steps[0].result)
+        self.assertEqual(response.final_answer, "Alice Smith's balance is $15,000.00.")
+        self.assertEqual(response.verification_status, "verified")
+        # Both results went back in the second (and last) round-trip, with the schemas each time
+        self.assertEqual(mock_tools.call_count, 2)
+        messages, schemas = mock_tools.call_args_list[1].args
+        self.assertEqual([m["role"] for m in messages[-3:]], ["assistant", "tool", "tool"])
+        self.assertEqual(messages[-2]["tool_call_id"], "call_1")
+        self.assertIn("Alice Smith", messages[-2]["content"])
+        self.assertEqual([t["function"]["name"] for t in schemas], list(agent.tools))
+        # The verifier only saw the executed plan, never the answer prompt
+        self.assertEqual(mock_llm.call_count, 1)
+        self.assertEqual(mock_llm.call_args.args[0][0]["content"], VERIFIER_SYSTEM_PROMPT)
+
+    @patch('app.agent.core.acall_llm_tools', new_callable=AsyncMock)
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_tool_calling_engine_answers_after_max_rounds(self, mock_llm, mock_tools):
+        mock_tools.return_value = {"content": None, "tool_calls": [
+            {"id": "call_1", "name": "account_lookup", "arguments": "not json"}]}
+        mock_llm.side_effect = route_by_prompt("", '{"status": "failed"}', "Could not find it.")
+        agent = AgentCore(engine="tools", fast_path_enabled=False, tool_cache_enabled=False)
+
+        with patch("app.config.TOOL_ROUNDS", 2):
+            response = await agent.arun("Balance of my account?")
+
+        self.assertEqual(mock_tools.call_count, 2)
+        self.assertEqual([s.step_number for s in response.plan.steps], [1, 2])
+        self.assertTrue(response.plan.steps[0].result.startswith("Error executing tool"))
+        self.assertEqual(response.final_answer, "Could not find it.")
+        self.assertEqual(response.verification_status, "failed")
+
+    @patch('app.agent.core.acall_llm_tools', new_callable=AsyncMock)
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_tool_calling_engine_with_no_rounds(self, mock_llm, mock_tools):
+        mock_llm.side_effect = route_by_prompt("", '{"status": "failed"}', "No tools were called.")
+        agent = AgentCore(engine="tools", fast_path_enabled=False)
+
+        with patch("app.config.TOOL_ROUNDS", 0):
+            response = await agent.arun("Balance of my account?")
+
+        mock_tools.assert_not_called()
+        self.assertEqual(response.plan.steps, [])
+        self.assertEqual(response.final_answer, "No tools were called.")
+        self.assertEqual(response.verification_status, "failed")
+
+    def test_unknown_answer_mode(self):
+        with self.assertRaises(ValueError):
+            AgentCore(answer_mode="parallel")
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            AgentCore(engine="functions")
+
 if __name__ == '__main__':
     unittest.main()
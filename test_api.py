@@ -1,16 +1,63 @@
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
-from app.main import app
-from app.models import AgentResponse, Plan, Step
+from starlette.requests import Request
+import asyncio
+import json
+import time
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.main import agent, app, chat
+from app.agent import deadline
+from app.agent.llm import LLMError
+from app.models import AgentResponse, ChatRequest, Plan, Step
 
 client = TestClient(app)
 
+def connected_request(headers=(), disconnect_after=None):
+    """ASGI request whose client stays connected, or disconnects after disconnect_after seconds."""
+    async def receive():
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+    return Request({"type": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in headers]}, receive)
+
 def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
-@patch("app.main.agent.run")
+def test_stats_endpoint():
+    response = client.get("/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"router", "plan_cache", "tool_cache", "shared_cache", "llm_cache", "context", "sessions", "coalescer", "engine",
+                         "models", "tiers"}
+    assert "fast_path_rate" in data["router"]
+
+@patch("app.agent.core.acall_llm", new_callable=AsyncMock)
+def test_metrics_endpoint(mock_llm):
+    mock_llm.side_effect = lambda messages, model="gpt-4o": (
+        '{"status": "verified"}' if "Verifier" in messages[0]["content"] else "Balance is $5,000."
+    )
+    agent.tool_cache.clear()
+    client.post("/chat", json={"query": "What is the balance for ACC-123?"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert "# TYPE agent_stage_duration_seconds histogram" in text
+    for stage in ("plan", "execute", "verify", "answer"):
+        assert f'agent_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'agent_tool_duration_seconds_count{tool="account_lookup"}' in text
+    assert "# TYPE llm_prompt_tokens_total counter" in text
+
+def test_session_lifecycle():
+    session_id = client.post("/sessions").json()["session_id"]
+
+    assert client.delete(f"/sessions/{session_id}").status_code == 200
+    assert client.delete(f"/sessions/{session_id}").status_code == 404
+
+@patch("app.main.agent.arun", new_callable=AsyncMock)
 def test_chat_endpoint(mock_run):
     # Mock the agent response
     mock_response = AgentResponse(
@@ -30,7 +77,7 @@ def test_chat_endpoint(mock_run):
     assert data["verification_status"] == "verified"
     assert len(data["plan"]["steps"]) == 1
 
-@patch("app.main.agent.run")
+@patch("app.main.agent.arun", new_callable=AsyncMock)
 def test_chat_endpoint_error(mock_run):
     # Mock an exception
     mock_run.side_effect = Exception("Agent failed")
@@ -39,3 +86,137 @@ def test_chat_endpoint_error(mock_run):
     
     assert response.status_code == 500
     assert "Agent failed" in response.json()["detail"]
+
+@patch("app.main.agent.arun", new_callable=AsyncMock)
+def test_chat_endpoint_llm_unavailable(mock_run):
+    mock_run.side_effect = LLMError("Error calling LLM after 6 attempts: rate limited")
+
+    response = client.post("/chat", json={"query": "Busy"})
+
+    assert response.status_code == 503
+    assert "rate limited" in response.json()["detail"]
+
+@patch("app.main.agent.arun", new_callable=AsyncMock)
+def test_chat_request_timeout_header(mock_run):
+    budgets = []
+    async def slow_arun(query, session_id=None):
+        budgets.append(deadline.remaining())
+        await asyncio.sleep(1)
+    mock_run.side_effect = slow_arun
+
+    start = time.perf_counter()
+    response = client.post("/chat", json={"query": "Slow"}, headers={"X-Request-Timeout": "0.1"})
+
+    assert response.status_code == 504
+    assert time.perf_counter() - start < 0.5
+    assert 0 < budgets[0] <= 0.1
+
+    response = client.post("/chat", json={"query": "Slow"}, headers={"X-Request-Timeout": "soon"})
+    assert response.status_code == 400
+
+@patch("app.main.agent.arun", new_callable=AsyncMock)
+def test_chat_cancelled_on_client_disconnect(mock_run):
+    cancelled = []
+    async def slow_arun(query, session_id=None):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(query)
+            raise
+    mock_run.side_effect = slow_arun
+
+    response = asyncio.run(chat(ChatRequest(query="Gone"), connected_request(disconnect_after=0.05)))
+
+    assert response.status_code == 499
+    assert cancelled == ["Gone"]
+
+@patch("app.agent.core.acall_llm", new_callable=AsyncMock)
+def test_chat_requests_overlap(mock_llm):
+    # Each LLM call takes 100ms; a blocking handler would need 3 calls * 5 requests = 1.5s
+    async def slow_llm(messages, model="gpt-4o"):
+        await asyncio.sleep(0.1)
+        return '{"steps": [], "status": "verified"}'
+    mock_llm.side_effect = slow_llm
+
+    async def fire(n):
+        return await asyncio.gather(*(chat(ChatRequest(query=f"Query {i}"), connected_request()) for i in range(n)))
+
+    start = time.perf_counter()
+    responses = asyncio.run(fire(5))
+    elapsed = time.perf_counter() - start
+
+    assert len(responses) == 5
+    assert all(r.verification_status == "verified" for r in responses)
+    assert elapsed < 0.75
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+@patch("app.agent.core.astream_llm")
+@patch("app.agent.core.acall_llm", new_callable=AsyncMock)
+def test_chat_stream_event_order(mock_llm, mock_stream):
+    plan_json = json.dumps({"steps": [
+        {"step_number": 1, "description": "Lookup", "tool_name": "account_lookup", "tool_args": {"account_id": "ACC-789"}},
+        {"step_number": 2, "description": "Notes", "tool_name": "crm_notes", "tool_args": {"client_name": "Charlie"}},
+    ]})
+
+    def fake_llm(messages, model="gpt-4o"):
+        if "Planner" in messages[0]["content"]:
+            return plan_json
+        return '{"status": "verified", "reason": "ok"}'
+    mock_llm.side_effect = fake_llm
+
+    async def fake_stream(messages, model="gpt-4o"):
+        for chunk in ["Charlie ", "has ", "$1M."]:
+            yield chunk
+    mock_stream.side_effect = fake_stream
+
+    response = client.post("/chat/stream", json={"query": "Balance and notes for Charlie, ACC-789"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names == ["plan", "step", "step", "answer", "answer", "answer", "verification", "done"]
+    assert len(events[0][1]["steps"]) == 2
+    assert {events[1][1]["step_number"], events[2][1]["step_number"]} == {1, 2}
+    assert events[6][1] == {"status": "verified"}
+    assert events[7][1]["final_answer"] == "Charlie has $1M."
+
+@patch("app.main.agent.astream")
+def test_chat_stream_error(mock_astream):
+    async def failing(query):
+        raise Exception("Agent failed")
+        yield
+    mock_astream.side_effect = failing
+
+    response = client.post("/chat/stream", json={"query": "Crash me"})
+    assert parse_sse(response.text) == [("error", {"detail": "Agent failed"})]
+
+@patch("app.main.agent.arun", new_callable=AsyncMock)
+def test_chat_batch_endpoint(mock_run):
+    async def fake_arun(query):
+        if query == "Crash me":
+            raise Exception("Agent failed")
+        return AgentResponse(query=query, plan=Plan(steps=[]), final_answer=f"Answer to {query}",
+                             verification_status="verified")
+    mock_run.side_effect = fake_arun
+
+    response = client.post("/chat/batch", json={"requests": [
+        {"query": "Brief Alice"}, {"query": "Crash me"}, {"query": "Brief Bob"},
+    ]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["response"]["final_answer"] == "Answer to Brief Alice"
+    assert results[1]["error"] == "Agent failed"
+    assert results[2]["response"]["final_answer"] == "Answer to Brief Bob"
+
+def test_chat_batch_rejects_session_turns():
+    response = client.post("/chat/batch", json={"requests": [{"query": "Brief Alice", "session_id": "s1"}]})
+    assert response.status_code == 400
+    assert "session_id" in response.json()["detail"]
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from app.agent import llm
+from app.agent.cassette import Cassette, request_key
+from fake_openai_server import FakeOpenAIServer
+
+MESSAGES = [{"role": "system", "content": "You are helpful."}, {"role": "user", "content": "hello"}]
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "cassettes", "llm.jsonl.gz")
+
+    def use(self, mode, server=None):
+        patches = [patch.object(llm, "cassette", Cassette(self.path, mode))]
+        if server is not None:
+            sync_client, async_client = llm.create_clients("test-key", server.base_url)
+            patches += [patch.object(llm, "client", sync_client), patch.object(llm, "async_client", async_client)]
+        else:
+            patches += [patch.object(llm, "client", None), patch.object(llm, "async_client", None)]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_key_depends_on_model_and_messages(self):
+        self.assertEqual(request_key("gpt-4o", MESSAGES), request_key("gpt-4o", [dict(m) for m in MESSAGES]))
+        self.assertNotEqual(request_key("gpt-4o", MESSAGES), request_key("gpt-4o-mini", MESSAGES))
+        self.assertNotEqual(request_key("gpt-4o", MESSAGES), request_key("gpt-4o", MESSAGES[1:]))
+
+    def test_record_then_replay_without_network(self):
+        with FakeOpenAIServer() as server:
+            self.use("record", server)
+            self.assertEqual(llm.call_llm(MESSAGES), "Echo: hello")
+            self.assertEqual(asyncio.run(llm.acall_llm(MESSAGES, model="gpt-4o-mini")), "Echo: hello")
+            self.assertEqual(len(server.requests), 2)
+
+        self.use("replay")
+        self.assertEqual(llm.call_llm(MESSAGES), "Echo: hello")
+        self.assertEqual(asyncio.run(llm.acall_llm(MESSAGES, model="gpt-4o-mini")), "Echo: hello")
+        self.assertEqual(llm.cassette.stats()["hits"], 2)
+
+    def test_replay_miss_raises(self):
+        self.use("replay")
+        with self.assertRaises(llm.LLMError):
+            llm.call_llm(MESSAGES)
+
+    def test_auto_records_misses_once(self):
+        with FakeOpenAIServer() as server:
+            self.use("auto", server)
+            llm.call_llm(MESSAGES)
+            llm.call_llm(MESSAGES)
+            self.assertEqual(len(server.requests), 1)
+
+    def test_stream_is_recorded_and_replayed(self):
+        async def collect():
+            return "".join([chunk async for chunk in llm.astream_llm(MESSAGES)])
+
+        with FakeOpenAIServer() as server:
+            self.use("record", server)
+            self.assertEqual(asyncio.run(collect()), "Echo: hello")
+        self.use("replay")
+        self.assertEqual(asyncio.run(collect()), "Echo: hello")
+
+if __name__ == "__main__":
+    unittest.main()
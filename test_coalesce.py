@@ -0,0 +1,141 @@
+import asyncio
+import unittest
+from unittest.mock import patch, AsyncMock
+
+from app import metrics
+from app.agent import deadline
+from app.agent.coalesce import QueryCoalescer, normalize_query
+from app.agent.core import AgentCore
+from app.models import AgentResponse, Plan
+
+def make_run(calls: list, llm_calls: int = 3, delay: float = 0.05, error: Exception = None):
+    """A stand-in agent run that records each start and reports llm_calls LLM calls."""
+    async def start() -> AgentResponse:
+        calls.append(1)
+        await asyncio.sleep(delay)
+        for _ in range(llm_calls):
+            metrics.record_llm_call()
+        if error is not None:
+            raise error
+        return AgentResponse(query="q", plan=Plan(steps=[]), final_answer="answer", verification_status="verified")
+    return start
+
+class TestQueryCoalescer(unittest.IsolatedAsyncioTestCase):
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Balance of ACC-123?\n"), normalize_query("balance  of acc-123?"))
+
+    async def test_concurrent_duplicates_share_one_run(self):
+        coalescer = QueryCoalescer()
+        calls = []
+        responses = await asyncio.gather(*(
+            coalescer.run(query, make_run(calls))
+            for query in ["Balance of ACC-123?", "balance of  acc-123?", "Balance of ACC-123?"]
+        ))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r.query for r in responses], ["Balance of ACC-123?", "balance of  acc-123?", "Balance of ACC-123?"])
+        self.assertIsNot(responses[0], responses[2])
+        self.assertEqual(coalescer.stats(), {"enabled": True, "in_flight": 0, "runs": 1, "coalesced": 2,
+                                             "llm_calls_saved": 6})
+
+        # Finished runs are not reused
+        await coalescer.run("Balance of ACC-123?", make_run(calls))
+        self.assertEqual(len(calls), 2)
+
+    async def test_errors_reach_every_caller_and_are_not_kept(self):
+        coalescer = QueryCoalescer()
+        calls = []
+        results = await asyncio.gather(*(coalescer.run("q", make_run(calls, error=ValueError("boom")))
+                                         for _ in range(3)), return_exceptions=True)
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(coalescer.llm_calls_saved, 0)
+        response = await coalescer.run("q", make_run(calls))
+        self.assertEqual(response.final_answer, "answer")
+        self.assertEqual(len(calls), 2)
+
+    async def test_one_caller_cancelling_does_not_cancel_the_run(self):
+        coalescer = QueryCoalescer()
+        calls = []
+        first = asyncio.ensure_future(coalescer.run("q", make_run(calls)))
+        second = asyncio.ensure_future(coalescer.run("q", make_run(calls)))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        response = await second
+        self.assertEqual(response.final_answer, "answer")
+        self.assertTrue(first.cancelled())
+        self.assertEqual(len(calls), 1)
+
+    async def test_run_cancelled_once_every_caller_is_gone(self):
+        coalescer = QueryCoalescer()
+        calls = []
+        callers = [asyncio.ensure_future(coalescer.run("q", make_run(calls, delay=10))) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        flight = coalescer._flights["q"]
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        self.assertTrue(flight.task.cancelled())
+        self.assertEqual(coalescer.stats()["in_flight"], 0)
+        # A new caller starts a fresh run rather than attaching to the cancelled one
+        response = await coalescer.run("q", make_run(calls, delay=0))
+        self.assertEqual(response.final_answer, "answer")
+        self.assertEqual(len(calls), 2)
+
+    async def test_each_caller_keeps_its_own_deadline(self):
+        coalescer = QueryCoalescer()
+        budgets = []
+        async def start() -> AgentResponse:
+            await asyncio.sleep(0.2)
+            budgets.append(deadline.remaining())
+            return AgentResponse(query="q", plan=Plan(steps=[]), final_answer="answer", verification_status="verified")
+
+        async def caller(seconds):
+            with deadline.scope(seconds):
+                return await coalescer.run("q", start)
+
+        results = await asyncio.gather(caller(0.05), caller(None), return_exceptions=True)
+
+        self.assertIsInstance(results[0], deadline.DeadlineExceeded)
+        self.assertEqual(results[1].final_answer, "answer")
+        # The caller without a deadline lifted it for the shared run
+        self.assertEqual(budgets, [None])
+
+        results = await asyncio.gather(caller(0.05), caller(5), return_exceptions=True)
+        self.assertIsInstance(results[0], deadline.DeadlineExceeded)
+        self.assertEqual(results[1].final_answer, "answer")
+        self.assertGreater(budgets[1], 4)
+
+    async def test_disabled(self):
+        coalescer = QueryCoalescer(enabled=False)
+        calls = []
+        await asyncio.gather(*(coalescer.run("q", make_run(calls)) for _ in range(3)))
+        self.assertEqual(len(calls), 3)
+
+    @patch('app.agent.core.acall_llm', new_callable=AsyncMock)
+    async def test_agent_coalesces_concurrent_queries(self, mock_llm):
+        async def slow_llm(messages, model="gpt-4o"):
+            await asyncio.sleep(0.05)
+            metrics.record_llm_call()
+            return '{"status": "verified"}' if "Verifier" in messages[0]["content"] else "Balance is $15,000."
+        mock_llm.side_effect = slow_llm
+        agent = AgentCore(plan_cache_enabled=False)
+
+        responses = await asyncio.gather(*(agent.arun("What is the balance of ACC-123?") for _ in range(5)))
+        await asyncio.sleep(0)
+
+        self.assertEqual(mock_llm.call_count, 2)  # fast-path plan, so one verify and one answer for all five
+        self.assertTrue(all(r.final_answer == "Balance is $15,000." for r in responses))
+        self.assertEqual(agent.coalescer.stats()["llm_calls_saved"], 8)
+
+        # Session turns depend on history, so they are never coalesced
+        session_id = agent.sessions.create()
+        await asyncio.gather(*(agent.arun("What is the balance of ACC-123?", session_id) for _ in range(2)))
+        self.assertEqual(mock_llm.call_count, 6)
+
+if __name__ == '__main__':
+    unittest.main()
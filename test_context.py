@@ -0,0 +1,55 @@
+import json
+import unittest
+from app.agent.context import ContextBudget, allocate, count_tokens, shrink_result
+from app.models import Plan, Step
+
+def kb_result(count: int) -> str:
+    return json.dumps([
+        {"id": f"KB-{i}", "title": f"Article {i}", "content": "policy text " * 200, "score": 10 - i,
+         "snippet": "policy text policy text"}
+        for i in range(count)
+    ], indent=2)
+
+class TestContextBudget(unittest.TestCase):
+    def test_allocate_gives_leftover_to_large_results(self):
+        self.assertEqual(allocate([100, 1000, 5000], 2100), [100, 1000, 1000])
+        self.assertEqual(allocate([10, 20], 1000), [10, 20])
+
+    def test_shrink_kb_results_keeps_top_ranked_snippets(self):
+        shrunk = json.loads(shrink_result(kb_result(20), 150))
+        self.assertLess(len(shrunk), 20)
+        self.assertEqual(shrunk[0]["id"], "KB-0")
+        self.assertNotIn("content", shrunk[0])
+
+    def test_shrink_plain_text(self):
+        shrunk = shrink_result("note " * 1000, 50)
+        self.assertLessEqual(count_tokens(shrunk), 50)
+        self.assertTrue(shrunk.endswith("[truncated]"))
+
+    def test_serialize_fits_budget_and_records_savings(self):
+        plan = Plan(steps=[
+            Step(step_number=1, description="Search KB", tool_name="kb_search",
+                 tool_args={"query": "policy"}, result=kb_result(30)),
+            Step(step_number=2, description="Lookup", tool_name="account_lookup",
+                 tool_args={"account_id": "ACC-123"}, result='{"id": "ACC-123", "balance": 15000.0}'),
+        ])
+        budget = ContextBudget({"verifier": 500})
+        text = budget.serialize(plan, "verifier")
+
+        self.assertLessEqual(count_tokens(text), 500)
+        steps = json.loads(text)
+        # Small results are left intact, embedded as JSON rather than an escaped string
+        self.assertEqual(steps[1]["result"], {"id": "ACC-123", "balance": 15000.0})
+        stats = budget.stats()["verifier"]
+        self.assertEqual(stats["truncated_results"], 1)
+        self.assertGreater(stats["shrink_ratio"], 0.9)
+
+    def test_small_plans_are_only_compacted(self):
+        plan = Plan(steps=[Step(step_number=1, description="Lookup", tool_name="account_lookup",
+                                tool_args={"account_id": "ACC-123"}, result="ok")])
+        text = ContextBudget({"answer": 1000}).serialize(plan, "answer")
+        self.assertEqual(json.loads(text), [{"step_number": 1, "description": "Lookup", "tool_name": "account_lookup",
+                                             "tool_args": {"account_id": "ACC-123"}, "result": "ok"}])
+
+if __name__ == '__main__':
+    unittest.main()
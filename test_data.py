@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from app.agent import tools
+from app.agent.executor import StepExecutor
+from app.data.base import set_store
+from app.data.memory import InMemoryStore
+from app.data.sqlite import SQLiteStore
+from app.data import memory
+from app.models import Plan, Step
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SQLiteStore(os.path.join(self.tmp.name, "test.db"), pool_size=2)
+        self.store.insert_accounts(memory.ACCOUNTS.values())
+        self.store.insert_kb_articles(memory.KB_ARTICLES)
+        self.store.insert_notes(memory.CRM_NOTES)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_matches_in_memory_store(self):
+        reference = InMemoryStore()
+        ids = ["ACC-789", "ACC-123", "ACC-999"]
+        self.assertEqual(self.store.get_accounts(ids), reference.get_accounts(ids))
+        self.assertEqual(self.store.get_account("ACC-456"), reference.get_account("ACC-456"))
+        self.assertEqual(self.store.get_notes(["Bob Jones", "Nobody"]), reference.get_notes(["Bob Jones", "Nobody"]))
+        self.assertEqual(sorted(self.store.client_names()), sorted(reference.client_names()))
+        self.assertEqual(self.store.kb_articles(), reference.kb_articles())
+
+    def test_large_batch(self):
+        self.store.insert_accounts(
+            {"id": f"ACC-{i}", "owner": "Test", "balance": float(i), "type": "Savings"} for i in range(1200)
+        )
+        accounts = self.store.get_accounts([f"ACC-{i}" for i in range(1200)])
+        self.assertEqual(len(accounts), 1200)
+
+class TestBatchedTools(unittest.TestCase):
+    def setUp(self):
+        self.store = CountingStore()
+        set_store(self.store)
+
+    def tearDown(self):
+        set_store(None)
+
+    def test_account_lookup_many(self):
+        data = json.loads(tools.account_lookup_many(["ACC-123", "ACC-999"]))
+        self.assertEqual(data["ACC-123"]["owner"], "Alice Smith")
+        self.assertIn("not found", data["ACC-999"])
+        self.assertEqual(self.store.round_trips, 1)
+
+    def test_executor_batches_independent_lookups(self):
+        executor = StepExecutor(tools.AVAILABLE_TOOLS, batch_tools=tools.BATCH_TOOLS)
+        plan = Plan(steps=[
+            Step(step_number=i, description="lookup", tool_name="account_lookup", tool_args={"account_id": aid})
+            for i, aid in enumerate(["ACC-123", "ACC-456", "ACC-999"], start=1)
+        ])
+        asyncio.run(executor.run(plan))
+
+        self.assertEqual(self.store.round_trips, 1)
+        self.assertIn("Alice Smith", plan.steps[0].result)
+        self.assertIn("Bob Jones", plan.steps[1].result)
+        self.assertEqual(plan.steps[2].result, tools.account_lookup("ACC-999"))
+
+    def test_malformed_step_does_not_fail_its_batch(self):
+        executor = StepExecutor(tools.AVAILABLE_TOOLS, batch_tools=tools.BATCH_TOOLS)
+        plan = Plan(steps=[
+            Step(step_number=1, description="lookup", tool_name="account_lookup", tool_args={"account_id": "ACC-123"}),
+            Step(step_number=2, description="lookup", tool_name="account_lookup", tool_args={"acct": "ACC-456"}),
+            Step(step_number=3, description="lookup", tool_name="account_lookup", tool_args={"account_id": "ACC-456"}),
+        ])
+        asyncio.run(executor.run(plan))
+
+        self.assertIn("Alice Smith", plan.steps[0].result)
+        self.assertTrue(plan.steps[1].result.startswith("Error executing tool"))
+        self.assertIn("Bob Jones", plan.steps[2].result)
+        self.assertEqual(self.store.round_trips, 1)
+
+class CountingStore(InMemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.round_trips = 0
+
+    def get_accounts(self, account_ids):
+        self.round_trips += 1
+        return super().get_accounts(account_ids)
+
+if __name__ == '__main__':
+    unittest.main()
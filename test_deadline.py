@@ -0,0 +1,30 @@
+import time
+import unittest
+from app.agent import deadline
+
+class TestDeadline(unittest.TestCase):
+    def test_no_deadline(self):
+        self.assertIsNone(deadline.remaining())
+        self.assertEqual(deadline.timeout(30.0), 30.0)
+        deadline.check("anything")
+
+    def test_nested_scopes_only_shorten(self):
+        with deadline.scope(10):
+            with deadline.scope(60):
+                self.assertLessEqual(deadline.remaining(), 10)
+            with deadline.scope(1):
+                self.assertLessEqual(deadline.remaining(), 1)
+                self.assertLessEqual(deadline.timeout(30.0), 1)
+            with deadline.scope(None), deadline.scope(0):
+                self.assertGreater(deadline.remaining(), 1)
+        self.assertIsNone(deadline.remaining())
+
+    def test_check_after_deadline(self):
+        with deadline.scope(0.01):
+            time.sleep(0.02)
+            self.assertEqual(deadline.timeout(30.0), 0.0)
+            with self.assertRaises(deadline.DeadlineExceeded):
+                deadline.check("planning")
+
+if __name__ == '__main__':
+    unittest.main()
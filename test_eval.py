@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+from app.agent.core import AgentCore
+from eval.run_eval import ResultStore, evaluate_cases, llm_spend
+
+CASES = [
+    {"id": f"case_{i}", "query": f"What is the balance of ACC-{i}?",
+     "expected_tools": ["account_lookup"], "expected_facts": ["balance"]}
+    for i in range(1, 6)
+]
+
+def fake_judge(messages, model="gpt-4o"):
+    """Scores every case named in the batched judge prompt."""
+    prompt = messages[0]["content"]
+    ids = [line.split()[-1] for line in prompt.splitlines() if line.strip().startswith("### Case ")]
+    return json.dumps({"cases": [{"id": case_id, "results": [], "score": 1.0} for case_id in ids]})
+
+class TestRunEval(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "results.json")
+        self.agent = AgentCore(plan_cache_enabled=False)
+        llm = patch("app.agent.core.acall_llm", new_callable=AsyncMock,
+                    side_effect=lambda messages, model="gpt-4o": (
+                        '{"status": "verified"}' if "Verifier" in messages[0]["content"] else "The balance is $1."))
+        llm.start()
+        self.addCleanup(llm.stop)
+
+    def evaluate(self, cases, store, judge_batch=2):
+        with patch("eval.run_eval.acall_llm", new_callable=AsyncMock, side_effect=fake_judge) as judge:
+            asyncio.run(evaluate_cases(self.agent, cases, store, concurrency=3, judge_batch=judge_batch))
+        return judge
+
+    def test_batches_judging_and_writes_results_in_dataset_order(self):
+        store = ResultStore(self.path, [c["id"] for c in CASES])
+        judge = self.evaluate(CASES, store)
+
+        self.assertEqual(judge.call_count, 3)
+        with open(self.path) as f:
+            results = json.load(f)
+        self.assertEqual([r["id"] for r in results], [c["id"] for c in CASES])
+        self.assertTrue(all(r["tool_match"] and r["fact_score"] == 1.0 for r in results))
+
+    def test_resume_skips_completed_cases(self):
+        store = ResultStore(self.path, [c["id"] for c in CASES])
+        self.evaluate(CASES[:3], store)
+        store.record({"id": "case_3", "error": "crashed"})
+
+        resumed = ResultStore(self.path, [c["id"] for c in CASES])
+        pending = [c for c in CASES if not resumed.completed(c["id"])]
+        self.assertEqual([c["id"] for c in pending], ["case_3", "case_4", "case_5"])
+        self.evaluate(pending, resumed)
+        self.assertTrue(all(resumed.completed(c["id"]) for c in CASES))
+
+    def test_unjudged_cases_fall_back_to_single_calls(self):
+        store = ResultStore(self.path, [c["id"] for c in CASES])
+        replies = iter(['{"cases": [{"id": "case_1", "score": 1.0}]}',
+                        '{"cases": [{"id": "case_2", "score": 0.5}]}'])
+        with patch("eval.run_eval.acall_llm", new_callable=AsyncMock,
+                   side_effect=lambda messages, model="gpt-4o": next(replies)):
+            asyncio.run(evaluate_cases(self.agent, CASES[:2], store, concurrency=1, judge_batch=2))
+        self.assertEqual(store.results["case_1"]["fact_score"], 1.0)
+        self.assertEqual(store.results["case_2"]["fact_score"], 0.5)
+
+    def test_llm_spend_by_stage(self):
+        before = {"prompt": {("plan", "gpt-4o"): 1000.0}, "completion": {}}
+        after = {"prompt": {("plan", "gpt-4o"): 401000.0, ("judge", "gpt-4o"): 200000.0},
+                 "completion": {("plan", "gpt-4o"): 100000.0}}
+        spend = llm_spend(before, after, (1.0, 1.0))
+        self.assertEqual(spend["plan"]["prompt_tokens"], 400000)
+        self.assertAlmostEqual(spend["plan"]["cost_usd"], 1.0 + 1.0)
+        self.assertAlmostEqual(spend["judge"]["cost_usd"], 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
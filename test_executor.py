@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+import unittest
+from app.agent import deadline
+from app.agent.executor import StepExecutor, build_dependency_graph, topological_order
+from app.models import Plan, Step
+
+def slow_tool(value: str, delay: float = 0.2) -> str:
+    time.sleep(delay)
+    return f"done {value}"
+
+class TestStepExecutor(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def record(value: str) -> str:
+            self.calls.append(value)
+            return value
+
+        self.executor = StepExecutor(
+            {"slow": slow_tool, "record": record},
+            max_workers=4,
+            tool_timeouts={"slow": 1.0},
+        )
+
+    def test_independent_steps_run_concurrently(self):
+        plan = Plan(steps=[
+            Step(step_number=i, description="slow", tool_name="slow", tool_args={"value": str(i)})
+            for i in range(1, 4)
+        ])
+        start = time.perf_counter()
+        asyncio.run(self.executor.run(plan))
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual([s.result for s in plan.steps], ["done 1", "done 2", "done 3"])
+
+    def test_dependencies_run_in_order(self):
+        plan = Plan(steps=[
+            Step(step_number=2, description="second", tool_name="record", tool_args={"value": "b"}, depends_on=[1]),
+            Step(step_number=1, description="first", tool_name="slow", tool_args={"value": "a", "delay": 0.1}),
+            Step(step_number=3, description="third", tool_name="record", tool_args={"value": "c"}, depends_on=[2]),
+        ])
+        asyncio.run(self.executor.run(plan))
+
+        self.assertEqual(self.calls, ["b", "c"])
+        # Results are recorded in step_number order
+        self.assertEqual([s.step_number for s in plan.steps], [1, 2, 3])
+        self.assertEqual(plan.steps[0].result, "done a")
+
+    def test_tool_timeout(self):
+        plan = Plan(steps=[
+            Step(step_number=1, description="too slow", tool_name="slow", tool_args={"value": "x", "delay": 1.5}),
+        ])
+        asyncio.run(self.executor.run(plan))
+        self.assertIn("timed out", plan.steps[0].result)
+
+    def test_tool_timeout_capped_by_deadline(self):
+        plan = Plan(steps=[
+            Step(step_number=1, description="slow", tool_name="slow", tool_args={"value": "x", "delay": 0.5}),
+        ])
+        start = time.perf_counter()
+        with deadline.scope(0.1):
+            asyncio.run(self.executor.run(plan))
+
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertIn("timed out", plan.steps[0].result)
+
+    def test_hung_tools_do_not_block_later_steps(self):
+        release = threading.Event()
+        executor = StepExecutor(
+            {"hang": lambda: release.wait(5) and "late", "record": lambda value: value},
+            max_workers=1,
+            default_timeout=0.1,
+        )
+        try:
+            hung = Plan(steps=[Step(step_number=1, description="hangs", tool_name="hang")])
+            asyncio.run(executor.run(hung))
+            self.assertIn("timed out", hung.steps[0].result)
+
+            # The hung call still holds the only worker of the pool it ran on
+            plan = Plan(steps=[Step(step_number=1, description="next", tool_name="record",
+                                    tool_args={"value": "ok"})])
+            asyncio.run(executor.run(plan))
+            self.assertEqual(plan.steps[0].result, "ok")
+        finally:
+            release.set()
+
+    def test_circular_dependency(self):
+        plan = Plan(steps=[
+            Step(step_number=1, description="a", tool_name="record", tool_args={"value": "a"}, depends_on=[2]),
+            Step(step_number=2, description="b", tool_name="record", tool_args={"value": "b"}, depends_on=[1]),
+            Step(step_number=3, description="c", tool_name="record", tool_args={"value": "c"}),
+        ])
+        asyncio.run(self.executor.run(plan))
+        self.assertIn("circular dependency", plan.steps[0].result)
+        self.assertIn("circular dependency", plan.steps[1].result)
+        self.assertEqual(plan.steps[2].result, "c")
+
+    def test_dependency_graph_ignores_unknown_steps(self):
+        steps = [
+            Step(step_number=1, description="a", depends_on=[1, 7]),
+            Step(step_number=2, description="b", depends_on=[1]),
+        ]
+        graph = build_dependency_graph(steps)
+        self.assertEqual(graph, {1: set(), 2: {1}})
+        self.assertEqual(topological_order(graph), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from app.agent.kb_index import KBIndex, analyze, make_snippet, stem
+
+ARTICLES = [
+    {"id": "KB-1", "title": "Wire Transfer Limits", "content": "Standard wire transfer limit is $50,000 per day."},
+    {"id": "KB-2", "title": "International Payments", "content": "A wire to another country takes two days. Fees apply."},
+    {"id": "KB-3", "title": "Account Opening", "content": "Opening an account requires a valid ID."},
+]
+
+class TestKBIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = KBIndex()
+        self.index.add_articles(ARTICLES)
+
+    def test_stemming(self):
+        self.assertEqual(stem("transfers"), stem("transfer"))
+        self.assertEqual(stem("opening"), stem("open"))
+        self.assertEqual(stem("policies"), stem("policy"))
+        self.assertEqual(analyze("What are the wire transfers?"), ["wire", "transfer"])
+
+    def test_ranking(self):
+        results = self.index.search("wire transfers")
+        self.assertEqual([r["id"] for r in results], ["KB-1", "KB-2"])
+        self.assertGreater(results[0]["score"], results[1]["score"])
+
+    def test_top_k(self):
+        self.assertEqual(len(self.index.search("wire", top_k=1)), 1)
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search("mortgage"), [])
+        self.assertEqual(self.index.search("the"), [])
+
+    def test_snippet(self):
+        content = "x " * 200 + "wire transfer details " + "y " * 200
+        snippet = make_snippet(content, ["wire"], width=60)
+        self.assertIn("wire transfer", snippet)
+        self.assertTrue(snippet.startswith("...") and snippet.endswith("..."))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "kb_index.json.gz")
+            self.index.save(path)
+            loaded = KBIndex.load(path)
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(loaded.search("account opening"), self.index.search("account opening"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import time
+import unittest
+from unittest.mock import patch
+from app import config, metrics
+from app.agent import deadline, llm
+from app.agent.llm_cache import LLMResponseCache
+from app.agent.rate_limit import ConcurrencyGovernor, RateLimiter, TokenBucket
+from app.agent.tool_schemas import tool_schemas
+from app.agent.tools import AVAILABLE_TOOLS
+from fake_openai_server import FakeOpenAIServer, agent_responder, agent_tool_responder, make_latency
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+class TestLLMClient(unittest.TestCase):
+    def serve(self, **kwargs) -> FakeOpenAIServer:
+        server = FakeOpenAIServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        sync_client, async_client = llm.create_clients("test-key", server.base_url)
+        for name, value in [("client", sync_client), ("async_client", async_client),
+                            ("rate_limiter", RateLimiter()), ("governor", ConcurrencyGovernor(32)),
+                            ("response_cache", LLMResponseCache(config.LLM_CACHE_STAGES, enabled=False))]:
+            patcher = patch.object(llm, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return server
+
+    def test_retries_rate_limit_honoring_retry_after(self):
+        server = self.serve(fail_first=2, retry_after=0.1)
+        start = time.perf_counter()
+        self.assertEqual(llm.call_llm(MESSAGES), "Echo: hello")
+        self.assertEqual(len(server.requests), 3)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+
+    def test_async_retries_server_errors(self):
+        server = self.serve(fail_first=1, fail_status=503, retry_after=None)
+        with patch.object(llm.config, "LLM_BACKOFF_BASE", 0.01):
+            self.assertEqual(asyncio.run(llm.acall_llm(MESSAGES)), "Echo: hello")
+        self.assertEqual(len(server.requests), 2)
+
+    def test_gives_up_after_max_retries(self):
+        server = self.serve(fail_first=10, retry_after=0.01)
+        with patch.object(llm.config, "LLM_MAX_RETRIES", 2):
+            with self.assertRaises(llm.LLMError):
+                llm.call_llm(MESSAGES)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_failed_calls_refund_reserved_tokens(self):
+        server = self.serve(fail_first=10, retry_after=0.01)
+        limiter = RateLimiter(tokens_per_minute=6000)
+        with patch.object(llm, "rate_limiter", limiter), patch.object(llm.config, "LLM_MAX_RETRIES", 2):
+            with self.assertRaises(llm.LLMError):
+                llm.call_llm(MESSAGES)
+            with deadline.scope(0.01):
+                time.sleep(0.02)
+                with self.assertRaises(deadline.DeadlineExceeded):
+                    asyncio.run(llm.acall_llm(MESSAGES))
+        self.assertEqual(len(server.requests), 3)
+        # Nothing was used, so the whole minute's budget is still there
+        self.assertEqual(limiter.acquire(6000), 0.0)
+
+    def test_deadline_caps_call_timeout(self):
+        server = self.serve(latency=lambda: 1.0)
+        start = time.perf_counter()
+        with deadline.scope(0.2):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                asyncio.run(llm.acall_llm(MESSAGES))
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_no_retry_past_deadline(self):
+        server = self.serve(fail_first=10, retry_after=1.0)
+        start = time.perf_counter()
+        with deadline.scope(0.5):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                llm.call_llm(MESSAGES)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_response_cache_skips_repeat_calls(self):
+        server = self.serve()
+        llm.response_cache.enabled = True
+        with metrics.track_stage("answer"):
+            self.assertEqual(llm.call_llm(MESSAGES), "Echo: hello")
+            self.assertEqual(asyncio.run(llm.acall_llm(MESSAGES)), "Echo: hello")
+            self.assertEqual(asyncio.run(llm.acall_llm(MESSAGES, model="gpt-4o-mini")), "Echo: hello")
+        # Calls outside a cached stage always go to the API
+        llm.call_llm(MESSAGES)
+
+        self.assertEqual(len(server.requests), 3)
+        stats = llm.response_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertGreater(stats["tokens_saved"], 0)
+
+    def test_does_not_retry_bad_requests(self):
+        server = self.serve(fail_first=1, fail_status=400)
+        with self.assertRaises(llm.LLMError):
+            asyncio.run(llm.acall_llm(MESSAGES))
+        self.assertEqual(len(server.requests), 1)
+
+    def test_stream(self):
+        self.serve(fail_first=1, retry_after=0.01)
+
+        async def collect():
+            return [chunk async for chunk in llm.astream_llm([{"role": "user", "content": "a b"}])]
+
+        self.assertEqual("".join(asyncio.run(collect())), "Echo: a b")
+
+    def test_records_token_usage_per_stage(self):
+        self.serve()
+        prompt = metrics.LLM_PROMPT_TOKENS.value(stage="usage-test", model="gpt-4o")
+        completion = metrics.LLM_COMPLETION_TOKENS.value(stage="usage-test", model="gpt-4o")
+
+        async def stream():
+            with metrics.track_stage("usage-test"):
+                return [chunk async for chunk in llm.astream_llm([{"role": "user", "content": "a" * 40}])]
+
+        with metrics.track_stage("usage-test"):
+            llm.call_llm([{"role": "user", "content": "a" * 40}])
+        asyncio.run(stream())
+
+        self.assertEqual(metrics.LLM_PROMPT_TOKENS.value(stage="usage-test", model="gpt-4o"), prompt + 20)
+        self.assertGreater(metrics.LLM_COMPLETION_TOKENS.value(stage="usage-test", model="gpt-4o"), completion)
+        self.assertEqual(metrics.LLM_DURATION.count(stage="usage-test", model="gpt-4o"), 2)
+
+    def test_fake_server_canned_agent_outputs(self):
+        self.serve(responder=agent_responder, latency=make_latency("uniform", 5, 0.5))
+        plan = llm.call_llm([{"role": "system", "content": "You are the Planner."},
+                             {"role": "user", "content": "Prepare a briefing for Alice: CRM notes and account ACC-123."}])
+        steps = json.loads(plan)["steps"]
+        self.assertEqual([s["tool_name"] for s in steps], ["account_lookup", "crm_notes"])
+        self.assertEqual(steps[1]["tool_args"], {"client_name": "Alice"})
+        verdict = llm.call_llm([{"role": "system", "content": "You are the Verifier."}, {"role": "user", "content": "q"}])
+        self.assertEqual(json.loads(verdict)["status"], "verified")
+
+    def test_tool_calls_round_trip(self):
+        server = self.serve(tool_responder=agent_tool_responder)
+        schemas = tool_schemas(AVAILABLE_TOOLS)
+        messages = [{"role": "user", "content": "Prepare a briefing for Alice: CRM notes and account ACC-123."}]
+        reply = llm.call_llm_tools(messages, schemas)
+        self.assertEqual([c["name"] for c in reply["tool_calls"]], ["account_lookup", "crm_notes"])
+        self.assertEqual(json.loads(reply["tool_calls"][1]["arguments"]), {"client_name": "Alice"})
+        self.assertEqual(server.requests[0]["tools"], schemas)
+
+        messages += [
+            {"role": "assistant", "content": None, "tool_calls": [
+                {"id": c["id"], "type": "function", "function": {"name": c["name"], "arguments": c["arguments"]}}
+                for c in reply["tool_calls"]]},
+            *({"role": "tool", "tool_call_id": c["id"], "content": "ok"} for c in reply["tool_calls"]),
+        ]
+        final = asyncio.run(llm.acall_llm_tools(messages, schemas))
+        self.assertEqual(final["tool_calls"], [])
+        self.assertIn("CRM notes", final["content"])
+
+    def test_governor_caps_in_flight_calls(self):
+        server = self.serve(latency=lambda: 0.05)
+
+        async def burst():
+            with patch.object(llm, "governor", ConcurrencyGovernor(2)):
+                await asyncio.gather(*(llm.acall_llm(MESSAGES) for _ in range(6)))
+
+        asyncio.run(burst())
+        self.assertEqual(len(server.requests), 6)
+        self.assertLessEqual(server.peak_in_flight, 2)
+
+class TestBackoff(unittest.TestCase):
+    def test_exponential_backoff_with_jitter(self):
+        with patch.object(llm.config, "LLM_BACKOFF_BASE", 1.0), patch.object(llm.config, "LLM_BACKOFF_MAX", 5.0):
+            delays = [llm.backoff_delay(3) for _ in range(200)]
+        self.assertTrue(all(0 <= d <= 5.0 for d in delays))
+        self.assertGreater(len(set(delays)), 100)
+
+    def test_retry_after_is_honored(self):
+        self.assertGreaterEqual(llm.backoff_delay(0, retry_after=2.0), 2.0)
+        self.assertLessEqual(llm.backoff_delay(0, retry_after=2.0), 2.2)
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate_per_minute=600, capacity=10)
+        self.assertEqual(bucket.reserve(10), 0.0)
+        # Ten tokens per second, so one more token costs about 0.1s
+        self.assertAlmostEqual(bucket.reserve(1), 0.1, delta=0.02)
+
+    def test_rate_limiter_settles_actual_usage(self):
+        limiter = RateLimiter(tokens_per_minute=6000)
+        limiter.acquire(6000)
+        limiter.settle(estimated_tokens=6000, actual_tokens=1000)
+        self.assertEqual(limiter.acquire(4000), 0.0)
+
+    def test_rate_limiter_refund(self):
+        limiter = RateLimiter(tokens_per_minute=6000)
+        limiter.acquire(6000)
+        limiter.refund(6000)
+        self.assertEqual(limiter.acquire(6000), 0.0)
+
+    def test_disabled_limits(self):
+        limiter = RateLimiter()
+        self.assertEqual(limiter.acquire(10 ** 9), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
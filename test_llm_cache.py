@@ -0,0 +1,106 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from app.agent.llm_cache import LLMResponseCache, make_key
+from app.cache.sqlite import SQLiteCacheBackend
+
+MESSAGES = [{"role": "system", "content": "Verifier"}, {"role": "user", "content": "Balance of ACC-123?"}]
+
+class TestLLMResponseCache(unittest.TestCase):
+    def test_key_covers_model_messages_and_tools(self):
+        key = make_key("gpt-4o", MESSAGES)
+        self.assertEqual(key, make_key("gpt-4o", [dict(m) for m in MESSAGES]))
+        self.assertNotEqual(key, make_key("gpt-4o-mini", MESSAGES))
+        self.assertNotEqual(key, make_key("gpt-4o", MESSAGES[:1]))
+        self.assertNotEqual(key, make_key("gpt-4o", MESSAGES, tools=[{"type": "function"}]))
+
+    def test_hits_count_tokens_saved_per_stage(self):
+        cache = LLMResponseCache(["verify", "answer"])
+        self.assertIsNone(cache.get("verify", "gpt-4o", MESSAGES))
+        cache.put("verify", "gpt-4o", MESSAGES, '{"status": "verified"}', tokens=120)
+        self.assertEqual(cache.get("verify", "gpt-4o", MESSAGES), '{"status": "verified"}')
+        self.assertEqual(cache.get("verify", "gpt-4o", MESSAGES), '{"status": "verified"}')
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["tokens_saved"]), (2, 1, 240))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+        self.assertEqual(stats["per_stage"], {"verify": {"hits": 2, "misses": 1, "tokens_saved": 240}})
+
+    def test_only_listed_stages_are_cached(self):
+        cache = LLMResponseCache(["answer"])
+        cache.put("plan", "gpt-4o", MESSAGES, "plan")
+        cache.put("unknown", "gpt-4o", MESSAGES, "other")
+        self.assertIsNone(cache.get("plan", "gpt-4o", MESSAGES))
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["misses"], 0)
+
+        cache.enabled = False
+        cache.put("answer", "gpt-4o", MESSAGES, "answer")
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_ttl_and_lru_bounds(self):
+        cache = LLMResponseCache(["answer"], ttl=0.05, max_entries=2)
+        for i in range(3):
+            cache.put("answer", "gpt-4o", [{"role": "user", "content": str(i)}], f"answer {i}")
+        self.assertIsNone(cache.get("answer", "gpt-4o", [{"role": "user", "content": "0"}]))
+        self.assertEqual(cache.get("answer", "gpt-4o", [{"role": "user", "content": "2"}]), "answer 2")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("answer", "gpt-4o", [{"role": "user", "content": "2"}]))
+
+    def test_disk_tier_survives_a_new_cache(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        disk = SQLiteCacheBackend(os.path.join(tmp.name, "cache.db"))
+        self.addCleanup(disk.close)
+        LLMResponseCache(["answer"], disk=disk).put("answer", "gpt-4o", MESSAGES, "Balance is $15,000.", tokens=80)
+
+        # As after a restart, or in another worker
+        cache = LLMResponseCache(["answer"], disk=disk)
+        self.assertEqual(cache.get("answer", "gpt-4o", MESSAGES), "Balance is $15,000.")
+        self.assertEqual(cache.get("answer", "gpt-4o", MESSAGES), "Balance is $15,000.")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["disk_hits"], stats["tokens_saved"]), (2, 1, 160))
+
+        cache.clear()
+        self.assertIsNone(disk.get("llm", make_key("gpt-4o", MESSAGES)))
+
+    def test_malformed_disk_rows_are_misses(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        disk = SQLiteCacheBackend(os.path.join(tmp.name, "cache.db"))
+        self.addCleanup(disk.close)
+        cache = LLMResponseCache(["answer"], disk=disk)
+        for i, row in enumerate(["not json", '{"tokens": 5}', '["content"]', '{"content": 7, "tokens": 5}']):
+            messages = [{"role": "user", "content": str(i)}]
+            disk.set("llm", make_key("gpt-4o", messages), row, ttl=60)
+            self.assertIsNone(cache.get("answer", "gpt-4o", messages))
+        self.assertEqual((cache.stats()["misses"], cache.stats()["disk_hits"]), (4, 0))
+
+    def test_async_disk_tier_runs_off_the_event_loop(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        disk = SQLiteCacheBackend(os.path.join(tmp.name, "cache.db"))
+        self.addCleanup(disk.close)
+        threads = []
+        for name in ("get_entry", "set"):
+            method = getattr(disk, name)
+            def recorded(*args, method=method):
+                threads.append(threading.get_ident())
+                return method(*args)
+            setattr(disk, name, recorded)
+
+        async def roundtrip():
+            await LLMResponseCache(["answer"], disk=disk).aput("answer", "gpt-4o", MESSAGES, "cached", tokens=10)
+            return threading.get_ident(), await LLMResponseCache(["answer"], disk=disk).aget("answer", "gpt-4o", MESSAGES)
+
+        loop_thread, content = asyncio.run(roundtrip())
+        self.assertEqual(content, "cached")
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(loop_thread, threads)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import unittest
+from app import metrics
+from app.metrics import Counter, Histogram, Registry
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_renders_per_label_set(self):
+        registry = Registry()
+        tokens = registry.counter("tokens_total", "Tokens.", ["stage", "model"])
+        tokens.inc(10, stage="plan", model="gpt-4o")
+        tokens.inc(5, stage="plan", model="gpt-4o")
+        tokens.inc(2, stage="answer", model="gpt-4o")
+
+        text = registry.render()
+        self.assertIn("# TYPE tokens_total counter", text)
+        self.assertIn('tokens_total{stage="plan",model="gpt-4o"} 15', text)
+        self.assertIn('tokens_total{stage="answer",model="gpt-4o"} 2', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram("latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, stage="plan")
+
+        lines = latency.render()
+        self.assertIn('latency_seconds_bucket{stage="plan",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{stage="plan",le="1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{stage="plan",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{stage="plan"} 3.65', lines)
+        self.assertIn('latency_seconds_count{stage="plan"} 4', lines)
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("errors_total", "Errors.", ["tool"])
+        counter.inc(tool='say "hi"\n')
+        self.assertIn('errors_total{tool="say \\"hi\\"\\n"} 1', counter.render())
+
+    def test_track_stage_times_errors_and_labels(self):
+        before = metrics.STAGE_DURATION.count(stage="test-stage")
+        with self.assertRaises(ValueError):
+            with metrics.track_stage("test-stage"):
+                self.assertEqual(metrics.current_stage.get(), "test-stage")
+                raise ValueError("boom")
+        self.assertEqual(metrics.current_stage.get(), "unknown")
+        self.assertEqual(metrics.STAGE_DURATION.count(stage="test-stage"), before + 1)
+        self.assertEqual(metrics.STAGE_ERRORS.value(stage="test-stage"), 1)
+
+    def test_cancelled_stage_is_not_an_error(self):
+        async def stage():
+            with metrics.track_stage("cancelled-stage"):
+                await asyncio.sleep(10)
+
+        async def cancel():
+            task = asyncio.ensure_future(stage())
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+        self.assertEqual(metrics.STAGE_DURATION.count(stage="cancelled-stage"), 1)
+        self.assertEqual(metrics.STAGE_ERRORS.value(stage="cancelled-stage"), 0)
+
+    def test_stage_label_is_per_task(self):
+        seen = {}
+
+        async def stage(name):
+            with metrics.track_stage(name):
+                await asyncio.sleep(0.01)
+                seen[name] = metrics.current_stage.get()
+
+        async def both():
+            await asyncio.gather(stage("verify"), stage("answer"))
+
+        asyncio.run(both())
+        self.assertEqual(seen, {"verify": "verify", "answer": "answer"})
+
+    def test_tier_report_splits_cost_and_latency_by_model(self):
+        from app.agent.tiers import TierStats, estimate_cost
+        metrics.LLM_DURATION.observe(0.2, stage="tier-test", model="gpt-4o-mini")
+        metrics.LLM_DURATION.observe(0.4, stage="tier-test", model="gpt-4o-mini")
+        metrics.LLM_PROMPT_TOKENS.inc(1_000_000, stage="tier-test", model="gpt-4o-mini")
+        metrics.LLM_COMPLETION_TOKENS.inc(1_000_000, stage="tier-test", model="gpt-4o-mini")
+        tiers = TierStats()
+        tiers.record_escalation("unparseable")
+
+        report = tiers.report()
+        entry = report["by_stage"]["tier-test"]["gpt-4o-mini"]
+        self.assertEqual(entry["calls"], 2)
+        self.assertAlmostEqual(entry["avg_latency_ms"], 300.0)
+        self.assertAlmostEqual(entry["cost_usd"], 0.75)
+        self.assertEqual(report["escalations"], {"unparseable": 1})
+        self.assertIsNone(estimate_cost("unknown-model", 10, 10))
+
+if __name__ == "__main__":
+    unittest.main()
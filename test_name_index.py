@@ -0,0 +1,26 @@
+import unittest
+from app.agent.name_index import NameIndex
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = NameIndex(["Alice Smith", "Bob Jones", "Bobby  Tables", "Charlie Brown", "Jon Bobson"])
+
+    def test_case_insensitive_prefix(self):
+        self.assertEqual(self.index.lookup("bob"), ["Bob Jones", "Bobby  Tables", "Jon Bobson"])
+        self.assertEqual(self.index.lookup("ALICE"), ["Alice Smith"])
+
+    def test_matches_later_words(self):
+        # Whole-word matches sort before longer words
+        self.assertEqual(self.index.lookup("jon"), ["Jon Bobson", "Bob Jones"])
+        self.assertEqual(self.index.lookup("Bob  Jo"), ["Bob Jones"])
+        self.assertEqual(self.index.lookup("bobby tab"), ["Bobby  Tables"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.lookup("b", limit=2)), 2)
+
+    def test_no_match(self):
+        self.assertEqual(self.index.lookup("Dave"), [])
+        self.assertEqual(self.index.lookup("   "), [])
+
+if __name__ == '__main__':
+    unittest.main()
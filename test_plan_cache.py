@@ -0,0 +1,142 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from app.cache.sqlite import SQLiteCacheBackend
+from app.agent.plan_cache import PlanCache, extract_slots
+from app.models import Plan, Step
+
+def account_plan(account_id: str) -> Plan:
+    return Plan(steps=[Step(
+        step_number=1,
+        description=f"Look up account details for {account_id}",
+        tool_name="account_lookup",
+        tool_args={"account_id": account_id},
+    )])
+
+class TestPlanCache(unittest.TestCase):
+    def test_extract_slots(self):
+        template, slots = extract_slots("Check CRM notes for Bob Jones and account ACC-456.")
+        self.assertEqual(template, "check crm notes for <<name_0>> and account <<account_0>>")
+        self.assertEqual(slots, {"account_0": "ACC-456", "name_0": "Bob Jones"})
+
+    def test_hit_refills_slots(self):
+        cache = PlanCache()
+        self.assertTrue(cache.put("What is the balance of ACC-123?", account_plan("ACC-123")))
+
+        plan = cache.get("what is the balance of acc-456")
+        self.assertEqual(plan.steps[0].tool_args, {"account_id": "ACC-456"})
+        self.assertEqual(plan.steps[0].description, "Look up account details for ACC-456")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_hit_returns_fresh_copy(self):
+        cache = PlanCache()
+        cache.put("Balance of ACC-123", account_plan("ACC-123"))
+        first = cache.get("Balance of ACC-123")
+        first.steps[0].result = "mutated"
+        self.assertIsNone(cache.get("Balance of ACC-123").steps[0].result)
+
+    def test_miss_and_uncacheable(self):
+        cache = PlanCache()
+        self.assertIsNone(cache.get("CRM notes for Bob"))
+        # The planner expanded "Bob" to "Robert", so the template can't be re-filled safely
+        plan = Plan(steps=[Step(step_number=1, description="notes", tool_name="crm_notes",
+                                tool_args={"client_name": "Robert"})])
+        self.assertFalse(cache.put("CRM notes for Bob", plan))
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(cache.stats()["uncacheable"], 1)
+
+    def test_expanded_entity_is_uncacheable(self):
+        cache = PlanCache()
+        notes = Plan(steps=[Step(step_number=1, description="Notes for Bob Jones", tool_name="crm_notes",
+                                 tool_args={"client_name": "Bob Jones"})])
+        self.assertFalse(cache.put("CRM notes for Bob", notes))
+        self.assertFalse(cache.put("Balance of ACC-123", account_plan("ACC-1234")))
+
+        self.assertIsNone(cache.get("CRM notes for Alice"))
+        self.assertIsNone(cache.get("Balance of ACC-9"))
+        self.assertEqual(cache.stats()["uncacheable"], 2)
+
+    def test_refill_swaps_whole_arg_values(self):
+        cache = PlanCache()
+        plan = Plan(steps=[
+            account_plan("ACC-12").steps[0],
+            Step(step_number=2, description="Look up ACC-1", tool_name="account_lookup",
+                 tool_args={"account_id": "ACC-1"}),
+            Step(step_number=3, description="Search the knowledge base", tool_name="kb_search",
+                 tool_args={"query": "ACC-1 fees"}),
+        ])
+        # "ACC-1 fees" contains an entity without being it, so it couldn't be refilled
+        self.assertFalse(cache.put("Balance of ACC-12 and ACC-1", plan))
+        plan.steps[2].tool_args = {"query": "fees"}
+        self.assertTrue(cache.put("Balance of ACC-12 and ACC-1", plan))
+
+        refilled = cache.get("Balance of ACC-7 and ACC-8")
+        self.assertEqual([s.tool_args for s in refilled.steps],
+                         [{"account_id": "ACC-7"}, {"account_id": "ACC-8"}, {"query": "fees"}])
+        self.assertEqual(refilled.steps[0].description, "Look up account details for ACC-7")
+        self.assertEqual(refilled.steps[1].description, "Look up ACC-8")
+
+    def test_lru_eviction(self):
+        cache = PlanCache(max_entries=2)
+        cache.put("Balance of ACC-1", account_plan("ACC-1"))
+        cache.put("Details of ACC-1", account_plan("ACC-1"))
+        cache.get("Balance of ACC-2")
+        cache.put("Owner of ACC-1", account_plan("ACC-1"))
+        self.assertIsNotNone(cache.get("Balance of ACC-3"))
+        self.assertIsNone(cache.get("Details of ACC-3"))
+
+    def test_ttl_expiry(self):
+        cache = PlanCache(ttl_seconds=0.05)
+        cache.put("Balance of ACC-1", account_plan("ACC-1"))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("Balance of ACC-1"))
+
+    def test_shared_backend_serves_other_workers(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = SQLiteCacheBackend(os.path.join(tmp.name, "cache.db"))
+        self.addCleanup(shared.close)
+        worker_1 = PlanCache(shared=shared)
+        worker_2 = PlanCache(shared=shared)
+        worker_1.put("Balance of ACC-1", account_plan("ACC-1"))
+
+        plan = worker_2.get("Balance of ACC-2")
+        self.assertEqual(plan.steps[0].tool_args, {"account_id": "ACC-2"})
+        self.assertEqual(worker_2.get("Balance of ACC-3").steps[0].tool_args, {"account_id": "ACC-3"})
+        self.assertEqual((worker_2.stats()["hits"], worker_2.stats()["shared_hits"]), (2, 1))
+
+        worker_1.clear()
+        self.assertIsNone(PlanCache(shared=shared).get("Balance of ACC-4"))
+
+    def test_async_shared_io_runs_off_the_event_loop(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = SQLiteCacheBackend(os.path.join(tmp.name, "cache.db"))
+        self.addCleanup(shared.close)
+        threads = []
+        for name in ("get_entry", "set"):
+            method = getattr(shared, name)
+            def recorded(*args, method=method):
+                threads.append(threading.get_ident())
+                return method(*args)
+            setattr(shared, name, recorded)
+
+        async def plan_on_two_workers():
+            await PlanCache(shared=shared).aput("Balance of ACC-1", account_plan("ACC-1"))
+            return threading.get_ident(), await PlanCache(shared=shared).aget("Balance of ACC-2")
+
+        loop_thread, plan = asyncio.run(plan_on_two_workers())
+        self.assertEqual(plan.steps[0].tool_args, {"account_id": "ACC-2"})
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_disabled(self):
+        cache = PlanCache(enabled=False)
+        self.assertFalse(cache.put("Balance of ACC-1", account_plan("ACC-1")))
+        self.assertIsNone(cache.get("Balance of ACC-1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import json
+from app.agent.plan_stream import StepStreamParser
+
+PLAN = {
+    "steps": [
+        {"step_number": 1, "description": "Quote } and \" in text {", "tool_name": "kb_search",
+         "tool_args": {"query": "wire [limits]"}},
+        {"step_number": 2, "description": "Notes", "tool_name": "crm_notes",
+         "tool_args": {"client_name": "Alice"}, "depends_on": [1]},
+    ],
+    "notes": [{"step_number": 99}],
+}
+
+def feed_all(parser, text, size):
+    steps = []
+    for i in range(0, len(text), size):
+        steps.extend((i, step) for step in parser.feed(text[i:i + size]))
+    return steps
+
+def test_steps_emitted_as_soon_as_complete():
+    text = json.dumps(PLAN)
+    parser = StepStreamParser()
+    emitted = feed_all(parser, text, 1)
+
+    assert [step for _, step in emitted] == PLAN["steps"]
+    # The first step is available well before the response finishes
+    assert emitted[0][0] == text.index('}}, {"step_number": 2') + 1
+    assert parser.done
+    assert parser.text == text
+
+def test_ignores_markdown_fence_and_other_keys():
+    text = "```json\n" + json.dumps({"reasoning": 'say "steps": [{}]', **PLAN}, indent=2) + "\n```"
+    steps = [step for _, step in feed_all(StepStreamParser(), text, 7)]
+    assert [s["step_number"] for s in steps] == [1, 2]
+
+def test_incomplete_step_is_not_emitted():
+    parser = StepStreamParser()
+    assert parser.feed('{"steps": [{"step_number": 1, "description": "A"}, {"step_number": 2, "desc') == [
+        {"step_number": 1, "description": "A"}
+    ]
+    assert not parser.done
@@ -0,0 +1,51 @@
+import unittest
+from app.agent.router import FastPathRouter
+
+class TestFastPathRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = FastPathRouter()
+
+    def route(self, query):
+        plan = self.router.route(query)
+        if plan is None:
+            return None
+        self.assertEqual(len(plan.steps), 1)
+        return plan.steps[0].tool_name, plan.steps[0].tool_args
+
+    def test_account_intents(self):
+        self.assertEqual(self.route("What is the balance of account ACC-123?"),
+                         ("account_lookup", {"account_id": "ACC-123"}))
+        self.assertEqual(self.route("show me the details of acc-789"),
+                         ("account_lookup", {"account_id": "ACC-789"}))
+        self.assertEqual(self.route("Lookup account ACC-999"), ("account_lookup", {"account_id": "ACC-999"}))
+
+    def test_crm_intent(self):
+        self.assertEqual(self.route("CRM notes for Bob Jones"), ("crm_notes", {"client_name": "Bob Jones"}))
+        self.assertEqual(self.route("Get notes for Alice."), ("crm_notes", {"client_name": "Alice"}))
+
+    def test_kb_intent(self):
+        self.assertEqual(self.route("Find KB articles about wire transfers."),
+                         ("kb_search", {"query": "wire transfers"}))
+
+    def test_unsure_queries_fall_back(self):
+        self.assertIsNone(self.route("Find CRM notes for Alice and check wire transfer limits."))
+        self.assertIsNone(self.route("What is the balance of non-existent account ACC-999?"))
+        self.assertIsNone(self.route("notes for the client who called yesterday"))
+        self.assertIsNone(self.route("Should Bob move money into ETFs?"))
+
+    def test_stats(self):
+        self.route("CRM notes for Bob")
+        self.route("Is Bob a good fit for ETFs?")
+        self.router.record_planner_latency(1.5)
+        stats = self.router.stats()
+        self.assertEqual(stats["fast_path"], 1)
+        self.assertEqual(stats["fallbacks"], 1)
+        self.assertEqual(stats["fast_path_rate"], 0.5)
+        self.assertAlmostEqual(stats["estimated_saved_ms"], 1500, delta=5)
+
+    def test_disabled(self):
+        router = FastPathRouter(enabled=False)
+        self.assertIsNone(router.route("CRM notes for Bob"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import time
+import unittest
+from app.agent.session import SessionStore
+from app.models import Plan, Step
+
+def plan_with(*results):
+    return Plan(steps=[
+        Step(step_number=i, description="Lookup", tool_name="account_lookup",
+             tool_args={"account_id": f"ACC-{i}"}, result=result)
+        for i, result in enumerate(results, 1)
+    ])
+
+TTLS = {"account_lookup": 60}
+
+class TestSessionStore(unittest.TestCase):
+    def test_records_turns_and_successful_results(self):
+        store = SessionStore(result_ttls=TTLS)
+        session = store.get("s1")
+        store.record_turn(session, "Balance of ACC-1 and ACC-2?", plan_with("$10", "Error executing tool: boom"), "ok")
+
+        self.assertEqual(store.lookup(session, "account_lookup", {"account_id": "ACC-1"}), "$10")
+        self.assertIsNone(store.lookup(session, "account_lookup", {"account_id": "ACC-2"}))
+        self.assertEqual(len(session.turns), 1)
+        self.assertTrue(store.has_result(session, "account_lookup", {"account_id": "ACC-1"}))
+        self.assertFalse(store.has_result(session, "account_lookup", {"account_id": "ACC-2"}))
+        self.assertEqual(store.stats()["tool_hits"], 1)
+        self.assertEqual(store.stats()["bytes"], session.bytes)
+
+    def test_session_cap_drops_oldest_results_first(self):
+        store = SessionStore(result_ttls=TTLS, max_session_bytes=400)
+        session = store.get("s1")
+        store.record_turn(session, "first", plan_with("a" * 150), "answer")
+        store.record_turn(session, "second", plan_with(None, "b" * 150), "answer")
+
+        self.assertIsNone(session.lookup("account_lookup", {"account_id": "ACC-1"}))
+        self.assertIsNotNone(session.lookup("account_lookup", {"account_id": "ACC-2"}))
+        self.assertEqual(len(session.turns), 2)
+        self.assertLessEqual(session.bytes, 400)
+
+    def test_lru_eviction_by_count_and_total_bytes(self):
+        store = SessionStore(result_ttls=TTLS, max_sessions=2, max_bytes=1000)
+        for name in ("s1", "s2"):
+            store.record_turn(store.get(name), "q", plan_with("x" * 300), "a")
+        store.get("s1")  # s2 is now least recently used
+        store.get("s3")
+        self.assertEqual(set(store._sessions), {"s1", "s3"})
+
+        store.record_turn(store.get("s3"), "q", plan_with("y" * 800), "a")
+        self.assertEqual(set(store._sessions), {"s3"})
+        self.assertEqual(store.stats()["evictions"], 2)
+        self.assertLessEqual(store.stats()["bytes"], 1000)
+
+    def test_idle_sessions_expire(self):
+        store = SessionStore(result_ttls=TTLS, idle_ttl=0.05)
+        store.record_turn(store.get("old"), "q", plan_with("x"), "a")
+        time.sleep(0.1)
+        store.get("new")
+        self.assertEqual(set(store._sessions), {"new"})
+        self.assertEqual(store.stats()["expirations"], 1)
+        self.assertEqual(store.stats()["bytes"], 0)
+
+    def test_results_expire_with_their_tool_ttl(self):
+        store = SessionStore(result_ttls={"account_lookup": 0.05})
+        session = store.get("s1")
+        plan = plan_with("$10")
+        plan.steps.append(Step(step_number=2, description="Notes", tool_name="crm_notes",
+                               tool_args={"client_name": "Bob"}, result="notes"))
+        store.record_turn(session, "q", plan, "a")
+
+        self.assertEqual(store.lookup(session, "account_lookup", {"account_id": "ACC-1"}), "$10")
+        # No TTL for crm_notes here, so its result is never reused
+        self.assertIsNone(store.lookup(session, "crm_notes", {"client_name": "Bob"}))
+        time.sleep(0.1)
+        self.assertIsNone(store.lookup(session, "account_lookup", {"account_id": "ACC-1"}))
+
+    def test_delete(self):
+        store = SessionStore(result_ttls=TTLS)
+        session_id = store.create()
+        self.assertTrue(store.delete(session_id))
+        self.assertFalse(store.delete(session_id))
+
+if __name__ == "__main__":
+    unittest.main()
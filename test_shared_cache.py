@@ -0,0 +1,111 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from app.cache.base import create_cache_backend
+from app.cache.sqlite import SQLiteCacheBackend
+
+class TestSQLiteCacheBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "cache", "shared.db")
+
+    def backend(self, **kwargs) -> SQLiteCacheBackend:
+        backend = SQLiteCacheBackend(self.path, **kwargs)
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_get_set_delete_and_namespaces(self):
+        cache = self.backend()
+        cache.set("plan", "k", "plan value", ttl=60)
+        cache.set("tool:kb_search", "k", "tool value", ttl=60)
+        self.assertEqual(cache.get("plan", "k"), "plan value")
+        value, expires_at = cache.get_entry("tool:kb_search", "k")
+        self.assertEqual(value, "tool value")
+        self.assertAlmostEqual(expires_at - time.time(), 60, delta=1)
+
+        self.assertTrue(cache.delete("plan", "k"))
+        self.assertIsNone(cache.get("plan", "k"))
+        self.assertEqual(cache.clear("tool:kb_search"), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (0, 2, 1))
+
+    def test_ttl(self):
+        cache = self.backend(sweep_every=1)
+        cache.set("tool:account_lookup", "k", "balance", ttl=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("tool:account_lookup", "k"))
+        cache.set("plan", "other", "x", ttl=60)  # the sweep drops the expired entry
+        cache.wait_for_sweep()
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_size_limits_evict_least_recently_used(self):
+        cache = self.backend(max_entries=2, max_bytes=10, sweep_every=1)
+
+        def set_and_sweep(key, value):
+            cache.set("ns", key, value, ttl=60)
+            cache.wait_for_sweep()
+
+        set_and_sweep("a", "1234")
+        time.sleep(0.01)
+        set_and_sweep("b", "1234")
+        time.sleep(0.01)
+        set_and_sweep("c", "1234")
+        self.assertIsNone(cache.get("ns", "a"))
+        self.assertEqual(cache.get("ns", "c"), "1234")
+        set_and_sweep("d", "123456")  # over both limits until b, the least recently used, goes
+        self.assertEqual([cache.get("ns", k) for k in "bcd"], [None, "1234", "123456"])
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"], stats["evictions"]), (2, 10, 2))
+
+    def test_shared_across_processes(self):
+        self.backend().set("plan", "written-here", "parent", ttl=60)
+        script = ("import sys; from app.cache.sqlite import SQLiteCacheBackend; "
+                  "cache = SQLiteCacheBackend(sys.argv[1]); "
+                  "print(cache.get('plan', 'written-here')); cache.set('plan', 'written-there', 'child', 60)")
+        root = os.path.dirname(os.path.abspath(__file__))
+        output = subprocess.run([sys.executable, "-c", script, self.path], cwd=root, capture_output=True,
+                                text=True, check=True).stdout
+        self.assertEqual(output.strip(), "parent")
+        self.assertEqual(self.backend().get("plan", "written-there"), "child")
+
+    def test_sweep_runs_in_the_background(self):
+        cache = self.backend(sweep_every=2)
+        cache.set("ns", "a", "1", ttl=60)
+        self.assertIsNone(cache._sweeper)
+        cache.set("ns", "b", "1", ttl=60)
+        self.assertEqual(cache._sweeper.name, "cache-sweep")
+        cache.wait_for_sweep()
+        self.assertFalse(cache.sweeping)
+
+    def test_async_variants(self):
+        cache = self.backend()
+
+        async def roundtrip():
+            await cache.aset("plan", "k", "v", ttl=60)
+            return await cache.aget_entry("plan", "k")
+
+        self.assertEqual(asyncio.run(roundtrip())[0], "v")
+
+    def test_failures_are_misses(self):
+        cache = self.backend(pool_size=1)
+        cache._pool.queue[0].close()
+        self.assertIsNone(cache.get("plan", "k"))
+        cache.set("plan", "k", "v", ttl=60)
+        self.assertEqual(cache.stats()["errors"], 3)  # read, write and the stats query itself
+
+    def test_create_backend(self):
+        self.assertIsNone(create_cache_backend("none"))
+        backend = create_cache_backend("sqlite", self.path)
+        self.addCleanup(backend.close)
+        self.assertIsInstance(backend, SQLiteCacheBackend)
+        with self.assertRaises(ValueError):
+            create_cache_backend("redis")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from app.cache.sqlite import SQLiteCacheBackend
+from app.agent.executor import StepExecutor
+from app.agent.tool_cache import ToolResultCache
+from app.models import Plan, Step
+
+class TestToolResultCache(unittest.TestCase):
+    def test_hit_ignores_argument_order(self):
+        cache = ToolResultCache({"kb_search": 60})
+        cache.put("kb_search", {"query": "wire", "limit": 3}, "result")
+        self.assertEqual(cache.get("kb_search", {"limit": 3, "query": "wire"}), "result")
+        self.assertEqual(cache.stats()["per_tool"]["kb_search"], {"hits": 1, "misses": 0})
+
+    def test_per_tool_ttl(self):
+        cache = ToolResultCache({"account_lookup": 0.05, "kb_search": 60})
+        cache.put("account_lookup", {"account_id": "ACC-123"}, "balance")
+        cache.put("kb_search", {"query": "wire"}, "article")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("account_lookup", {"account_id": "ACC-123"}))
+        self.assertEqual(cache.get("kb_search", {"query": "wire"}), "article")
+
+    def test_tool_without_ttl_is_not_cached(self):
+        cache = ToolResultCache({})
+        cache.put("crm_notes", {"client_name": "Bob"}, "notes")
+        self.assertIsNone(cache.get("crm_notes", {"client_name": "Bob"}))
+
+    def test_bounded_by_bytes(self):
+        cache = ToolResultCache({"kb_search": 60}, max_bytes=10)
+        cache.put("kb_search", {"query": "a"}, "12345")
+        cache.put("kb_search", {"query": "b"}, "12345")
+        cache.put("kb_search", {"query": "c"}, "12345")
+        self.assertIsNone(cache.get("kb_search", {"query": "a"}))
+        self.assertEqual(cache.stats()["bytes"], 10)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_invalidation(self):
+        cache = ToolResultCache({"account_lookup": 60})
+        cache.put("account_lookup", {"account_id": "ACC-1"}, "one")
+        cache.put("account_lookup", {"account_id": "ACC-2"}, "two")
+
+        self.assertTrue(cache.invalidate("account_lookup", {"account_id": "ACC-1"}))
+        self.assertFalse(cache.invalidate("account_lookup", {"account_id": "ACC-1"}))
+        self.assertEqual(cache.invalidate_tool("account_lookup"), 1)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_shared_backend_serves_other_workers(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = SQLiteCacheBackend(os.path.join(tmp.name, "cache.db"))
+        self.addCleanup(shared.close)
+        worker_1 = ToolResultCache({"account_lookup": 60, "kb_search": 0.05}, shared=shared)
+        worker_2 = ToolResultCache({"account_lookup": 60, "kb_search": 0.05}, shared=shared)
+
+        worker_1.put("account_lookup", {"account_id": "ACC-1"}, "one")
+        worker_1.put("kb_search", {"query": "wire"}, "article")
+        self.assertEqual(worker_2.get("account_lookup", {"account_id": "ACC-1"}), "one")
+        self.assertEqual(worker_2.stats()["shared_hits"], 1)
+        self.assertEqual(worker_2.stats()["entries"], 1)  # now also held locally
+        time.sleep(0.1)
+        self.assertIsNone(worker_2.get("kb_search", {"query": "wire"}))
+
+        # Invalidation drops the shared copy, so workers that haven't cached it locally miss
+        worker_1.put("account_lookup", {"account_id": "ACC-2"}, "two")
+        self.assertTrue(worker_2.invalidate("account_lookup", {"account_id": "ACC-2"}))
+        worker_2.invalidate_tool("account_lookup")
+        worker_3 = ToolResultCache({"account_lookup": 60}, shared=shared)
+        self.assertIsNone(worker_3.get("account_lookup", {"account_id": "ACC-1"}))
+        self.assertIsNone(worker_3.get("account_lookup", {"account_id": "ACC-2"}))
+
+    def test_async_lookup_reads_shared_backend_off_the_event_loop(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = SQLiteCacheBackend(os.path.join(tmp.name, "cache.db"))
+        self.addCleanup(shared.close)
+        ToolResultCache({"account_lookup": 60}, shared=shared).put("account_lookup", {"account_id": "ACC-1"}, "one")
+        threads = []
+        get_entry = shared.get_entry
+        def recorded(*args):
+            threads.append(threading.get_ident())
+            return get_entry(*args)
+        shared.get_entry = recorded
+
+        async def lookup(cache):
+            return threading.get_ident(), await cache.aget("account_lookup", {"account_id": "ACC-1"})
+
+        cache = ToolResultCache({"account_lookup": 60}, shared=shared)
+        loop_thread, result = asyncio.run(lookup(cache))
+        self.assertEqual(result, "one")
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+        self.assertEqual(cache.stats()["shared_hits"], 1)
+
+    def test_executor_serves_cached_results(self):
+        calls = []
+
+        def lookup(account_id: str) -> str:
+            calls.append(account_id)
+            return f"details {account_id}"
+
+        executor = StepExecutor({"account_lookup": lookup}, cache=ToolResultCache({"account_lookup": 60}))
+        for _ in range(2):
+            plan = Plan(steps=[Step(step_number=1, description="lookup", tool_name="account_lookup",
+                                    tool_args={"account_id": "ACC-1"})])
+            asyncio.run(executor.run(plan))
+            self.assertEqual(plan.steps[0].result, "details ACC-1")
+        self.assertEqual(calls, ["ACC-1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from typing import Dict, List, Optional
+
+from app.agent.tool_schemas import function_schema, tool_schemas
+from app.agent.tools import AVAILABLE_TOOLS
+
+def sample_tool(names: List[str], limit: int = 5, filters: Optional[Dict] = None, verbose: bool = False) -> str:
+    """
+    Does a sample thing
+    across two lines.
+
+    Details the model doesn't need.
+    """
+    return ""
+
+class TestToolSchemas(unittest.TestCase):
+    def test_types_defaults_and_description(self):
+        schema = function_schema("sample_tool", sample_tool)["function"]
+        self.assertEqual(schema["description"], "Does a sample thing across two lines.")
+        self.assertEqual(schema["parameters"]["properties"], {
+            "names": {"type": "array", "items": {"type": "string"}},
+            "limit": {"type": "integer"},
+            "filters": {"type": "object"},
+            "verbose": {"type": "boolean"},
+        })
+        self.assertEqual(schema["parameters"]["required"], ["names"])
+
+    def test_available_tools(self):
+        schemas = {s["function"]["name"]: s["function"] for s in tool_schemas(AVAILABLE_TOOLS)}
+        self.assertEqual(set(schemas), set(AVAILABLE_TOOLS))
+        self.assertEqual(schemas["account_lookup"]["parameters"]["required"], ["account_id"])
+        self.assertEqual(schemas["account_lookup_many"]["parameters"]["properties"]["account_ids"]["type"], "array")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+from app.agent import llm
 from app.agent.core import AgentCore
 from dotenv import load_dotenv
 import os
@@ -7,11 +8,13 @@ load_dotenv()
 
 def test_real_agent():
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if llm.cassette.mode == "replay":
+        print(f"Replaying recorded LLM responses from {llm.cassette.path}")
+    elif not api_key:
         print("Error: OPENAI_API_KEY not found in environment.")
         return
-
-    print(f"Testing with API Key: {api_key[:5]}... (masked)")
+    else:
+        print(f"Testing with API Key: {api_key[:5]}... (masked)")
     
     agent = AgentCore()
     query = "What is the balance of account ACC-123?"